@@ -0,0 +1,132 @@
+"""
+异步下载引擎基准测试
+
+在本地回环地址上启动多个带固定延迟的桩服务（模拟多个论文库主机）并提供合成 PDF，分别以
+“下载调度器 + 下载线程”（生产环境的 `fetch_paper`）与“异步下载引擎”（`AsyncDownloadEngine.fetch_paper`）批量下载，
+统计总耗时、吞吐（篇/秒、MB/秒）以及每篇论文从提交到完成的 p50 / p99。
+两种模式都包含论文清单、负缓存与文本读取；计时前预先解析合成论文并写入两种模式的解析文本缓存，
+使结果反映下载路径本身，而不是两者相同的 PDF 解析耗时。
+
+使用方法：
+    python -m benchmarks.bench_async_download --papers 500 --hosts 8 --threads 4 --concurrency 64 --per-host 8
+"""
+
+import io
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import urllib3
+
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+# 同一批链接在两种模式下各下载一次，不写入负缓存
+os.environ.setdefault("NEGATIVE_CACHE_ENABLED", "false")
+
+from .pdf_fixtures import write_fixture_corpus  # noqa: E402
+from .stub_core_server import StubCoreServer  # noqa: E402
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def run_threaded(urls: list[str], num_threads: int) -> list[float]:
+    """下载调度器 + 线程执行 `fetch_paper`（保存到 SAVE_DIR）：返回每篇完成耗时（毫秒）"""
+    from src.services.download_scheduler import DownloadScheduler
+    from src.tools.download_tools import fetch_paper
+
+    scheduler = DownloadScheduler(max_concurrency=num_threads, per_host=num_threads)
+
+    def download(url: str, batch_start: float) -> float:
+        fetch_paper(url)
+        return (time.perf_counter() - batch_start) * 1000
+
+    batch_start = time.perf_counter()
+    futures = [scheduler.submit(url, download, url, batch_start, priority=i) for i, url in enumerate(urls)]
+    latencies = [future.result() for future in futures]
+    scheduler.shutdown()
+    return latencies
+
+
+async def run_async(urls: list[str], concurrency: int, per_host: int, save_dir: str) -> tuple[list[float], dict]:
+    """异步下载引擎执行 `fetch_paper`：返回每篇完成耗时（毫秒）与引擎统计"""
+    from src.services.async_downloader import AsyncDownloadEngine
+
+    async with AsyncDownloadEngine(max_concurrency=concurrency, per_host=per_host, max_retries=0, save_dir=save_dir) as engine:
+        batch_start = time.perf_counter()
+
+        async def timed(url: str) -> float:
+            await engine.fetch_paper(url)
+            return (time.perf_counter() - batch_start) * 1000
+
+        latencies = await asyncio.gather(*(timed(url) for url in urls))
+        return list(latencies), engine.stats()
+
+
+def report(label: str, latencies: list[float], total_bytes: int, total: float) -> None:
+    # bench_core_pooling 导入时会加载配置，需在设置 SAVE_DIR 之后导入
+    from .bench_core_pooling import percentile
+
+    print(f"{label:<14}{total:>10.2f}{len(latencies) / total:>10.1f}{total_bytes / total / 2**20:>10.2f}"
+          f"{percentile(latencies, 50):>12.0f}{percentile(latencies, 99):>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步下载引擎基准测试")
+    parser.add_argument("--papers", type=int, default=500, help="每种模式下载的论文数")
+    parser.add_argument("--threads", type=int, default=4, help="线程模式的下载线程数（DOWNLOAD_MAX_CONCURRENCY）")
+    parser.add_argument("--concurrency", type=int, default=64, help="异步模式的全局并发数")
+    parser.add_argument("--per-host", type=int, default=8, help="异步模式的单主机并发数")
+    parser.add_argument("--hosts", type=int, default=8, help="桩服务主机数（127.0.0.1 起的回环地址）")
+    parser.add_argument("--latency", type=float, default=0.05, help="桩服务每个请求的固定延迟（秒）")
+    parser.add_argument("--pages", type=int, default=4, help="每篇合成论文的页数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixtures_dir = os.path.join(work_dir, "fixtures")
+        fixture_paths = write_fixture_corpus(fixtures_dir, 10, num_pages=args.pages)
+        stubs = [
+            StubCoreServer(host=f"127.0.0.{i + 1}", fixtures_dir=fixtures_dir, latency=args.latency).start()
+            for i in range(args.hosts)
+        ]
+        names = [os.path.basename(path) for path in fixture_paths]
+        total_bytes = sum(os.path.getsize(fixture_paths[i % len(fixture_paths)]) for i in range(args.papers))
+        # 线程模式的 fetch_paper 保存到配置中的 SAVE_DIR，需在导入前设置
+        os.environ["SAVE_DIR"] = os.path.join(work_dir, "threaded")
+        from src.services.http_session import close_download_pool_manager
+        from src.services.text_cache import get_text_cache
+        async_dir = os.path.join(work_dir, "async")
+        for save_dir in (os.environ["SAVE_DIR"], async_dir):
+            for path in fixture_paths:
+                get_text_cache(save_dir).load_or_extract(path)
+        # 论文轮流分布在各主机上；查询参数使每个链接互不相同，论文清单不会按链接命中
+        urls = [
+            f"{stubs[i % len(stubs)].origin}/files/{names[i % len(names)]}?paper={i}" for i in range(args.papers)
+        ]
+        try:
+            print(f"📊 {args.papers} 篇论文（{args.hosts} 个主机），单篇约 {os.path.getsize(fixture_paths[0]) // 1024} KB，"
+                  f"每个请求延迟 {args.latency * 1000:.0f} ms")
+            print(f"{'模式':<14}{'总耗时(s)':>10}{'篇/秒':>10}{'MB/秒':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+
+            start = time.perf_counter()
+            # 合成论文内容重复，屏蔽内容寻址存储的“内容已存在”提示
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies = run_threaded(urls, args.threads)
+            report(f"{args.threads} 线程", latencies, total_bytes, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, stats = asyncio.run(
+                    run_async(urls, args.concurrency, args.per_host, async_dir)
+                )
+            report(f"异步 x{args.concurrency}", latencies, total_bytes, time.perf_counter() - start)
+            print(f"   异步引擎: 下载 {stats['downloaded']} 篇，失败 {stats['failed']} 篇，峰值并发 {stats['peak_concurrency']}")
+        finally:
+            close_download_pool_manager()
+            for stub in stubs:
+                stub.stop()
+
+
+if __name__ == "__main__":
+    main()
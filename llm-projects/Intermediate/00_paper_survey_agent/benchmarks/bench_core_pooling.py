@@ -0,0 +1,105 @@
+"""
+CORE API 连接池基准测试
+
+在本地启动一个自签名证书的 HTTPS 桩服务（benchmarks/stub_core_server.py），
+分别在启用 / 关闭共享连接池的情况下执行搜索，统计 p50 / p99 延迟。
+
+使用方法：
+    python -m benchmarks.bench_core_pooling --requests 200 --threads 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+# 基准测试不依赖真实的密钥与模型，且必须绕过搜索缓存与限流
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("CORE_API_KEY", "benchmark")
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["CORE_RATE_LIMIT"] = "0"
+
+from src.services.core_api import CoreAPIWrapper  # noqa: E402
+from src.services.http_session import close_core_session  # noqa: E402
+from .stub_core_server import StubCoreServer  # noqa: E402
+
+
+def generate_self_signed_cert(cert_dir: str) -> tuple[str, str]:
+    """使用 openssl 生成 127.0.0.1 的自签名证书"""
+    cert_path = os.path.join(cert_dir, "cert.pem")
+    key_path = os.path.join(cert_dir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key_path, "-out", cert_path, "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True
+    )
+    return cert_path, key_path
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """最近秩法计算分位数"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_case(pooled: bool, num_requests: int, num_threads: int) -> list[float]:
+    """执行一组搜索并返回每次请求的耗时（毫秒）"""
+    close_core_session()
+    latencies: list[float] = []
+    lock = threading.Lock()
+    per_thread = num_requests // num_threads
+
+    def worker():
+        for i in range(per_thread):
+            # 与 search-papers 工具一致：每次调用都新建 CoreAPIWrapper
+            wrapper = CoreAPIWrapper(top_k_results=1, pooled_session=pooled)
+            start = time.perf_counter()
+            wrapper._request_search(f"benchmark query {i}")
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CORE API 连接池基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每种模式的请求总数")
+    parser.add_argument("--threads", type=int, default=4, help="并发线程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cert_dir:
+        cert_path, key_path = generate_self_signed_cert(cert_dir)
+        os.environ["REQUESTS_CA_BUNDLE"] = cert_path
+        stub = StubCoreServer(certfile=cert_path, keyfile=key_path).start()
+        CoreAPIWrapper.base_url = stub.base_url
+
+        try:
+            # 预热，避免首次导入与证书加载影响结果
+            run_case(True, args.threads, args.threads)
+
+            print(f"📊 {args.requests} 次搜索，{args.threads} 个线程")
+            print(f"{'模式':<12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'总耗时 (s)':>14}")
+            for pooled in (False, True):
+                start = time.perf_counter()
+                latencies = run_case(pooled, args.requests, args.threads)
+                total = time.perf_counter() - start
+                label = "连接池" if pooled else "无连接池"
+                print(f"{label:<12}{percentile(latencies, 50):>12.2f}{percentile(latencies, 99):>12.2f}{total:>14.2f}")
+        finally:
+            close_core_session()
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
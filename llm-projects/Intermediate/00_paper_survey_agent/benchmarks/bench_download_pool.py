@@ -0,0 +1,99 @@
+"""
+论文下载连接池基准测试
+
+在本地启动自签名证书的 HTTPS 桩服务并提供合成 PDF，
+分别以“每次下载新建 PoolManager”（原实现）与“共享 PoolManager”下载同一主机上的论文，
+统计每篇论文下载耗时的 p50 / p99 与连接复用情况（不含 PDF 解析）。
+
+使用方法：
+    python -m benchmarks.bench_download_pool --papers 200 --threads 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import threading
+import urllib3
+
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.services.http_session import (  # noqa: E402
+    create_download_pool_manager, get_download_pool_manager, close_download_pool_manager, download_metrics
+)
+from src.tools.download_tools import _iter_response_chunks  # noqa: E402
+from .bench_core_pooling import generate_self_signed_cert, percentile  # noqa: E402
+from .pdf_fixtures import write_fixture_corpus  # noqa: E402
+from .stub_core_server import StubCoreServer  # noqa: E402
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def run_case(shared: bool, urls: list[str], num_threads: int, save_dir: str) -> list[float]:
+    """下载全部链接并返回每篇耗时（毫秒）"""
+    close_download_pool_manager()
+    download_metrics.reset()
+    latencies: list[float] = []
+    lock = threading.Lock()
+    chunks = [urls[i::num_threads] for i in range(num_threads)]
+
+    def worker(worker_urls: list[str], worker_id: int):
+        for i, url in enumerate(worker_urls):
+            start = time.perf_counter()
+            # 原实现：每次下载新建 PoolManager，无法复用连接
+            http = get_download_pool_manager() if shared else create_download_pool_manager()
+            response = http.request("GET", url, preload_content=False)
+            try:
+                with open(os.path.join(save_dir, f"w{worker_id}_{i}.pdf"), "wb") as f:
+                    for chunk in _iter_response_chunks(response):
+                        f.write(chunk)
+            finally:
+                response.release_conn()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(chunk, i)) for i, chunk in enumerate(chunks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="论文下载连接池基准测试")
+    parser.add_argument("--papers", type=int, default=200, help="每种模式下载的论文数")
+    parser.add_argument("--threads", type=int, default=4, help="下载线程数")
+    parser.add_argument("--pages", type=int, default=4, help="每篇合成论文的页数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cert_path, key_path = generate_self_signed_cert(work_dir)
+        fixtures_dir = os.path.join(work_dir, "fixtures")
+        fixture_paths = write_fixture_corpus(fixtures_dir, 10, num_pages=args.pages)
+        save_dir = os.path.join(work_dir, "papers")
+        os.makedirs(save_dir)
+
+        stub = StubCoreServer(fixtures_dir=fixtures_dir, certfile=cert_path, keyfile=key_path).start()
+        names = [os.path.basename(path) for path in fixture_paths]
+        urls = [f"{stub.origin}/files/{names[i % len(names)]}" for i in range(args.papers)]
+        try:
+            print(f"📊 {args.papers} 篇论文，{args.threads} 个线程，单篇约 {os.path.getsize(fixture_paths[0]) // 1024} KB")
+            print(f"{'模式':<14}{'p50 (ms)':>12}{'p99 (ms)':>12}{'总耗时 (s)':>14}{'新建连接':>10}")
+            for shared in (False, True):
+                start = time.perf_counter()
+                latencies = run_case(shared, urls, args.threads, save_dir)
+                total = time.perf_counter() - start
+                label = "共享连接池" if shared else "每次新建"
+                new_connections = download_metrics.snapshot()["new_connections"]
+                print(f"{label:<14}{percentile(latencies, 50):>12.2f}{percentile(latencies, 99):>12.2f}"
+                      f"{total:>14.2f}{new_connections:>10}")
+        finally:
+            close_download_pool_manager()
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
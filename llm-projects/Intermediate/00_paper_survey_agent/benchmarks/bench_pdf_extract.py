@@ -0,0 +1,81 @@
+"""
+PDF 并行解析基准测试
+
+在临时保存目录中生成合成论文 PDF，分别以 1 到 N 个进程运行 `PaperService.extract_paper_content_from_save_dir`
+（每次运行前清空解析文本缓存），统计总耗时、相对单进程的加速比与并行效率，
+并检查各进程数下的结果（顺序与内容）完全一致；最后统计缓存全部命中时的耗时。
+
+使用方法：
+    python -m benchmarks.bench_pdf_extract --papers 32 --pages 8 --max-workers 8
+"""
+
+import io
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from .pdf_fixtures import write_fixture_corpus  # noqa: E402
+
+
+def worker_counts(max_workers: int) -> list[int]:
+    """1, 2, 4, ... 直到 max_workers（含）"""
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    if max_workers > 1:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 并行解析基准测试")
+    parser.add_argument("--papers", type=int, default=32, help="合成论文数")
+    parser.add_argument("--pages", type=int, default=8, help="每篇合成论文的页数")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="最大进程数")
+    parser.add_argument("--chunk-size", type=int, default=0, help="每个进程池任务包含的文件数，0 表示自动")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        save_dir = os.path.join(work_dir, "papers")
+        write_fixture_corpus(save_dir, args.papers, num_pages=args.pages)
+        # PaperService 从配置读取保存目录与分块大小，需在导入前设置
+        os.environ["SAVE_DIR"] = save_dir
+        os.environ["PDF_EXTRACT_CHUNK_SIZE"] = str(args.chunk_size)
+        from src.services.paper_service import PaperService
+        from src.services.paper_store import TEXT_DIRNAME
+
+        print(f"📊 {args.papers} 篇合成论文，每篇 {args.pages} 页，CPU 核数 {os.cpu_count()}")
+        print(f"{'进程数':<8}{'总耗时(s)':>12}{'篇/秒':>10}{'加速比':>10}{'并行效率':>10}")
+        baseline = None
+        reference = None
+        for workers in worker_counts(args.max_workers):
+            shutil.rmtree(os.path.join(save_dir, TEXT_DIRNAME), ignore_errors=True)
+            service = PaperService(extract_workers=workers)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                papers = service.extract_paper_content_from_save_dir()
+            total = time.perf_counter() - start
+            baseline = baseline or total
+            print(f"{workers:<8}{total:>12.2f}{len(papers) / total:>10.2f}{baseline / total:>10.2f}"
+                  f"{baseline / total / workers:>10.0%}")
+
+            result = [(paper["filename"], paper["content"]) for paper in papers]
+            if reference is None:
+                reference = result
+            elif result != reference:
+                print(f"⚠️ {workers} 个进程的结果与单进程不一致")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            papers = PaperService().extract_paper_content_from_save_dir()
+        print(f"⚡ 缓存全部命中: {len(papers)} 篇，耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+搜索结果格式化 token 基准测试
+
+构造 100 条接近真实 CORE 返回的合成结果，对比原格式（完整摘要与全部作者）与
+按 token 预算精简后的格式所需的输入 token 数。
+
+使用方法：
+    python -m benchmarks.bench_result_formatter --results 100
+"""
+
+import os
+import random
+import argparse
+
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.services.result_formatter import estimate_tokens, format_search_results  # noqa: E402
+
+WORDS = (
+    "model learning neural network data training attention transformer diffusion graph "
+    "representation method results performance task benchmark evaluation framework propose "
+    "approach generation image language large scale robust efficient analysis experiments"
+).split()
+
+
+def synthetic_results(count: int, seed: int = 0) -> list[dict]:
+    """生成合成搜索结果（摘要约 1500 字符，作者 3-15 人）"""
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        abstract = " ".join(rng.choice(WORDS) for _ in range(220))
+        results.append({
+            "id": 100000000 + i,
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).title(),
+            "publishedDate": f"20{rng.randint(15, 25)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}T00:00:00",
+            "yearPublished": None,
+            "authors": [{"name": f"Author{j}, Firstname{j}"} for j in range(rng.randint(3, 15))],
+            "abstract": abstract[:1500],
+            "downloadUrl": f"https://core.ac.uk/download/{200000000 + i}.pdf",
+        })
+    return results
+
+
+def legacy_format(results: list[dict]) -> str:
+    """改造前 CoreAPIWrapper.search 的输出格式"""
+    docs = []
+    for result in results:
+        published_date_str = result.get('publishedDate') or result.get('yearPublished', '')
+        authors_str = ' and '.join([item['name'] for item in result.get('authors', [])])
+        docs.append((
+            f"* ID: {result.get('id', '')}\n"
+            f"* 标题: {result.get('title', '')}\n"
+            f"* 发表日期: {published_date_str}\n"
+            f"* 作者: {authors_str}\n"
+            f"* 摘要: {result.get('abstract', '')}\n"
+            f"* 论文下载链接: {result.get('downloadUrl') or result.get('sourceFulltextUrls', '')}"
+        ))
+    return "\n-----\n".join(docs)
+
+
+def load_tokenizer():
+    """若本地已缓存 tiktoken 词表则使用精确计数，否则返回 None"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索结果格式化 token 基准测试")
+    parser.add_argument("--results", type=int, default=100, help="合成结果数量")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.results)
+    tokenizer = load_tokenizer()
+    cases = [
+        ("原格式", legacy_format(results)),
+        ("精简（默认预算）", format_search_results(results)),
+        ("精简（预算 8000）", format_search_results(results, token_budget=8000)),
+        ("仅 ID", format_search_results(results, id_only=True)),
+    ]
+
+    baseline = estimate_tokens(cases[0][1])
+    print(f"📊 {args.results} 条搜索结果（token 为{'tiktoken cl100k_base 计数' if tokenizer else '估算值'}）")
+    print(f"{'格式':<16}{'字符数':>10}{'tokens':>10}{'降幅':>10}")
+    for label, text in cases:
+        tokens = len(tokenizer.encode(text)) if tokenizer else estimate_tokens(text)
+        base = len(tokenizer.encode(cases[0][1])) if tokenizer else baseline
+        print(f"{label:<16}{len(text):>10}{tokens:>10}{1 - tokens / base:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
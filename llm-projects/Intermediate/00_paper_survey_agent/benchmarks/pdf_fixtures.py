@@ -0,0 +1,90 @@
+"""
+合成 PDF 夹具
+
+生成可被 pdfplumber 正常解析的最小 PDF（每页若干行 Helvetica 文本），
+用于离线基准测试中的下载与解析环节，无需第三方依赖。
+"""
+
+import os
+import random
+from typing import Optional
+
+# 合成正文使用的词表
+WORDS = (
+    "model learning neural network attention transformer diffusion graph retrieval language "
+    "training dataset benchmark evaluation optimization gradient inference representation "
+    "generation survey method result analysis experiment architecture embedding token"
+).split()
+
+
+def _escape(text: str) -> str:
+    """转义 PDF 字符串中的特殊字符"""
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """
+    生成 PDF
+
+    Args:
+        pages: 每页的文本行
+
+    Returns:
+        PDF 文件内容
+    """
+    page_count = len(pages)
+    # 对象编号：1 目录，2 页树，3 字体，之后每页依次为页面对象与内容流
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(page_count))}] /Count {page_count} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        content_ref = 5 + 2 * i
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_ref} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>".encode()
+        )
+        body = "BT /F1 10 Tf 12 TL 50 750 Td " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        stream = body.encode("latin-1", "replace")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def make_paper_pdf(title: str, num_pages: int = 4, lines_per_page: int = 50, seed: Optional[int] = None) -> bytes:
+    """生成一篇合成论文：首行为标题，其余为随机词组成的正文"""
+    rng = random.Random(seed)
+    pages = []
+    for page in range(num_pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(lines_per_page)]
+        if page == 0:
+            lines[0] = title
+        pages.append(lines)
+    return make_pdf(pages)
+
+
+def write_fixture_corpus(directory: str, count: int, num_pages: int = 4, seed: int = 0) -> list[str]:
+    """
+    在目录中生成合成论文 PDF（已存在的同名文件会被覆盖）
+
+    Returns:
+        生成的文件路径
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"paper_{i:04d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_paper_pdf(f"Synthetic paper {i}", num_pages=num_pages, seed=seed + i))
+        paths.append(path)
+    return paths
@@ -0,0 +1,424 @@
+"""
+本地 CORE API 桩服务与录制 / 回放磁带
+
+用于在无法访问 api.core.ac.uk 与论文主机的环境（CI、隔离网络）中对搜索与下载链路做基准测试。
+
+三种模式：
+- synthetic：按查询确定性地生成 /v3/search/works 结果，downloadUrl 指向夹具目录中的 PDF；
+- record：将搜索请求转发到真实的 CORE API，论文在首次被请求时从原始链接下载，全部写入磁带目录；
+- replay：只从磁带目录返回，结果确定且无需网络（磁带中不存在的请求返回 404）。
+
+record / replay 模式下，结果中的下载链接会被改写为桩服务的 /files/<key>/<原文件名>，下载同样经过磁带。
+所有模式都支持注入延迟、5xx 错误与 429（带 Retry-After）。
+
+使用方法：
+    # 生成 20 篇合成论文并启动桩服务
+    python -m benchmarks.stub_core_server --fixtures .cache/fixtures --generate 20 --port 8765
+    # 录制一次真实响应，之后离线回放
+    python -m benchmarks.stub_core_server --mode record --cassette .cache/cassette --port 8765
+    python -m benchmarks.stub_core_server --mode replay --cassette .cache/cassette --port 8765
+
+然后在运行 agent 或基准测试时设置 CORE_API_BASE_URL=http://127.0.0.1:8765/v3。
+"""
+
+import os
+import re
+import ssl
+import json
+import time
+import zlib
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import urllib3
+
+DEFAULT_UPSTREAM = "https://api.core.ac.uk/v3"
+MODES = ("synthetic", "record", "replay")
+
+
+def cassette_key(data: Any) -> str:
+    """磁带条目的键：规范化 JSON 的 SHA-256"""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """磁带目录：search/<key>.json 保存搜索响应，files/<key>.json + .bin 保存下载内容"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "search"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "files"), exist_ok=True)
+
+    def _path(self, kind: str, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, kind, f"{key}{suffix}")
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """先写临时文件再原子替换"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load_search(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path("search", key, ".json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_search(self, key: str, entry: Dict[str, Any]) -> None:
+        self._write(self._path("search", key, ".json"), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def load_file(self, key: str) -> Optional[tuple[Dict[str, Any], bytes]]:
+        meta_path = self._path("files", key, ".json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self._path("files", key, ".bin"), "rb") as f:
+            return meta, f.read()
+
+    def save_file(self, key: str, meta: Dict[str, Any], body: bytes) -> None:
+        # 先写内容再写元数据，元数据存在即表示条目完整
+        self._write(self._path("files", key, ".bin"), body)
+        self._write(self._path("files", key, ".json"), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """监听队列加长的 HTTP 服务（默认 5 在数百个并发连接时会被拒绝）"""
+
+    request_queue_size = 128
+
+
+class StubCoreServer:
+    """本地 CORE API 桩服务"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        mode: str = "synthetic",
+        fixtures_dir: Optional[str] = None,
+        cassette_dir: Optional[str] = None,
+        upstream: str = DEFAULT_UPSTREAM,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        total_hits: int = 1000,
+        seed: int = 0,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+    ):
+        """
+        Args:
+            host / port: 监听地址，port=0 时随机分配
+            mode: synthetic / record / replay
+            fixtures_dir: synthetic 模式下提供下载的 PDF 目录
+            cassette_dir: record / replay 模式的磁带目录
+            upstream: record 模式转发的 CORE API 地址
+            latency / jitter: 每个请求的固定延迟与随机附加延迟（秒）
+            error_rate: 注入 500 错误的概率
+            rate_limit_rate: 注入 429 的概率
+            retry_after: 429 响应的 Retry-After（秒）
+            total_hits: synthetic 模式下每个查询的结果总数
+            seed: 随机注入的种子
+            certfile / keyfile: 提供时以 HTTPS 提供服务
+        """
+        if mode not in MODES:
+            raise ValueError(f"未知模式: {mode}，可选 {', '.join(MODES)}")
+        if mode != "synthetic" and not cassette_dir:
+            raise ValueError(f"{mode} 模式需要指定磁带目录")
+
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir
+        self.cassette = Cassette(cassette_dir) if cassette_dir else None
+        self.upstream = upstream.rstrip("/")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.total_hits = total_hits
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "search": 0, "files": 0, "injected_429": 0, "injected_errors": 0, "cassette_misses": 0}
+        self._fixtures = sorted(
+            name for name in os.listdir(fixtures_dir) if name.endswith(".pdf")
+        ) if fixtures_dir and os.path.isdir(fixtures_dir) else []
+        self._file_urls: Dict[str, str] = {}  # record 模式：/files/<key> → 原始下载链接
+        self._http = urllib3.PoolManager(cert_reqs="CERT_NONE") if mode == "record" else None
+
+        handler = type("BoundStubHandler", (StubHandler,), {"stub": self})
+        self.server = _StubHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+            self.scheme = "https"
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def origin(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        """供 CORE_API_BASE_URL 使用的地址"""
+        return f"{self.origin}/v3"
+
+    def start(self) -> "StubCoreServer":
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubCoreServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def inject(self) -> Optional[int]:
+        """按配置休眠并决定是否注入错误，返回注入的状态码"""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._rng.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            self.count("injected_429")
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.count("injected_errors")
+            return 500
+        return None
+
+    # ---- 搜索 ----
+
+    def search(self, params: Dict[str, Any], authorization: Optional[str]) -> tuple[int, bytes]:
+        """处理搜索请求，返回 (状态码, JSON 响应体)"""
+        if self.mode == "synthetic":
+            return 200, json.dumps(self._synthetic_search(params)).encode("utf-8")
+
+        key = cassette_key(params)
+        entry = self.cassette.load_search(key)
+        if entry is None:
+            if self.mode == "replay":
+                self.count("cassette_misses")
+                return 404, json.dumps({"message": f"cassette miss: {key}"}).encode("utf-8")
+            response = self._http.request(
+                "POST", f"{self.upstream}/search/works",
+                body=json.dumps(params).encode("utf-8"),
+                headers={"Authorization": authorization or "", "Content-Type": "application/json"},
+            )
+            entry = {"request": params, "status": response.status, "body": response.data.decode("utf-8", "replace")}
+            if response.status < 500 and response.status != 429:
+                self.cassette.save_search(key, entry)
+
+        body = entry["body"]
+        if entry["status"] == 200:
+            body = json.dumps(self._rewrite_links(json.loads(body)))
+        return entry["status"], body.encode("utf-8")
+
+    def _rewrite_links(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """将结果中的下载链接改写为桩服务的 /files/<key>/<原文件名>（保留文件名，下载后的保存名与真实链接一致）"""
+        def rewrite(url: str) -> str:
+            key = cassette_key(url)
+            with self._lock:
+                self._file_urls[key] = url
+            return f"{self.origin}/files/{key}/{os.path.basename(urlparse(url).path) or 'download'}"
+
+        for result in response.get("results") or []:
+            if result.get("downloadUrl"):
+                result["downloadUrl"] = rewrite(result["downloadUrl"])
+            if result.get("sourceFulltextUrls"):
+                result["sourceFulltextUrls"] = [rewrite(url) for url in result["sourceFulltextUrls"]]
+        return response
+
+    def _synthetic_search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """按查询确定性地生成一页结果"""
+        query = str(params.get("q", ""))
+        limit = int(params.get("limit") or 10)
+        offset = int(params.get("offset") or 0)
+        scroll_id = params.get("scrollId")
+        if scroll_id:
+            offset = int(str(scroll_id).rsplit(":", 1)[-1])
+
+        terms = [term for term in re.findall(r"\w+", query) if term not in ("AND", "OR", "NOT")] or ["paper"]
+        query_id = zlib.crc32(query.encode("utf-8")) % 100000
+        results = []
+        for rank in range(offset, min(offset + limit, self.total_hits)):
+            result = {
+                "id": query_id * 10000 + rank,
+                "title": f"{' '.join(terms).title()}: study {rank}",
+                "authors": [{"name": f"Author {rank}-{i}"} for i in range(3)],
+                "abstract": f"We study {' '.join(terms)} ({rank}). " + "Background text. " * 10,
+                "yearPublished": 2000 + rank % 25,
+                "publishedDate": f"{2000 + rank % 25}-01-01T00:00:00",
+                "doi": f"10.0000/stub.{query_id}.{rank}",
+            }
+            if self._fixtures:
+                url = f"{self.origin}/files/{self._fixtures[rank % len(self._fixtures)]}"
+                result["downloadUrl"] = url
+                result["sourceFulltextUrls"] = [url]
+            results.append(result)
+
+        response = {"totalHits": self.total_hits, "limit": limit, "offset": offset, "results": results}
+        if params.get("scroll") in (True, "true") or scroll_id:
+            response["scrollId"] = f"{query_id}:{offset + len(results)}"
+        return response
+
+    # ---- 文件 ----
+
+    def file(self, path: str) -> tuple[int, str, bytes]:
+        """按 /files/ 之后的路径返回 (状态码, Content-Type, 内容)"""
+        if self.mode == "synthetic":
+            name = os.path.basename(path)
+            path = os.path.join(self.fixtures_dir or "", name)
+            if name not in self._fixtures or not os.path.exists(path):
+                return 404, "text/plain", b"not found"
+            with open(path, "rb") as f:
+                return 200, "application/pdf", f.read()
+
+        key = path.split("/", 1)[0]
+        entry = self.cassette.load_file(key)
+        if entry is None:
+            with self._lock:
+                url = self._file_urls.get(key)
+            if self.mode == "replay" or url is None:
+                self.count("cassette_misses")
+                return 404, "text/plain", f"cassette miss: {key}".encode("utf-8")
+            response = self._http.request("GET", url, headers={"User-Agent": "Mozilla/5.0"}, timeout=60)
+            meta = {"url": url, "status": response.status, "content_type": response.headers.get("Content-Type", "")}
+            entry = (meta, response.data)
+            if response.status < 500 and response.status != 429:
+                self.cassette.save_file(key, meta, response.data)
+
+        meta, body = entry
+        return meta["status"], meta.get("content_type") or "application/octet-stream", body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """桩服务的请求处理（支持 keep-alive）"""
+    protocol_version = "HTTP/1.1"
+    # 头部与正文分两次写出，关闭 Nagle 以免叠加 TCP 延迟确认（约 40ms）
+    disable_nagle_algorithm = True
+    stub: StubCoreServer
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        raw_body = self.rfile.read(length) if length else b""
+        parsed = urlparse(self.path)
+        self.stub.count("requests")
+
+        injected = self.stub.inject()
+        if injected == 429:
+            self._send(429, "application/json", b'{"message": "rate limited"}', {"Retry-After": str(self.stub.retry_after)})
+            return
+        if injected is not None:
+            self._send(injected, "application/json", b'{"message": "injected error"}')
+            return
+
+        if parsed.path.rstrip("/").endswith("/search/works"):
+            self.stub.count("search")
+            if raw_body:
+                params = json.loads(raw_body)
+            else:
+                params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            status, body = self.stub.search(params, self.headers.get("Authorization"))
+            self._send(status, "application/json", body)
+        elif parsed.path.startswith("/files/"):
+            self.stub.count("files")
+            status, content_type, body = self.stub.file(parsed.path[len("/files/"):])
+            self._send(status, content_type, body)
+        else:
+            self._send(404, "text/plain", b"not found")
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 CORE API 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=MODES, default="synthetic")
+    parser.add_argument("--fixtures", help="synthetic 模式提供下载的 PDF 目录")
+    parser.add_argument("--generate", type=int, default=0, help="在夹具目录中生成 N 篇合成论文")
+    parser.add_argument("--cassette", help="record / replay 模式的磁带目录")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help="record 模式转发的 CORE API 地址")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="每个请求的随机附加延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入 500 错误的概率")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="注入 429 的概率")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--total-hits", type=int, default=1000, help="synthetic 模式下每个查询的结果总数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.generate:
+        if not args.fixtures:
+            parser.error("--generate 需要同时指定 --fixtures")
+        from .pdf_fixtures import write_fixture_corpus
+        write_fixture_corpus(args.fixtures, args.generate)
+        print(f"📄 已在 {args.fixtures} 生成 {args.generate} 篇合成论文")
+
+    stub = StubCoreServer(
+        host=args.host, port=args.port, mode=args.mode, fixtures_dir=args.fixtures, cassette_dir=args.cassette,
+        upstream=args.upstream, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, total_hits=args.total_hits, seed=args.seed,
+    )
+    print(f"🚀 CORE 桩服务已启动（{args.mode} 模式）: {stub.base_url}")
+    print(f"   export CORE_API_BASE_URL={stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"📊 请求统计: {stub.stats()}")
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
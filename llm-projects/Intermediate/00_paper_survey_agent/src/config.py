@@ -58,6 +58,90 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", 0.3))
 MAX_SURVEY_REFERENCE = int(os.getenv("MAX_SURVEY_REFERENCE", 10))
 SAVE_DIR = os.getenv("SAVE_DIR", "papers")
 
+# 论文存储容量配置（长期运行的 worker 上限制 SAVE_DIR 的大小）
+SAVE_DIR_MAX_BYTES = int(os.getenv("SAVE_DIR_MAX_BYTES", 0))  # <= 0 表示不限制
+SAVE_DIR_LOW_WATERMARK = float(os.getenv("SAVE_DIR_LOW_WATERMARK", 0.9))  # 超出上限时淘汰到上限的该比例为止
+
+# PDF 解析配置（pdfplumber 为纯 Python 实现，多个文件在进程池中并行解析）
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", 0))  # 0 表示 CPU 核数，1 表示在当前进程中逐个解析
+PDF_EXTRACT_CHUNK_SIZE = int(os.getenv("PDF_EXTRACT_CHUNK_SIZE", 0))  # 每个进程池任务包含的文件数，0 表示自动
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", 120))  # 单个文件的解析超时（秒），<= 0 表示不限制
+
+# CORE 搜索缓存配置
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".cache/core_search.sqlite3")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 24 * 3600))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# CORE API 连接配置
+CORE_API_BASE_URL = os.getenv("CORE_API_BASE_URL", "https://api.core.ac.uk/v3")  # 可指向本地桩服务（benchmarks/stub_core_server.py）
+CORE_HTTP_POOLING = os.getenv("CORE_HTTP_POOLING", "true").lower() == "true"
+CORE_HTTP_POOL_SIZE = int(os.getenv("CORE_HTTP_POOL_SIZE", 10))
+CORE_CONNECT_TIMEOUT = float(os.getenv("CORE_CONNECT_TIMEOUT", 5))
+CORE_READ_TIMEOUT = float(os.getenv("CORE_READ_TIMEOUT", 30))
+CORE_PAGE_PREFETCH = int(os.getenv("CORE_PAGE_PREFETCH", 2))
+
+# CORE API 限流配置（CORE_RATE_LIMIT <= 0 表示不限流；设置状态文件后多进程共享同一预算）
+CORE_RATE_LIMIT = float(os.getenv("CORE_RATE_LIMIT", 1.0))
+CORE_RATE_BURST = int(os.getenv("CORE_RATE_BURST", 5))
+CORE_RATE_LIMIT_STATE = os.getenv("CORE_RATE_LIMIT_STATE", "")
+
+# 论文后台预取配置
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_WAIT_TIMEOUT = float(os.getenv("PREFETCH_WAIT_TIMEOUT", 600))
+PREFETCH_MAX_FINISHED = int(os.getenv("PREFETCH_MAX_FINISHED", 256))  # 队列中保留的已结束任务数（结果含论文全文）
+
+# 论文下载调度配置（所有下载共用一个调度器，按相关性排名排队；兼容旧的 PREFETCH_WORKERS）
+DOWNLOAD_MAX_CONCURRENCY = int(os.getenv("DOWNLOAD_MAX_CONCURRENCY", os.getenv("PREFETCH_WORKERS", 4)))
+DOWNLOAD_PER_HOST_CONCURRENCY = int(os.getenv("DOWNLOAD_PER_HOST_CONCURRENCY", 2))  # <= 0 表示不限制
+
+# 异步下载引擎配置（批量下载数百篇论文时使用协程代替下载线程）
+ASYNC_DOWNLOAD_ENABLED = os.getenv("ASYNC_DOWNLOAD_ENABLED", "false").lower() == "true"
+ASYNC_DOWNLOAD_CONCURRENCY = int(os.getenv("ASYNC_DOWNLOAD_CONCURRENCY", 64))
+ASYNC_DOWNLOAD_PER_HOST = int(os.getenv("ASYNC_DOWNLOAD_PER_HOST", 8))  # <= 0 表示不限制
+
+# 论文下载重试配置（失败的下载进入延迟队列，按全抖动指数退避重试，不占用下载线程）
+DOWNLOAD_MAX_RETRIES = int(os.getenv("DOWNLOAD_MAX_RETRIES", 4))
+DOWNLOAD_RETRY_BASE_DELAY = float(os.getenv("DOWNLOAD_RETRY_BASE_DELAY", 4))
+DOWNLOAD_RETRY_MAX_DELAY = float(os.getenv("DOWNLOAD_RETRY_MAX_DELAY", 60))
+DOWNLOAD_HOST_RETRY_BUDGET = int(os.getenv("DOWNLOAD_HOST_RETRY_BUDGET", 20))  # 每个主机在窗口内的重试次数，< 0 表示不限制
+DOWNLOAD_HOST_RETRY_BUDGETS = os.getenv("DOWNLOAD_HOST_RETRY_BUDGETS", "")  # 按主机覆盖，如 "arxiv.org=40,example.org=0"
+DOWNLOAD_HOST_RETRY_WINDOW = float(os.getenv("DOWNLOAD_HOST_RETRY_WINDOW", 600))
+
+# 论文下载配置（流式写入临时文件，完成后原子重命名；所有下载线程共享同一个连接池）
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 64 * 1024))
+DOWNLOAD_MAX_BYTES = int(os.getenv("DOWNLOAD_MAX_BYTES", 100 * 1024 * 1024))  # <= 0 表示不限制
+DOWNLOAD_POOL_HOSTS = int(os.getenv("DOWNLOAD_POOL_HOSTS", 20))
+DOWNLOAD_POOL_MAXSIZE = int(os.getenv("DOWNLOAD_POOL_MAXSIZE", 4))
+DOWNLOAD_CONNECT_TIMEOUT = float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT", 10))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("DOWNLOAD_READ_TIMEOUT", 60))
+DOWNLOAD_REVALIDATE_AFTER = int(os.getenv("DOWNLOAD_REVALIDATE_AFTER", 7 * 24 * 3600))  # < 0 表示从不重新验证
+DOWNLOAD_MAX_MIRRORS = int(os.getenv("DOWNLOAD_MAX_MIRRORS", 2))  # sourceFulltextUrls 中最多使用的备用链接数
+DOWNLOAD_HEDGE_DELAY = float(os.getenv("DOWNLOAD_HEDGE_DELAY", 5))  # < 0 表示仅在失败时切换备用链接
+
+# 下载失败负缓存配置（跳过近期失败的链接，并对连续失败的主机熔断）
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "true").lower() == "true"
+NEGATIVE_CACHE_PATH = os.getenv("NEGATIVE_CACHE_PATH", ".cache/download_failures.sqlite3")
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 24 * 3600))
+HOST_BREAKER_THRESHOLD = int(os.getenv("HOST_BREAKER_THRESHOLD", 3))
+HOST_BREAKER_COOLDOWN = float(os.getenv("HOST_BREAKER_COOLDOWN", 600))
+
+# CORE 全文获取配置（搜索结果自带全文时直接保存，跳过 PDF 下载与解析）
+CORE_FULLTEXT_ENABLED = os.getenv("CORE_FULLTEXT_ENABLED", "true").lower() == "true"
+CORE_FULLTEXT_MIN_CHARS = int(os.getenv("CORE_FULLTEXT_MIN_CHARS", 2000))
+
+# 搜索结果格式化配置（控制 search-papers 工具输出的 token 数）
+SEARCH_RESULT_TOKEN_BUDGET = int(os.getenv("SEARCH_RESULT_TOKEN_BUDGET", 4000))
+SEARCH_ABSTRACT_MAX_CHARS = int(os.getenv("SEARCH_ABSTRACT_MAX_CHARS", 300))
+SEARCH_MAX_AUTHORS = int(os.getenv("SEARCH_MAX_AUTHORS", 3))
+SEARCH_ID_ONLY = os.getenv("SEARCH_ID_ONLY", "false").lower() == "true"
+
+# 下载前的本地重排序配置（BM25，按标题与摘要打分，只下载排名靠前且超过阈值的论文）
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() == "true"
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", 0))  # 每次搜索最多下载的论文数，0 表示不限（下载全部有链接的结果）
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", 0.0))  # 得分不低于该值，0 表示只重排序
+IDF_TABLE_PATH = os.getenv("IDF_TABLE_PATH", "")  # 预计算 IDF 表（JSON），为空时按候选结果现算
+
 # LLM初始化
 from langchain.chat_models import init_chat_model
 
@@ -2,19 +2,23 @@
 节点定义
 """
 
+import asyncio
 from typing import Dict, Any, Literal
 from datetime import datetime
 from langchain_core.messages import SystemMessage, AIMessage, ToolMessage, HumanMessage
 
 from ..config import (
     llm, decision_making_prompt, planning_prompt, agent_prompt, judge_prompt,
-    survey_outline_prompt, survey_title_abstract_prompt, MAX_SURVEY_REFERENCE, SAVE_DIR
+    survey_outline_prompt, survey_title_abstract_prompt, MAX_SURVEY_REFERENCE, SAVE_DIR, PREFETCH_WAIT_TIMEOUT
 )
 from ..models import AgentState, DecisionMakingOutput, JudgeOutput, TypeEnum, SurveySections
 from ..tools import tools, tools_dict
+from ..tools.search_tools import SEARCH_TOOL_NAMES
 from ..utils import format_tools_description
 from ..services.paper_service import PaperService
 from ..services.survey_service import SurveyService
+from ..services.http_session import aclose_core_async_client
+from ..services.prefetch_queue import get_prefetch_queue
 
 decision_making_llm = llm.with_structured_output(DecisionMakingOutput)
 agent_llm = llm.bind_tools(tools)
@@ -55,9 +59,15 @@ def planning_node(state: AgentState) -> Dict[str, Any]:
 
 def tools_node(state: AgentState) -> Dict[str, Any]:
     """工具节点：基于计划执行工具"""
+    tool_calls = [{**tool_call, "args": _with_run_options(tool_call, state)} for tool_call in state["messages"][-1].tool_calls]
+    if _can_run_concurrently(tool_calls):
+        # 同一轮的多个异步工具调用（如多次 search-papers）在同一事件循环中并发执行
+        tool_results = asyncio.run(_arun_tool_calls(tool_calls))
+    else:
+        tool_results = [tools_dict[tool_call["name"]].invoke(tool_call["args"]) for tool_call in tool_calls]
+
     outputs = []
-    for tool_call in state["messages"][-1].tool_calls:
-        tool_result = tools_dict[tool_call["name"]].invoke(tool_call["args"])
+    for tool_call, tool_result in zip(tool_calls, tool_results):
         outputs.append(
             ToolMessage(
                 content=str(tool_result),
@@ -68,6 +78,37 @@ def tools_node(state: AgentState) -> Dict[str, Any]:
     return {"messages": outputs}
 
 
+def _with_run_options(tool_call: dict, state: AgentState) -> dict:
+    """为搜索工具注入本次运行的主题与重排序配置（这些参数对 LLM 不可见，状态中未设置的项使用全局配置）"""
+    args = dict(tool_call["args"])
+    if tool_call["name"] in SEARCH_TOOL_NAMES:
+        for key in ("topic", "rerank_top_k", "rerank_min_score"):
+            if state.get(key) is not None:
+                args[key] = state[key]
+    return args
+
+
+def _can_run_concurrently(tool_calls: list[dict]) -> bool:
+    """仅当存在多个调用、全部工具提供原生协程且当前线程没有运行中的事件循环时才并发执行"""
+    if len(tool_calls) < 2:
+        return False
+    if any(getattr(tools_dict[tool_call["name"]], "coroutine", None) is None for tool_call in tool_calls):
+        return False
+    try:
+        asyncio.get_running_loop()
+        return False
+    except RuntimeError:
+        return True
+
+
+async def _arun_tool_calls(tool_calls: list[dict]) -> list:
+    """并发执行工具调用，结果顺序与调用顺序一致"""
+    try:
+        return await asyncio.gather(*[tools_dict[tool_call["name"]].ainvoke(tool_call["args"]) for tool_call in tool_calls])
+    finally:
+        await aclose_core_async_client()
+
+
 def agent_node(state: AgentState) -> Dict[str, Any]:
     """智能助手节点：使用带工具的LLM回答用户查询"""
     system_prompt = SystemMessage(content=agent_prompt)
@@ -94,7 +135,10 @@ def generate_survey_agent(state: AgentState) -> Dict[str, Any]:
         original_query = state["messages"][0].content
         print(f"🎯 开始生成综述报告，主题：{original_query}")
         
-        # 2. 从保存目录中提取已下载的论文信息
+        # 2. 等待后台预取队列中的论文下载完成，再从保存目录中提取已下载的论文信息
+        prefetch_status = get_prefetch_queue().wait(timeout=PREFETCH_WAIT_TIMEOUT)
+        print(f"📥 后台下载状态：完成 {prefetch_status['done']} 篇，失败 {prefetch_status['failed']} 篇，"
+              f"未完成 {prefetch_status['pending'] + prefetch_status['running']} 篇")
         papers_info = paper_service.extract_paper_content_from_save_dir()
         print(f"📚 从 {SAVE_DIR} 目录发现 {len(papers_info)} 篇已下载的论文")
         
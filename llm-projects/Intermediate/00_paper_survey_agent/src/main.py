@@ -5,7 +5,12 @@
 import sys
 from langchain_core.messages import HumanMessage
 
+from .config import ASYNC_DOWNLOAD_ENABLED
 from .core.workflow import app
+from .services.prefetch_queue import get_prefetch_queue
+from .services.download_scheduler import get_download_scheduler
+from .services.http_session import download_metrics
+from .services.paper_store import get_store_quota
 
 
 def main():
@@ -26,21 +31,51 @@ def main():
             "requires_research": False,
             "type": None,
             "is_good_answer": False,
-            "num_feedback_requests": 0
+            "num_feedback_requests": 0,
+            # 搜索工具下载前按用户的原始查询重排序；重排序配置为 None 时使用 RERANK_TOP_K / RERANK_MIN_SCORE
+            "topic": user_query,
+            "rerank_top_k": None,
+            "rerank_min_score": None,
         }
         
-        # 流式执行工作流
-        for chunk in app.stream(initial_state):
-            if "__end__" not in chunk:
-                for node_name, node_output in chunk.items():
-                    print(f"\n🔄 节点: {node_name}")
-                    if "messages" in node_output and node_output["messages"]:
-                        for message in node_output["messages"]:
-                            if hasattr(message, 'content'):
-                                print(f"💬 输出: {message.content}")
-                    print("-" * 60)
+        # 流式执行工作流（运行期间用过的论文不会被容量淘汰删除）
+        with get_store_quota().active_run():
+            for chunk in app.stream(initial_state):
+                if "__end__" not in chunk:
+                    for node_name, node_output in chunk.items():
+                        print(f"\n🔄 节点: {node_name}")
+                        if "messages" in node_output and node_output["messages"]:
+                            for message in node_output["messages"]:
+                                if hasattr(message, 'content'):
+                                    print(f"💬 输出: {message.content}")
+                        print("-" * 60)
+
+            # 搜索只返回元数据，退出前等待后台下载完成
+            prefetch_queue = get_prefetch_queue()
+            prefetch_status = prefetch_queue.status()
+            if prefetch_status["pending"] + prefetch_status["running"]:
+                print("\n📥 等待后台论文下载完成...")
+                prefetch_status = prefetch_queue.wait()
+                print(f"📊 下载统计: 成功 {prefetch_status['done']} 篇, 失败 {prefetch_status['failed']} 篇")
+        scheduler_stats = get_download_scheduler().stats()
+        if scheduler_stats["submitted"]:
+            print(f"🗂️ 下载调度: 共 {scheduler_stats['submitted']} 个任务, 平均排队 {scheduler_stats['avg_wait']:.1f} 秒, "
+                  f"近一分钟吞吐 {scheduler_stats['throughput'] * 60:.0f} 篇/分钟, 重试 {scheduler_stats['retries']} 次")
+        if ASYNC_DOWNLOAD_ENABLED:
+            from .services.async_downloader import get_async_download_engine
+            engine_stats = get_async_download_engine().stats()
+            print(f"⚡ 异步下载: 下载 {engine_stats['downloaded']} 篇, 命中本地 {engine_stats['cached']} 篇, "
+                  f"失败 {engine_stats['failed']} 篇, 峰值并发 {engine_stats['peak_concurrency']}, 重试 {engine_stats['retries']} 次")
+        quota_stats = get_store_quota().stats()
+        if quota_stats["evictions"]:
+            print(f"🧹 论文存储: 本次淘汰 {quota_stats['evictions']} 项, 释放 {quota_stats['evicted_bytes'] / 2**20:.1f} MB, "
+                  f"容量上限 {quota_stats['max_bytes'] / 2**20:.0f} MB")
+        connection_stats = download_metrics.snapshot()
+        if connection_stats["requests"]:
+            print(f"🔗 下载连接复用: {connection_stats['reused']}/{connection_stats['requests']} 次请求复用已有连接")
     
     except KeyboardInterrupt:
+        get_prefetch_queue().shutdown(wait=False)
         print("\n\n👋 程序被用户中断")
     except Exception as e:
         print(f"\n\n❌ 程序执行出错: {e}")
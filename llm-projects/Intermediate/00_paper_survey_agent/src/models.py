@@ -7,16 +7,65 @@ from typing import Optional, Sequence, Annotated
 from typing_extensions import TypedDict
 from pydantic import BaseModel, Field
 from langchain_core.messages import BaseMessage
+from langchain_core.tools import InjectedToolArg
 from langgraph.graph.message import add_messages
 
 
-class SearchPapersInput(BaseModel):
+class SearchRunOptions(BaseModel):
+    """搜索工具的运行级配置：由工具节点从状态中注入，不出现在提供给 LLM 的参数中"""
+    topic: Annotated[Optional[str], InjectedToolArg] = Field(
+        description="本次运行的主题（用户的原始查询），下载前与搜索查询一并用于重排序",
+        default=None
+    )
+    rerank_top_k: Annotated[Optional[int], InjectedToolArg] = Field(
+        description="覆盖 RERANK_TOP_K：每次搜索最多下载的论文数，0 表示不限",
+        default=None
+    )
+    rerank_min_score: Annotated[Optional[float], InjectedToolArg] = Field(
+        description="覆盖 RERANK_MIN_SCORE：重排序得分不低于该值才下载",
+        default=None
+    )
+
+
+class SearchPapersInput(SearchRunOptions):
     """搜索论文的输入模型"""
     query: str = Field(description="在选定档案中搜索的查询")
     max_papers: int = Field(
         description="返回的最大论文数量。默认为1，但如果需要更全面的搜索，可以增加到100",
         default=1, ge=1, le=100
     )
+    id_only: bool = Field(
+        description="为 true 时每篇只返回 ID、年份、标题与下载链接（结果很多、只需挑选下载时使用以节省上下文）",
+        default=False
+    )
+
+
+class SearchPapersBatchInput(SearchRunOptions):
+    """批量搜索论文的输入模型"""
+    queries: list[str] = Field(
+        description="子查询列表，通常由综述主题拆解得到的多个关键词组合",
+        min_length=1, max_length=10
+    )
+    max_papers_per_query: int = Field(
+        description="每个子查询返回的最大论文数量",
+        default=10, ge=1, le=100
+    )
+    max_papers: int = Field(
+        description="去重融合后返回的最大论文数量",
+        default=20, ge=1, le=100
+    )
+    id_only: bool = Field(
+        description="为 true 时每篇只返回 ID、年份、标题与下载链接（结果很多、只需挑选下载时使用以节省上下文）",
+        default=False
+    )
+
+
+class PaperDetailsInput(BaseModel):
+    """查询论文完整元数据的输入模型"""
+    ids: list[str] = Field(
+        description="论文的 CORE ID 列表（取自 search-papers / search-papers-batch 的结果）",
+        min_length=1, max_length=20
+    )
 
 
 class TypeEnum(str, Enum):
@@ -54,6 +103,9 @@ class AgentState(TypedDict):
     num_feedback_requests: int
     is_good_answer: bool
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    topic: Optional[str]                # 用户的原始查询，搜索工具下载前按其重排序
+    rerank_top_k: Optional[int]         # 本次运行的重排序配置，None 表示使用全局配置
+    rerank_min_score: Optional[float]
 
 
 # ========================= 综述生成相关模型 =========================
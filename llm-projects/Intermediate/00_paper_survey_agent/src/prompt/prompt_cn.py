@@ -63,6 +63,8 @@ agent_prompt = """
 ## search-papers（CORE API）
 
 `search-papers` 工具用于搜索论文，该工具采用 CORE API 进行论文搜索，在进行综述生成、分析报告、查询论文等需求时通常会使用该工具（可多次调整关键词以优化结果）。
+当需要从多个角度检索同一主题时（例如将综述主题拆解为多个子查询），请使用 `search-papers-batch` 工具一次性提交所有子查询，它会并发检索、去重并融合排名，比多次调用 `search-papers` 更快。
+搜索工具只返回精简信息（截断的摘要与部分作者）；需要完整摘要、全部作者或 DOI 时，请使用 `get-paper-details` 工具按 ID 查询。
 CORE API具有特定的查询语言，允许您探索庞大的论文集合并执行复杂查询。请参阅下表了解可用操作符列表：
 
 | 操作符        | 接受的符号                | 含义                                                                                           |
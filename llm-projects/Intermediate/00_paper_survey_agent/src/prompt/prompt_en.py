@@ -61,6 +61,9 @@ Add extensive inline citations to support any claim made in the answer.
 
 ## CORE API
 
+When you need to search the same topic from several angles (for example after decomposing a survey topic into sub-queries), submit all sub-queries at once with the `search-papers-batch` tool. It runs them concurrently, deduplicates the hits and fuses the rankings, which is faster than calling `search-papers` repeatedly.
+The search tools only return compact entries (truncated abstracts and a few authors). Use the `get-paper-details` tool with paper IDs when you need the full abstract, all authors or the DOI.
+
 The CORE API has a specific query language that allows you to explore a vast papers collection and perform complex queries. See the following table for a list of available operators:
 
 | Operator       | Accepted symbols         | Meaning                                                                                      |
@@ -7,9 +7,12 @@
 from .core_api import CoreAPIWrapper
 from .paper_service import PaperService
 from .survey_service import SurveyService
+from .search_cache import SearchCache, get_search_cache
 
 __all__ = [
     "CoreAPIWrapper",
     "PaperService", 
     "SurveyService",
+    "SearchCache",
+    "get_search_cache",
 ]
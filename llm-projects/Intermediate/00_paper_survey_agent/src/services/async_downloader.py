@@ -0,0 +1,381 @@
+"""
+异步论文下载引擎
+
+面向批量综述（数百篇 PDF）的下载：在单个事件循环内以协程并发下载，
+全局与单主机并发数由信号量限制，每个主机使用独立的连接池，响应体按块流式写入磁盘（边写边计算 SHA-256，完成后移入内容寻址存储）。
+与线程下载共用论文清单、负缓存、PDF 文件头检查与全抖动退避重试。
+磁盘写入、哈希计算、论文清单与负缓存（SQLite）等阻塞操作均通过 `asyncio.to_thread` 在线程中执行，不阻塞事件循环。
+
+- 异步 API：`async with AsyncDownloadEngine() as engine: await engine.download_many(urls)`
+- 同步门面：`get_async_download_engine()` 在后台线程中运行事件循环，返回 concurrent.futures.Future，
+  `download-paper` 工具、预取队列与同步并行下载均可直接调用
+"""
+
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, BinaryIO, Dict, Iterable, Mapping, Optional, Sequence
+import httpx
+
+from ..config import (
+    SAVE_DIR, NEGATIVE_CACHE_ENABLED, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_MAX_BYTES, DOWNLOAD_CONNECT_TIMEOUT,
+    DOWNLOAD_READ_TIMEOUT, DOWNLOAD_MAX_RETRIES, ASYNC_DOWNLOAD_CONCURRENCY, ASYNC_DOWNLOAD_PER_HOST
+)
+from .negative_cache import PERMANENT_STATUSES, get_negative_cache, url_host
+from .download_scheduler import backoff_delay
+from .rate_limiter import parse_retry_after
+from .paper_store import commit_content, get_paper_manifest, normalize_url, pdf_url
+
+# 响应体先在内存中累积到该大小，再一次性交给线程写盘并更新哈希，减少线程切换次数
+WRITE_BLOCK_BYTES = 1024 * 1024
+
+
+def _write_block(f: BinaryIO, digest: Any, chunks: list[bytes]) -> None:
+    """在线程中写入一批数据块并更新哈希"""
+    for chunk in chunks:
+        digest.update(chunk)
+        f.write(chunk)
+
+
+class AsyncDownloadEngine:
+    """基于 httpx.AsyncClient 的并发下载引擎（实例绑定创建它的事件循环）"""
+
+    def __init__(
+        self,
+        max_concurrency: int = ASYNC_DOWNLOAD_CONCURRENCY,
+        per_host: int = ASYNC_DOWNLOAD_PER_HOST,
+        max_retries: int = DOWNLOAD_MAX_RETRIES,
+        save_dir: str = SAVE_DIR,
+    ):
+        """
+        Args:
+            max_concurrency: 全局最大并发下载数
+            per_host: 单个主机的最大并发下载数（同时也是该主机连接池的上限），<= 0 表示不限制
+            max_retries: 临时失败（5xx、429、网络错误）的最多重试次数
+            save_dir: 论文保存目录
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = per_host if per_host > 0 else self.max_concurrency
+        self.max_retries = max_retries
+        self.save_dir = save_dir
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._active = 0
+        self._stats = {
+            "downloaded": 0, "cached": 0, "not_modified": 0, "failed": 0,
+            "retries": 0, "bytes": 0, "peak_concurrency": 0,
+        }
+
+    async def __aenter__(self) -> "AsyncDownloadEngine":
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """关闭所有主机的连接池"""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """累计统计：下载 / 命中本地 / 304 / 失败的论文数、重试次数、下载字节数与峰值并发"""
+        return {**self._stats, "active": self._active}
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    def _host_client(self, host: str) -> httpx.AsyncClient:
+        """
+        获取主机对应的客户端
+
+        httpcore 为排队请求分配连接时需遍历池中所有连接，开销随连接数平方增长，
+        因此按主机拆分连接池，每个池的连接数不超过单主机并发上限
+        """
+        client = self._clients.get(host)
+        if client is None:
+            client = self._clients[host] = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.per_host, max_keepalive_connections=self.per_host),
+                timeout=httpx.Timeout(DOWNLOAD_READ_TIMEOUT, connect=DOWNLOAD_CONNECT_TIMEOUT, pool=None),
+                follow_redirects=True,
+                # 与线程下载一致，不校验证书
+                verify=False,
+            )
+        return client
+
+    async def download(self, url: str, core_id: Any = None, mirrors: Sequence[str] = ()) -> Dict[str, Any]:
+        """
+        下载一篇论文（不解析文本）；主链接失败时依次尝试备用链接
+
+        Returns:
+            {"url": 实际使用的链接, "filepath", "sha256", "size", "cached": 是否直接使用本地文件}
+
+        Raises:
+            Exception: 全部链接失败时，主链接的失败原因
+        """
+        candidates = [url]
+        seen = {normalize_url(url)}
+        for mirror in mirrors:
+            if normalize_url(mirror) not in seen:
+                seen.add(normalize_url(mirror))
+                candidates.append(mirror)
+
+        errors = []
+        for candidate in candidates:
+            try:
+                result = await self._download_candidate(candidate, core_id)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if candidate != url and not result["cached"]:
+                # 以主链接登记同一内容，之后按主链接查询时直接命中
+                await asyncio.to_thread(
+                    get_paper_manifest(self.save_dir).add,
+                    result["sha256"], os.path.basename(result["filepath"]), result["size"], url=url, core_id=core_id,
+                )
+            return result
+        self._stats["failed"] += 1
+        raise errors[0]
+
+    async def _download_candidate(self, url: str, core_id: Any) -> Dict[str, Any]:
+        """单个链接：查询论文清单与负缓存，临时失败时按全抖动退避重试"""
+        from ..tools.download_tools import DownloadError, needs_revalidation
+
+        record = await asyncio.to_thread(get_paper_manifest(self.save_dir).lookup, url, core_id)
+        if record is not None and not needs_revalidation(record):
+            self._stats["cached"] += 1
+            return self._result(url, record, cached=True)
+
+        negative_cache = get_negative_cache() if NEGATIVE_CACHE_ENABLED else None
+        if negative_cache is not None:
+            reason = await asyncio.to_thread(negative_cache.check, url)
+            if reason is not None:
+                raise Exception(f"跳过下载: {reason}")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await self._fetch(url, core_id, record)
+                break
+            except DownloadError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    if negative_cache is not None:
+                        await asyncio.to_thread(
+                            negative_cache.record_failure, url, e.status, str(e)[:200], kind=e.failure_kind
+                        )
+                    raise
+                # 退避期间只有当前协程等待，不占用并发名额
+                self._stats["retries"] += 1
+                await asyncio.sleep(max(backoff_delay(attempt), e.retry_after or 0.0))
+        if negative_cache is not None:
+            await asyncio.to_thread(negative_cache.record_success, url)
+        return result
+
+    def _result(self, url: str, record: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "filepath": get_paper_manifest(self.save_dir).filepath(record),
+            "sha256": record["sha256"],
+            "size": record["size"],
+            "cached": cached,
+        }
+
+    async def _fetch(self, url: str, core_id: Any, record: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """发送一次请求并流式写入内容寻址存储"""
+        from ..tools.download_tools import (
+            DOWNLOAD_HEADERS, DownloadError, NotPdfError, PDF_MAGIC, PDF_SNIFF_BYTES,
+            conditional_headers, non_pdf_content_type,
+        )
+
+        if self._global is None:
+            raise RuntimeError("下载引擎尚未启动，请使用 `async with AsyncDownloadEngine()`")
+        headers = {**DOWNLOAD_HEADERS, **conditional_headers(record)}
+        # 先取主机名额再取全局名额，等待繁忙主机的协程不占用全局名额
+        host = url_host(url)
+        async with self._host_semaphore(host), self._global:
+            self._active += 1
+            self._stats["peak_concurrency"] = max(self._stats["peak_concurrency"], self._active)
+            try:
+                async with self._host_client(host).stream("GET", pdf_url(url), headers=headers) as response:
+                    if response.status_code == 304 and record is not None:
+                        self._stats["not_modified"] += 1
+                        record = await asyncio.to_thread(
+                            get_paper_manifest(self.save_dir).add,
+                            record["sha256"], record["filename"], record["size"], url=url, core_id=core_id,
+                            etag=record.get("etag"), last_modified=record.get("last_modified"),
+                        )
+                        return self._result(url, record, cached=True)
+                    if not 200 <= response.status_code < 300:
+                        raise DownloadError(
+                            f"下载论文时收到非2xx状态码: {response.status_code}",
+                            response.status_code,
+                            retryable=response.status_code not in PERMANENT_STATUSES,
+                            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                        )
+                    content_type = non_pdf_content_type(response.headers)
+                    if content_type:
+                        raise NotPdfError(f"响应不是 PDF（Content-Type: {content_type}）", response.status_code)
+                    content_length = response.headers.get("Content-Length", "")
+                    if DOWNLOAD_MAX_BYTES > 0 and content_length.isdigit() and int(content_length) > DOWNLOAD_MAX_BYTES:
+                        raise DownloadError(f"文件大小 {int(content_length)} 字节超过上限 {DOWNLOAD_MAX_BYTES} 字节")
+
+                    fd, tmp_path = await asyncio.to_thread(self._create_temp)
+                    digest = hashlib.sha256()
+                    size = 0
+                    head = b""
+                    pending: list[bytes] = []
+                    pending_bytes = 0
+                    try:
+                        with os.fdopen(fd, "wb") as f:
+                            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                                if head is not None:
+                                    # 先凑满开头检查 PDF 文件头，不是 PDF 时不再读取其余部分
+                                    head += chunk
+                                    if len(head) < PDF_SNIFF_BYTES and PDF_MAGIC not in head:
+                                        continue
+                                    if PDF_MAGIC not in head:
+                                        raise NotPdfError(f"响应不是 PDF（开头为 {head[:40]!r}）", response.status_code)
+                                    chunk, head = head, None
+                                size += len(chunk)
+                                if DOWNLOAD_MAX_BYTES > 0 and size > DOWNLOAD_MAX_BYTES:
+                                    raise DownloadError(f"文件大小超过上限 {DOWNLOAD_MAX_BYTES} 字节")
+                                pending.append(chunk)
+                                pending_bytes += len(chunk)
+                                if pending_bytes >= WRITE_BLOCK_BYTES:
+                                    await asyncio.to_thread(_write_block, f, digest, pending)
+                                    pending, pending_bytes = [], 0
+                            if head is not None:
+                                raise NotPdfError(f"响应不是 PDF（开头为 {head[:40]!r}）", response.status_code)
+                            if pending:
+                                await asyncio.to_thread(_write_block, f, digest, pending)
+                        # 移入内容寻址存储（可能触发容量淘汰）与登记论文清单合并为一次线程切换
+                        record = await asyncio.to_thread(
+                            self._commit, tmp_path, digest.hexdigest(), size, url, core_id, response.headers
+                        )
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.unlink(tmp_path)
+                        raise
+            except httpx.HTTPError as e:
+                raise DownloadError(f"请求失败: {e}", retryable=True) from e
+            finally:
+                self._active -= 1
+
+        self._stats["downloaded"] += 1
+        self._stats["bytes"] += size
+        return self._result(url, record, cached=False)
+
+    def _create_temp(self) -> tuple[int, str]:
+        """在保存目录中创建下载用的临时文件（在线程中执行）"""
+        os.makedirs(self.save_dir, exist_ok=True)
+        return tempfile.mkstemp(dir=self.save_dir, prefix=".download-", suffix=".part")
+
+    def _commit(
+        self, tmp_path: str, sha256: str, size: int, url: str, core_id: Any, headers: Mapping[str, str]
+    ) -> Dict[str, Any]:
+        """将下载完成的临时文件移入内容寻址存储并登记论文清单（在线程中执行）"""
+        filepath = commit_content(tmp_path, sha256, ".pdf", self.save_dir)
+        return get_paper_manifest(self.save_dir).add(
+            sha256, os.path.basename(filepath), size, url=url, core_id=core_id,
+            etag=headers.get("ETag"), last_modified=headers.get("Last-Modified"),
+        )
+
+    async def fetch_paper(self, url: str, core_id: Any = None, mirrors: Sequence[str] = ()) -> str:
+        """
+        下载论文并提取文本（PDF 解析在线程中执行，不阻塞事件循环）
+
+        Returns:
+            与线程下载的 `fetch_paper` 格式一致的保存路径与论文内容
+        """
+        from ..tools.download_tools import load_or_extract_text
+
+        result = await self.download(url, core_id, mirrors)
+        record = get_paper_manifest(self.save_dir).get(result["sha256"])
+        text = await asyncio.to_thread(load_or_extract_text, record, self.save_dir)
+        if result["cached"]:
+            return f"📄 论文已存在于本地: {result['filepath']}\n论文内容: {text}"
+        return f"📄 PDF文件已保存到: {result['filepath']}\n论文内容: {text}"
+
+    async def download_many(
+        self,
+        urls: Iterable[str],
+        core_ids: Optional[Mapping[str, Any]] = None,
+        mirrors: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> list[Any]:
+        """
+        并发下载多篇论文（不解析文本）；信号量按提交顺序放行，链接应按相关性排序
+
+        Returns:
+            与 urls 顺序一致的结果，失败的论文对应位置为异常对象
+        """
+        core_ids = core_ids or {}
+        mirrors = mirrors or {}
+        return await asyncio.gather(
+            *(self.download(url, core_ids.get(url), mirrors.get(url, ())) for url in urls),
+            return_exceptions=True,
+        )
+
+
+class BackgroundDownloadEngine:
+    """异步下载引擎的同步门面：在后台线程中运行独立的事件循环"""
+
+    def __init__(self, **engine_kwargs: Any):
+        """
+        Args:
+            engine_kwargs: 传给 AsyncDownloadEngine 的参数
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="paper-download-loop", daemon=True)
+        self._thread.start()
+        self.engine = AsyncDownloadEngine(**engine_kwargs)
+        asyncio.run_coroutine_threadsafe(self.engine.__aenter__(), self._loop).result()
+
+    def submit(self, url: str, core_id: Any = None, mirrors: Sequence[str] = ()) -> Future:
+        """提交下载（含文本提取），返回结果为保存路径与论文内容的 Future"""
+        return asyncio.run_coroutine_threadsafe(self.engine.fetch_paper(url, core_id, mirrors), self._loop)
+
+    def fetch_paper(self, url: str, core_id: Any = None, mirrors: Sequence[str] = ()) -> str:
+        """同步下载论文并提取文本"""
+        return self.submit(url, core_id, mirrors).result()
+
+    def download_many(
+        self,
+        urls: Iterable[str],
+        core_ids: Optional[Mapping[str, Any]] = None,
+        mirrors: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> list[Any]:
+        """同步并发下载多篇论文（不解析文本），参数与返回值同 `AsyncDownloadEngine.download_many`"""
+        return asyncio.run_coroutine_threadsafe(
+            self.engine.download_many(list(urls), core_ids, mirrors), self._loop
+        ).result()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.engine.stats()
+
+    def close(self) -> None:
+        """关闭连接池并停止事件循环"""
+        asyncio.run_coroutine_threadsafe(self.engine.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_async_download_engine: Optional[BackgroundDownloadEngine] = None
+_async_download_engine_lock = threading.Lock()
+
+
+def get_async_download_engine() -> BackgroundDownloadEngine:
+    """获取进程内共享的异步下载引擎（同步门面）"""
+    global _async_download_engine
+    if _async_download_engine is None:
+        with _async_download_engine_lock:
+            if _async_download_engine is None:
+                _async_download_engine = BackgroundDownloadEngine()
+    return _async_download_engine
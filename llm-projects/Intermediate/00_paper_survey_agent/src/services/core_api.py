@@ -4,22 +4,305 @@ CORE API封装
 
 import os
 import time
-from typing import ClassVar, Dict, Any
+import asyncio
+from collections import deque
+from typing import ClassVar, Dict, Any, Iterator, Mapping, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+import httpx
 from pydantic import BaseModel
 
-from ..config import CORE_API_KEY
+from ..config import (
+    CORE_API_KEY, CORE_API_BASE_URL, SEARCH_CACHE_ENABLED, CORE_HTTP_POOLING, CORE_HTTP_POOL_SIZE, CORE_PAGE_PREFETCH, PREFETCH_ENABLED,
+    CORE_FULLTEXT_ENABLED, RERANK_ENABLED, RERANK_TOP_K, RERANK_MIN_SCORE, DOWNLOAD_MAX_RETRIES,
+    ASYNC_DOWNLOAD_ENABLED, SEARCH_ID_ONLY
+)
+from .search_cache import get_search_cache
+from .prefetch_queue import get_prefetch_queue
+from .download_scheduler import RetryLater, get_download_scheduler
+from .rate_limiter import get_core_rate_limiter, parse_retry_after
+from .rank_fusion import reciprocal_rank_fusion
+from .ranking import get_ranker, select_for_download
+from .paper_store import usable_fulltext, save_fulltext, download_candidates
+from .result_formatter import format_search_results, get_metadata_store
+from .http_session import get_core_session, get_core_async_client, CORE_TIMEOUT
 
 
 class CoreAPIWrapper(BaseModel):
     """CORE API的简单封装"""
-    base_url: ClassVar[str] = "https://api.core.ac.uk/v3"
+    base_url: ClassVar[str] = CORE_API_BASE_URL
     api_key: ClassVar[str] = CORE_API_KEY
+    max_page_size: ClassVar[int] = 100  # CORE 单次请求 limit 的上限
     top_k_results: int = 1
+    pooled_session: bool = CORE_HTTP_POOLING
+    rerank_enabled: bool = RERANK_ENABLED
+    rerank_top_k: int = RERANK_TOP_K
+    rerank_min_score: float = RERANK_MIN_SCORE
+    topic: Optional[str] = None  # 本次运行的主题（用户的原始查询），与搜索查询一并用于重排序
+
+    def _cache_key(self, query: str, limit: int, offset: int) -> Optional[str]:
+        """搜索缓存键（缓存关闭时为 None）"""
+        if not SEARCH_CACHE_ENABLED:
+            return None
+        return get_search_cache().make_key(query, limit, offset, self.base_url)
+
+    def _cache_lookup(self, cache_key: Optional[str], query: str) -> Optional[Dict[str, Any]]:
+        """读取搜索缓存"""
+        if cache_key is None:
+            return None
+        cached_output = get_search_cache().get(cache_key)
+        if cached_output is not None:
+            print(f"⚡ 命中搜索缓存: {query}")
+        return cached_output
+
+    def _fetch_page(self, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+        """获取一页搜索结果（优先读取缓存，命中时跳过网络请求与重试）"""
+        cache_key = self._cache_key(query, limit, offset)
+        page = self._cache_lookup(cache_key, query)
+        if page is None:
+            page = self._request_search(query, limit=limit, offset=offset)
+            if cache_key is not None:
+                get_search_cache().set(cache_key, page)
+        return page
+
+    async def _afetch_page(self, query: str, limit: int, offset: int = 0) -> Dict[str, Any]:
+        """获取一页搜索结果（异步版本，SQLite 缓存读写在线程中执行，不阻塞事件循环）"""
+        cache_key = self._cache_key(query, limit, offset)
+        page = await asyncio.to_thread(self._cache_lookup, cache_key, query) if cache_key is not None else None
+        if page is None:
+            page = await self._arequest_search(query, limit=limit, offset=offset)
+            if cache_key is not None:
+                await asyncio.to_thread(get_search_cache().set, cache_key, page)
+        return page
 
     def _get_search_response(self, query: str) -> Dict[str, Any]:
-        """获取搜索响应"""
+        """获取搜索响应，超过单页上限时自动分页获取"""
+        if self.top_k_results <= self.max_page_size:
+            original_output = self._fetch_page(query, self.top_k_results)
+        else:
+            results = list(self.iter_search_results(query, max_results=self.top_k_results))
+            original_output = {"totalHits": len(results), "results": results}
+
+        self._dispatch_downloads(original_output, query)
+        return original_output
+
+    async def _aget_search_response(self, query: str) -> Dict[str, Any]:
+        """获取搜索响应（异步版本）"""
+        if self.top_k_results <= self.max_page_size:
+            original_output = await self._afetch_page(query, self.top_k_results)
+        else:
+            results = []
+            for offset in range(0, self.top_k_results, self.max_page_size):
+                limit = min(self.max_page_size, self.top_k_results - offset)
+                page_results = (await self._afetch_page(query, limit, offset)).get("results", [])
+                results.extend(page_results)
+                if len(page_results) < limit:
+                    break
+            original_output = {"totalHits": len(results), "results": results}
+
+        await self._adispatch_downloads(original_output, query)
+        return original_output
+
+    def _dispatch_downloads(self, original_output: Dict[str, Any], query: str) -> None:
+        """提交后台下载（先按主题重排序筛选，优先使用搜索结果自带的全文，缺失时才下载 PDF）；关闭预取时在当前线程内并行下载"""
+        results = original_output.get("results", [])
+        if self.rerank_enabled:
+            # 主题可能不是英文（与英文结果没有共同词时不影响得分），因此与英文搜索查询一并参与打分
+            results = self._rerank_for_download(results, f"{self.topic} {query}" if self.topic else query)
+        if CORE_FULLTEXT_ENABLED:
+            results = self._store_fulltexts(results)
+        downloads = self._collect_downloads(results)
+        if not downloads:
+            return
+        mirrors = self._collect_mirrors(results)
+        if PREFETCH_ENABLED:
+            self._enqueue_downloads(downloads, mirrors)
+        else:
+            # 并行下载论文
+            print(f"🚀 开始并行下载 {len(downloads)} 篇论文...")
+            self._parallel_download_papers(downloads, mirrors)
+
+    async def _adispatch_downloads(self, original_output: Dict[str, Any], query: str) -> None:
+        """
+        提交后台下载（异步版本）
+
+        重排序、全文写入（可能触发容量淘汰）与关闭预取时的 PDF 下载解析均为阻塞实现，交由线程执行以免阻塞事件循环
+        """
+        await asyncio.to_thread(self._dispatch_downloads, original_output, query)
+
+    def _rerank_for_download(self, results: list[Dict[str, Any]], topic: str) -> list[Dict[str, Any]]:
+        """用 BM25 按标题与摘要对搜索结果重排序，只保留排名靠前且得分不低于阈值的结果"""
+        if not results:
+            return results
+        selected = select_for_download(get_ranker(), topic, results, self.rerank_top_k, self.rerank_min_score)
+        if len(selected) < len(results):
+            print(f"🎯 本地重排序: {len(results)} 篇结果中选取 {len(selected)} 篇下载")
+        return selected
+
+    @staticmethod
+    def _store_fulltexts(results: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+        """
+        将自带全文的搜索结果直接写入本地论文存储
+
+        Returns:
+            仍需下载 PDF 的搜索结果
+        """
+        remaining = []
+        saved_count = 0
+        for result in results:
+            full_text = usable_fulltext(result)
+            if full_text is None:
+                remaining.append(result)
+                continue
+            try:
+                save_fulltext(result)
+            except OSError as e:
+                print(f"  ⚠️ 保存全文失败，回退为下载 PDF: {e}")
+                remaining.append(result)
+                continue
+            # 全文已按 downloadUrl 与 CORE id 登记到论文清单，之后对同一链接调用 download-paper 时直接从本地文件返回
+            saved_count += 1
+        if saved_count:
+            print(f"📝 {saved_count} 篇论文直接使用 CORE 全文，跳过 PDF 下载与解析")
+        return remaining
+
+    @staticmethod
+    def _enqueue_downloads(downloads: Dict[str, Any], mirrors: Optional[Dict[str, list[str]]] = None) -> None:
+        """将下载链接交给后台预取队列，搜索无需等待下载完成即可返回"""
+        get_prefetch_queue().submit_many(downloads.keys(), core_ids=downloads, mirrors=mirrors)
+        print(f"📥 已将 {len(downloads)} 篇论文加入后台下载队列")
+
+    @staticmethod
+    def _collect_downloads(results: list[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        提取搜索结果中的下载链接（`downloadUrl`，缺失时为首个 `sourceFulltextUrls`），
+        返回 下载链接 → CORE id（保持结果顺序）
+        """
+        downloads: Dict[str, Any] = {}
+        for result in results:
+            candidates = download_candidates(result)
+            if candidates:
+                downloads.setdefault(candidates[0], result.get("id"))
+        return downloads
+
+    @staticmethod
+    def _collect_mirrors(results: list[Dict[str, Any]]) -> Dict[str, list[str]]:
+        """返回 下载链接 → 同一论文的备用链接（来自 `sourceFulltextUrls`，含 arXiv abs → pdf 改写）"""
+        mirrors: Dict[str, list[str]] = {}
+        for result in results:
+            candidates = download_candidates(result)
+            if len(candidates) > 1:
+                mirrors.setdefault(candidates[0], candidates[1:])
+        return mirrors
+
+    def iter_search_pages(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        page_size: int = 100,
+        prefetch: int = CORE_PAGE_PREFETCH,
+        use_scroll: bool = False,
+    ) -> Iterator[list[Dict[str, Any]]]:
+        """
+        惰性分页获取搜索结果，不受单次请求 100 条的限制
+
+        后台最多预取 `prefetch` 页，调用方可随时停止迭代（未开始的预取请求会被取消），
+        不会在内存中缓存全部结果。仅获取元数据，不触发论文下载。
+
+        示例：
+            for page in CoreAPIWrapper().iter_search_pages("diffusion models", max_results=2000):
+                candidates.extend(r for r in page if r.get("downloadUrl"))
+                if len(candidates) >= 300:
+                    break
+
+        Args:
+            query: 搜索查询
+            max_results: 最多获取的结果数，None 表示直到结果耗尽
+            page_size: 每页结果数（不超过 100）
+            prefetch: 最大并发预取页数
+            use_scroll: 使用 CORE 的 scroll 游标翻页（适合超过 10000 条的深度翻页，只能顺序预取下一页）
+
+        Yields:
+            每一页的结果列表
+        """
+        page_size = max(1, min(page_size, self.max_page_size))
+        prefetch = max(1, prefetch)
+        if use_scroll:
+            yield from self._iter_scroll_pages(query, max_results, page_size)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="core-page")
+        pending = deque()
+        next_offset = 0
+        total_hits = None
+
+        def schedule() -> None:
+            """在预取窗口内提交后续页"""
+            nonlocal next_offset
+            while len(pending) < prefetch:
+                bounds = [bound for bound in (max_results, total_hits) if bound is not None]
+                upper_bound = min(bounds) if bounds else None
+                if upper_bound is not None and next_offset >= upper_bound:
+                    return
+                limit = page_size if upper_bound is None else min(page_size, upper_bound - next_offset)
+                pending.append((limit, executor.submit(self._fetch_page, query, limit, next_offset)))
+                next_offset += limit
+                # 首页返回之前不知道结果总数，先只请求一页
+                if total_hits is None:
+                    return
+
+        try:
+            schedule()
+            while pending:
+                limit, future = pending.popleft()
+                page = future.result()
+                if total_hits is None:
+                    total_hits = page.get("totalHits")
+                results = page.get("results", [])
+                if results:
+                    yield results
+                if len(results) < limit:
+                    return
+                schedule()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_scroll_pages(self, query: str, max_results: Optional[int], page_size: int) -> Iterator[list[Dict[str, Any]]]:
+        """基于 scroll 游标的翻页：每页依赖上一页返回的 scrollId，因此仅预取下一页"""
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="core-scroll")
+        fetched = 0
+        try:
+            future = executor.submit(self._request_search, query, page_size, 0, True, None)
+            while future is not None:
+                page = future.result()
+                results = page.get("results", [])
+                exhausted = len(results) < page_size
+                if max_results is not None:
+                    results = results[:max_results - fetched]
+                fetched += len(results)
+
+                scroll_id = page.get("scrollId")
+                done = exhausted or not scroll_id or (max_results is not None and fetched >= max_results)
+                future = None if done else executor.submit(self._request_search, query, page_size, 0, True, scroll_id)
+                if results:
+                    yield results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_search_results(self, query: str, max_results: Optional[int] = None, **kwargs) -> Iterator[Dict[str, Any]]:
+        """逐条惰性返回搜索结果，参数同 `iter_search_pages`"""
+        for page in self.iter_search_pages(query, max_results=max_results, **kwargs):
+            yield from page
+
+    def _build_search_request(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        scroll: bool = False,
+        scroll_id: Optional[str] = None,
+    ) -> tuple[str, Dict[str, str], Dict[str, Any]]:
+        """构造搜索请求的 URL、请求头与请求体"""
         url = f"{self.base_url}/search/works"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -28,88 +311,211 @@ class CoreAPIWrapper(BaseModel):
         
         data = {
             "q": query,
-            "limit": self.top_k_results,
-            "offset": 0,
-            "scroll": False
+            "limit": limit or self.top_k_results,
+            "offset": offset,
+            "scroll": scroll
         }
-        
+        if scroll_id:
+            data["scrollId"] = scroll_id
+        return url, headers, data
+
+    def _request_search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        scroll: bool = False,
+        scroll_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """向 CORE API 发送搜索请求（带重试）"""
+        url, headers, data = self._build_search_request(query, limit, offset, scroll, scroll_id)
+
+        # 共享会话复用 keep-alive 连接；关闭时退化为每次请求新建连接
+        http = get_core_session() if self.pooled_session else requests
+        rate_limiter = get_core_rate_limiter()
+
         max_retries = 3
         for attempt in range(max_retries):
+            rate_limiter.acquire()
             try:
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+                response = http.post(url, json=data, headers=headers, timeout=CORE_TIMEOUT)
+                if self._throttled(response.status_code, response.headers, attempt) and attempt < max_retries - 1:
+                    continue
                 response.raise_for_status()
-                original_output = response.json()
-                
-                # 并行下载论文
-                download_urls = [result.get("downloadUrl") for result in original_output.get("results", []) if result.get("downloadUrl")]
-                if download_urls:
-                    print(f"🚀 开始并行下载 {len(download_urls)} 篇论文...")
-                    self._parallel_download_papers(download_urls)
-                
-                return original_output
+                return response.json()
             except requests.exceptions.RequestException as e:
                 if attempt < max_retries - 1:
                     time.sleep(2 ** attempt)
                 else:
                     raise Exception(f"CORE API请求失败: {e}")
+
+    async def _arequest_search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        scroll: bool = False,
+        scroll_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """向 CORE API 发送搜索请求（异步版本，重试等待不阻塞事件循环）"""
+        url, headers, data = self._build_search_request(query, limit, offset, scroll, scroll_id)
+        client = get_core_async_client()
+        rate_limiter = get_core_rate_limiter()
+
+        max_retries = 3
+        for attempt in range(max_retries):
+            await rate_limiter.aacquire()
+            try:
+                response = await client.post(url, json=data, headers=headers)
+                if await self._athrottled(response.status_code, response.headers, attempt) and attempt < max_retries - 1:
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPError as e:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+                else:
+                    raise Exception(f"CORE API请求失败: {e}")
     
-    def _parallel_download_papers(self, download_urls: list[str], max_workers: int = 3) -> None:
+    @staticmethod
+    def _throttle_delay(status_code: int, headers: Mapping[str, str], attempt: int) -> Optional[float]:
+        """
+        限流响应（429，或带 Retry-After 的 503）需要暂停的秒数：按 Retry-After，缺省时按指数退避
+
+        Returns:
+            暂停秒数，不是限流响应时为 None
+        """
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+        if status_code != 429 and not (status_code == 503 and retry_after is not None):
+            return None
+        delay = retry_after if retry_after is not None else 2 ** attempt
+        print(f"⏳ CORE API 限流（{status_code}），{delay:.1f} 秒后重试")
+        return delay
+
+    @classmethod
+    def _throttled(cls, status_code: int, headers: Mapping[str, str], attempt: int) -> bool:
+        """
+        处理服务端限流响应：暂停共享令牌桶，下一次取令牌时自然会等待到暂停结束，因此调用方无需再自行 sleep
+
+        Returns:
+            是否为限流响应
+        """
+        delay = cls._throttle_delay(status_code, headers, attempt)
+        if delay is None:
+            return False
+        get_core_rate_limiter().penalize(delay)
+        return True
+
+    @classmethod
+    async def _athrottled(cls, status_code: int, headers: Mapping[str, str], attempt: int) -> bool:
+        """处理服务端限流响应（异步版本，跨进程共享的令牌桶状态在线程中更新）"""
+        delay = cls._throttle_delay(status_code, headers, attempt)
+        if delay is None:
+            return False
+        await get_core_rate_limiter().apenalize(delay)
+        return True
+
+    def _parallel_download_papers(self, downloads: Dict[str, Any], mirrors: Optional[Dict[str, list[str]]] = None) -> None:
         """
-        并行下载多篇论文
+        并行下载多篇论文（交由共享的下载调度器或异步下载引擎执行，受全局与单主机并发上限约束），等待全部完成
         
         Args:
-            download_urls: 下载链接列表
-            max_workers: 最大并发工作线程数，默认为3
+            downloads: 下载链接 → CORE id（按相关性排序，排名即调度优先级）
+            mirrors: 下载链接 → 备用下载链接
         """
-        def download_single_paper(url: str) -> tuple[str, bool, str]:
-            """下载单篇论文的包装函数"""
+        from ..tools.download_tools import fetch_paper
+        download_urls = list(downloads)
+        mirrors = mirrors or {}
+
+        def download_single_paper(url: str, final_attempt: bool = True) -> tuple[str, bool, str]:
+            """下载单篇论文的包装函数（临时失败时 RetryLater 交由调度器延迟重试）"""
             try:
-                from ..tools.download_tools import download_paper
-                result = download_paper(url)
+                result = fetch_paper(url, downloads[url], final_attempt=final_attempt, mirrors=mirrors.get(url, ()))
                 return url, True, result
+            except RetryLater:
+                raise
             except Exception as e:
                 return url, False, str(e)
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_url = {executor.submit(download_single_paper, url): url for url in download_urls}
-            
-            completed_count = 0
-            failed_count = 0
-            
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
+        if ASYNC_DOWNLOAD_ENABLED:
+            # 批量下载改由异步引擎在单个事件循环内并发执行（失败以异常形式出现在 Future 中）
+            from .async_downloader import get_async_download_engine
+            engine = get_async_download_engine()
+            future_to_url = {engine.submit(url, downloads[url], mirrors.get(url, ())): url for url in download_urls}
+        else:
+            scheduler = get_download_scheduler()
+            future_to_url = {
+                scheduler.submit(url, download_single_paper, url, priority=rank, max_retries=DOWNLOAD_MAX_RETRIES): url
+                for rank, url in enumerate(download_urls)
+            }
+        
+        completed_count = 0
+        failed_count = 0
+        
+        for future in as_completed(future_to_url):
+            url = future_to_url[future]
+            try:
+                if ASYNC_DOWNLOAD_ENABLED:
+                    original_url, success, result = url, True, future.result()
+                else:
                     original_url, success, result = future.result()
-                    if success:
-                        completed_count += 1
-                        print(f"  ✅ 下载完成 ({completed_count}/{len(download_urls)}): {os.path.basename(original_url)}")
-                    else:
-                        failed_count += 1
-                        print(f"  ❌ 下载失败 ({failed_count}/{len(download_urls)}): {result}")
-                except Exception as e:
+                if success:
+                    completed_count += 1
+                    print(f"  ✅ 下载完成 ({completed_count}/{len(download_urls)}): {os.path.basename(original_url)}")
+                else:
                     failed_count += 1
-                    print(f"  ❌ 下载异常 ({failed_count}/{len(download_urls)}): {e}")
-            
-            print(f"📊 下载统计: 成功 {completed_count} 篇, 失败 {failed_count} 篇")
+                    print(f"  ❌ 下载失败 ({failed_count}/{len(download_urls)}): {result}")
+            except Exception as e:
+                failed_count += 1
+                print(f"  ❌ 下载异常 ({failed_count}/{len(download_urls)}): {e}")
+        
+        print(f"📊 下载统计: 成功 {completed_count} 篇, 失败 {failed_count} 篇")
 
-    def search(self, query: str) -> str:
-        """搜索论文"""
-        response = self._get_search_response(query)
-        results = response.get("results", [])
-        if not results:
-            return "未找到相关结果"
+    def search(self, query: str, id_only: bool = False) -> str:
+        """搜索论文（id_only 为 True 时每篇只返回 ID、年份、标题与下载链接）"""
+        return self._format_results(self._get_search_response(query), id_only)
 
-        # 格式化结果
-        docs = []
-        for result in results:
-            published_date_str = result.get('publishedDate') or result.get('yearPublished', '')
-            authors_str = ' and '.join([item['name'] for item in result.get('authors', [])])
-            docs.append((
-                f"* ID: {result.get('id', '')}\n"
-                f"* 标题: {result.get('title', '')}\n"
-                f"* 发表日期: {published_date_str}\n"
-                f"* 作者: {authors_str}\n"
-                f"* 摘要: {result.get('abstract', '')}\n"
-                f"* 论文下载链接: {result.get('downloadUrl') or result.get('sourceFulltextUrls', '')}"
-            ))
-        return "\n-----\n".join(docs)
+    async def asearch(self, query: str, id_only: bool = False) -> str:
+        """搜索论文（异步版本）"""
+        return self._format_results(await self._aget_search_response(query), id_only)
+
+    def batch_search(self, queries: list[str], max_results: int = 20, id_only: bool = False) -> str:
+        """
+        并发执行多个子查询，去重并以 RRF 融合排名后返回一份结果列表
+
+        Args:
+            queries: 子查询列表（每个子查询最多返回 top_k_results 篇）
+            max_results: 融合后保留的论文数量
+            id_only: 每篇只返回 ID、年份、标题与下载链接
+        """
+        queries = list(dict.fromkeys(query.strip() for query in queries if query.strip()))
+        with ThreadPoolExecutor(max_workers=max(1, min(len(queries), CORE_HTTP_POOL_SIZE)), thread_name_prefix="core-batch") as executor:
+            responses = list(executor.map(lambda query: self._fetch_page(query, self.top_k_results), queries))
+        fused_output = self._fuse_batch(queries, responses, max_results)
+        self._dispatch_downloads(fused_output, " ".join(queries))
+        return self._format_results(fused_output, id_only)
+
+    async def abatch_search(self, queries: list[str], max_results: int = 20, id_only: bool = False) -> str:
+        """并发执行多个子查询（异步版本）"""
+        queries = list(dict.fromkeys(query.strip() for query in queries if query.strip()))
+        responses = await asyncio.gather(*[self._afetch_page(query, self.top_k_results) for query in queries])
+        fused_output = self._fuse_batch(queries, responses, max_results)
+        await self._adispatch_downloads(fused_output, " ".join(queries))
+        return self._format_results(fused_output, id_only)
+
+    @staticmethod
+    def _fuse_batch(queries: list[str], responses: list[Dict[str, Any]], max_results: int) -> Dict[str, Any]:
+        """融合各子查询结果，返回与单次搜索响应结构一致的字典"""
+        fused = reciprocal_rank_fusion([response.get("results", []) for response in responses])
+        total_hits = sum(len(response.get("results", [])) for response in responses)
+        results = [paper for paper, _ in fused[:max_results]]
+        print(f"🔀 {len(queries)} 个子查询共 {total_hits} 条结果，去重后 {len(fused)} 篇，保留前 {len(results)} 篇")
+
+        return {"totalHits": len(results), "results": results}
+
+    @staticmethod
+    def _format_results(response: Dict[str, Any], id_only: bool = False) -> str:
+        """格式化搜索结果：按 token 预算输出精简信息，完整元数据存入元数据存储供按 ID 查询"""
+        results = response.get("results", [])
+        get_metadata_store().add_many(results)
+        return format_search_results(results, id_only=id_only or SEARCH_ID_ONLY)
@@ -0,0 +1,389 @@
+"""
+论文下载调度器
+
+进程内所有论文下载（后台预取队列、关闭预取时的同步并行下载）共用一个调度器：
+按优先级（相关性排名，数值越小越先下载）从队列中取任务，同时限制全局并发数与单个主机的并发数，
+避免多次搜索各自开线程池时带宽利用不足或集中请求同一论文库主机而触发 403 / 429。
+
+下载任务之外的请求（如同一论文备用链接的对冲请求）通过 `try_acquire_host` / `release_host` 占用同一主机名额，
+同样受单主机并发上限约束。
+
+任务抛出 `RetryLater` 时不在工作线程内等待：调度器按全抖动指数退避把任务放入延迟队列，
+工作线程立即去执行其他任务；每个主机的重试次数受滑动窗口内的重试预算限制。
+"""
+
+import heapq
+import random
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from ..config import (
+    DOWNLOAD_MAX_CONCURRENCY, DOWNLOAD_PER_HOST_CONCURRENCY, DOWNLOAD_RETRY_BASE_DELAY,
+    DOWNLOAD_RETRY_MAX_DELAY, DOWNLOAD_HOST_RETRY_BUDGET, DOWNLOAD_HOST_RETRY_BUDGETS, DOWNLOAD_HOST_RETRY_WINDOW
+)
+from .negative_cache import url_host
+
+# 计算吞吐量的时间窗口（秒）
+THROUGHPUT_WINDOW = 60.0
+
+
+class RetryLater(Exception):
+    """任务请求稍后重试：cause 为本次失败的原因（放弃重试时作为任务的异常），delay 为服务器建议的最短等待时间"""
+
+    def __init__(self, cause: BaseException, delay: Optional[float] = None):
+        super().__init__(str(cause))
+        self.cause = cause
+        self.delay = delay
+
+
+def parse_host_budgets(value: str) -> Dict[str, int]:
+    """解析按主机覆盖的重试预算，格式为 `host=次数,host=次数`（忽略无法解析的项）"""
+    budgets = {}
+    for item in value.split(","):
+        host, _, budget = item.partition("=")
+        if host.strip() and budget.strip().lstrip("-").isdigit():
+            budgets[host.strip().lower()] = int(budget)
+    return budgets
+
+
+def backoff_delay(attempt: int, base: float = DOWNLOAD_RETRY_BASE_DELAY, cap: float = DOWNLOAD_RETRY_MAX_DELAY) -> float:
+    """全抖动指数退避：在 [0, min(cap, base * 2^attempt)] 内均匀取值，避免大量重试同时到达"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _DownloadJob:
+    """队列中的一个下载任务"""
+
+    __slots__ = ("url", "host", "fn", "args", "future", "enqueued_at", "max_retries", "attempt")
+
+    def __init__(self, url: str, fn: Callable[..., Any], args: tuple, future: Future, max_retries: int):
+        self.url = url
+        self.host = url_host(url)
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.max_retries = max_retries
+        self.attempt = 0
+
+
+class DownloadScheduler:
+    """带优先级与全局 / 单主机并发上限的下载调度器"""
+
+    def __init__(
+        self,
+        max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+        per_host: int = DOWNLOAD_PER_HOST_CONCURRENCY,
+        host_retry_budget: int = DOWNLOAD_HOST_RETRY_BUDGET,
+        host_retry_budgets: Optional[Dict[str, int]] = None,
+        retry_window: float = DOWNLOAD_HOST_RETRY_WINDOW,
+    ):
+        """
+        Args:
+            max_concurrency: 全局最大并发下载数（即工作线程数）
+            per_host: 单个主机的最大并发下载数，<= 0 表示不限制
+            host_retry_budget: 每个主机在 retry_window 秒内允许的重试次数，< 0 表示不限制
+            host_retry_budgets: 按主机覆盖的重试预算，默认读取 DOWNLOAD_HOST_RETRY_BUDGETS
+            retry_window: 重试预算的滑动窗口（秒）
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = per_host if per_host > 0 else self.max_concurrency
+        self.host_retry_budget = host_retry_budget
+        self.host_retry_budgets = (
+            host_retry_budgets if host_retry_budgets is not None else parse_host_budgets(DOWNLOAD_HOST_RETRY_BUDGETS)
+        )
+        self.retry_window = retry_window
+        self._cond = threading.Condition()
+        self._queue: list[tuple[float, int, _DownloadJob]] = []
+        # 等待重试的任务：(可执行时间, 序号, 优先级, 任务)
+        self._delayed: list[tuple[float, int, float, _DownloadJob]] = []
+        self._retried_at: Dict[str, deque] = {}
+        self._seq = itertools.count()
+        self._running_by_host: Dict[str, int] = {}
+        # 下载任务之外占用的主机名额（对冲请求）
+        self._extra_by_host: Dict[str, int] = {}
+        self._workers: list[threading.Thread] = []
+        self._shutdown = False
+        # 统计
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._total_wait = 0.0
+        self._started = 0
+        self._finished_at: deque = deque()
+        self._retries = 0
+        self._retries_by_host: Dict[str, int] = {}
+        self._retries_exhausted = 0
+        self._budget_exhausted = 0
+
+    def submit(
+        self,
+        url: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: float = 0.0,
+        max_retries: int = 0,
+    ) -> Future:
+        """
+        提交下载任务
+
+        Args:
+            url: 下载链接（用于单主机并发与重试预算）
+            fn: 在工作线程中执行的下载函数。max_retries 为 0 时调用方式为 fn(*args)；
+                否则为 fn(*args, final_attempt=...)，非最后一次尝试时可抛出 `RetryLater` 请求延迟重试
+            priority: 优先级，数值越小越先执行；相同优先级按提交顺序执行
+            max_retries: 最多重试次数
+
+        Returns:
+            结果为 fn 返回值的 Future；任务开始前可调用 cancel() 取消
+        """
+        future: Future = Future()
+        job = _DownloadJob(url, fn, args, future, max_retries)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("下载调度器已关闭")
+            heapq.heappush(self._queue, (priority, next(self._seq), job))
+            self._submitted += 1
+            self._ensure_workers()
+            self._cond.notify()
+        return future
+
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程（调用方持有锁）"""
+        while len(self._workers) < min(self.max_concurrency, len(self._queue) + len(self._delayed) + self._running()):
+            worker = threading.Thread(
+                target=self._worker, name=f"paper-download-{len(self._workers)}", daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _running(self) -> int:
+        return sum(self._running_by_host.values())
+
+    def _host_load(self, host: str) -> int:
+        """主机当前占用的名额：正在执行的任务与对冲请求（调用方持有锁）"""
+        return self._running_by_host.get(host, 0) + self._extra_by_host.get(host, 0)
+
+    def try_acquire_host(self, url: str) -> bool:
+        """
+        为下载任务之外的请求占用链接所属主机的一个名额（不等待）
+
+        Returns:
+            是否占用成功；成功时请求结束后须调用 `release_host`
+        """
+        host = url_host(url)
+        with self._cond:
+            if self._host_load(host) >= self.per_host:
+                return False
+            self._extra_by_host[host] = self._extra_by_host.get(host, 0) + 1
+            return True
+
+    def release_host(self, url: str) -> None:
+        """释放 `try_acquire_host` 占用的主机名额"""
+        host = url_host(url)
+        with self._cond:
+            remaining = self._extra_by_host[host] - 1
+            if remaining:
+                self._extra_by_host[host] = remaining
+            else:
+                del self._extra_by_host[host]
+            self._cond.notify_all()
+
+    def _promote_delayed(self) -> Optional[float]:
+        """将已到重试时间的任务移回队列，返回距下一个重试任务的秒数（调用方持有锁）"""
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, seq, priority, job = heapq.heappop(self._delayed)
+            heapq.heappush(self._queue, (priority, seq, job))
+        return self._delayed[0][0] - now if self._delayed else None
+
+    def _retry_budget(self, host: str) -> int:
+        return self.host_retry_budgets.get(host, self.host_retry_budget)
+
+    def _can_retry(self, job: _DownloadJob) -> bool:
+        """任务是否还能重试：未超过重试次数，且主机在滑动窗口内的重试预算未用完（调用方持有锁）"""
+        if job.attempt >= job.max_retries:
+            return False
+        budget = self._retry_budget(job.host)
+        if budget < 0:
+            return True
+        retried_at = self._retried_at.get(job.host)
+        if retried_at is None:
+            return budget > 0
+        now = time.monotonic()
+        while retried_at and now - retried_at[0] > self.retry_window:
+            retried_at.popleft()
+        return len(retried_at) < budget
+
+    def _schedule_retry(self, job: _DownloadJob, priority: float, retry: RetryLater) -> None:
+        """按全抖动退避把任务放入延迟队列（调用方持有锁）"""
+        delay = max(backoff_delay(job.attempt), retry.delay or 0.0)
+        job.attempt += 1
+        self._retried_at.setdefault(job.host, deque()).append(time.monotonic())
+        self._retries += 1
+        self._retries_by_host[job.host] = self._retries_by_host.get(job.host, 0) + 1
+        heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), priority, job))
+        print(f"  🔁 {delay:.1f} 秒后第 {job.attempt} 次重试: {job.url}（{retry.cause}）")
+
+    def _take(self) -> Optional[tuple[float, _DownloadJob]]:
+        """取出优先级最高、且所属主机未达到并发上限的任务及其优先级（调用方持有锁）"""
+        self._promote_delayed()
+        skipped = []
+        job = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            if entry[2].future.cancelled():
+                self._cancelled += 1
+                continue
+            if self._host_load(entry[2].host) < self.per_host:
+                job = entry
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return (job[0], job[2]) if job else None
+
+    def _worker(self) -> None:
+        """工作线程：等待可执行的任务并执行"""
+        while True:
+            with self._cond:
+                taken = self._take()
+                while taken is None:
+                    if self._shutdown and not self._delayed:
+                        return
+                    # 没有可执行的任务时等到下一个重试任务到期（或被新任务唤醒）
+                    self._cond.wait(self._promote_delayed())
+                    taken = self._take()
+                priority, job = taken
+                # 重试的任务已处于运行状态
+                if job.attempt == 0 and not job.future.set_running_or_notify_cancel():
+                    self._cancelled += 1
+                    continue
+                self._running_by_host[job.host] = self._running_by_host.get(job.host, 0) + 1
+                if job.attempt == 0:
+                    self._started += 1
+                    self._total_wait += time.monotonic() - job.enqueued_at
+                final_attempt = not self._can_retry(job)
+
+            retry = None
+            try:
+                if job.max_retries:
+                    result = job.fn(*job.args, final_attempt=final_attempt)
+                else:
+                    result = job.fn(*job.args)
+            except RetryLater as e:
+                retry = e
+            except BaseException as e:
+                job.future.set_exception(e)
+                succeeded = False
+            else:
+                job.future.set_result(result)
+                succeeded = True
+
+            with self._cond:
+                remaining = self._running_by_host[job.host] - 1
+                if remaining:
+                    self._running_by_host[job.host] = remaining
+                else:
+                    del self._running_by_host[job.host]
+                if retry is not None:
+                    if self._can_retry(job):
+                        self._schedule_retry(job, priority, retry)
+                        self._cond.notify_all()
+                        continue
+                    # 最后一次尝试仍请求重试（例如预算在执行期间被其他任务用完）
+                    if job.attempt >= job.max_retries:
+                        self._retries_exhausted += 1
+                    else:
+                        self._budget_exhausted += 1
+                    job.future.set_exception(retry.cause)
+                    succeeded = False
+                if succeeded:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._finished_at.append(time.monotonic())
+                # 该主机空出名额，之前因单主机上限跳过的任务可能已可执行
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        调度统计
+
+        Returns:
+            queued: 等待中的任务数（队列深度）
+            running: 正在执行的任务数，running_by_host 为各主机的并发数
+            hedging_by_host: 各主机被对冲请求占用的名额
+            submitted / completed / failed / cancelled: 累计任务数
+            throughput: 最近 THROUGHPUT_WINDOW 秒内平均每秒完成的任务数
+            avg_wait: 任务从提交到开始执行的平均等待时间（秒）
+            delayed: 等待重试的任务数
+            retries / retries_by_host: 累计重试次数
+            retries_exhausted / budget_exhausted: 因重试次数用完 / 主机重试预算用完而放弃的任务数
+        """
+        now = time.monotonic()
+        with self._cond:
+            while self._finished_at and now - self._finished_at[0] > THROUGHPUT_WINDOW:
+                self._finished_at.popleft()
+            return {
+                "queued": sum(1 for _, _, job in self._queue if not job.future.cancelled()),
+                "running": self._running(),
+                "running_by_host": dict(self._running_by_host),
+                "hedging_by_host": dict(self._extra_by_host),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "throughput": len(self._finished_at) / THROUGHPUT_WINDOW,
+                "avg_wait": self._total_wait / self._started if self._started else 0.0,
+                "delayed": len(self._delayed),
+                "retries": self._retries,
+                "retries_by_host": dict(self._retries_by_host),
+                "retries_exhausted": self._retries_exhausted,
+                "budget_exhausted": self._budget_exhausted,
+            }
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """
+        关闭调度器，之后不再接受新任务
+
+        Args:
+            wait: 是否等待已提交的任务执行完毕
+            cancel_futures: 是否取消尚未开始的任务
+        """
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                for _, _, job in self._queue:
+                    if job.future.cancel():
+                        self._cancelled += 1
+                # 等待重试的任务已处于运行状态，无法 cancel()，直接以本次失败结束
+                for *_, job in self._delayed:
+                    job.future.set_exception(RuntimeError("下载调度器已关闭，放弃重试"))
+                    self._failed += 1
+                self._queue.clear()
+                self._delayed.clear()
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+
+_download_scheduler: Optional[DownloadScheduler] = None
+_download_scheduler_lock = threading.Lock()
+
+
+def get_download_scheduler() -> DownloadScheduler:
+    """获取进程内共享的下载调度器"""
+    global _download_scheduler
+    if _download_scheduler is None:
+        with _download_scheduler_lock:
+            if _download_scheduler is None:
+                _download_scheduler = DownloadScheduler()
+    return _download_scheduler
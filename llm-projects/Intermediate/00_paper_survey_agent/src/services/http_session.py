@@ -0,0 +1,206 @@
+"""
+共享 HTTP 连接
+
+进程内所有 CoreAPIWrapper 实例与线程复用同一个 requests.Session，
+借助 urllib3 连接池保持 keep-alive，避免每次搜索都重新进行 TCP / TLS 握手。
+异步搜索路径则为每个事件循环维护一个 httpx.AsyncClient。
+论文下载（所有下载线程）共享同一个 urllib3.PoolManager，并统计连接复用情况。
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, Optional
+import httpx
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from ..config import (
+    CORE_HTTP_POOL_SIZE, CORE_CONNECT_TIMEOUT, CORE_READ_TIMEOUT,
+    DOWNLOAD_POOL_HOSTS, DOWNLOAD_POOL_MAXSIZE, DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT
+)
+
+# (连接超时, 读取超时)，直接传给 requests 的 timeout 参数
+CORE_TIMEOUT = (CORE_CONNECT_TIMEOUT, CORE_READ_TIMEOUT)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def create_pooled_session(pool_size: int = CORE_HTTP_POOL_SIZE) -> requests.Session:
+    """
+    创建带连接池的会话
+
+    Args:
+        pool_size: 每个主机保持的最大连接数，应不小于并发搜索线程数
+
+    Returns:
+        挂载了连接池适配器的会话（重试由调用方自行处理）
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_core_session() -> requests.Session:
+    """获取进程内共享的 CORE API 会话"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_pooled_session()
+    return _session
+
+
+def close_core_session() -> None:
+    """关闭共享会话并释放连接池（下次调用 get_core_session 时会重新创建）"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# httpx.AsyncClient 绑定创建它的事件循环，因此按事件循环分别缓存
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_core_async_client() -> httpx.AsyncClient:
+    """获取当前事件循环共享的异步客户端（需在协程中调用）"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=CORE_HTTP_POOL_SIZE, max_keepalive_connections=CORE_HTTP_POOL_SIZE),
+            # pool=None：并发搜索超过连接数时排队等待空闲连接，而不是超时失败
+            timeout=httpx.Timeout(CORE_READ_TIMEOUT, connect=CORE_CONNECT_TIMEOUT, pool=None),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_core_async_client() -> None:
+    """关闭当前事件循环的异步客户端（在 asyncio.run 结束前调用，避免连接泄漏）"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+class ConnectionMetrics:
+    """按主机统计请求数与新建连接数（二者之差即为复用的连接数）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+
+    def _record(self, host: str, field: str) -> None:
+        with self._lock:
+            counters = self._hosts.setdefault(host, {"requests": 0, "new_connections": 0})
+            counters[field] += 1
+
+    def record_request(self, host: str) -> None:
+        self._record(host, "requests")
+
+    def record_connection(self, host: str) -> None:
+        self._record(host, "new_connections")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回汇总统计与各主机明细"""
+        with self._lock:
+            hosts = {host: dict(counters) for host, counters in self._hosts.items()}
+        total_requests = sum(counters["requests"] for counters in hosts.values())
+        new_connections = sum(counters["new_connections"] for counters in hosts.values())
+        reused = max(total_requests - new_connections, 0)
+        return {
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "reused": reused,
+            "reuse_rate": reused / total_requests if total_requests else 0.0,
+            "hosts": hosts,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+download_metrics = ConnectionMetrics()
+
+
+class _MeteredHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    """记录请求与新建连接的连接池（每次重试 / 重定向都计为一次请求）"""
+
+    def _new_conn(self):
+        download_metrics.record_connection(self.host)
+        return super()._new_conn()
+
+    def urlopen(self, method, url, *args, **kwargs):
+        download_metrics.record_request(self.host)
+        return super().urlopen(method, url, *args, **kwargs)
+
+
+class _MeteredHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    """HTTPS 版本的计量连接池"""
+
+    def _new_conn(self):
+        download_metrics.record_connection(self.host)
+        return super()._new_conn()
+
+    def urlopen(self, method, url, *args, **kwargs):
+        download_metrics.record_request(self.host)
+        return super().urlopen(method, url, *args, **kwargs)
+
+
+_download_pool: Optional[urllib3.PoolManager] = None
+_download_pool_lock = threading.Lock()
+
+
+def create_download_pool_manager(
+    num_pools: int = DOWNLOAD_POOL_HOSTS,
+    maxsize: int = DOWNLOAD_POOL_MAXSIZE,
+) -> urllib3.PoolManager:
+    """
+    创建论文下载使用的连接池管理器
+
+    Args:
+        num_pools: 同时保留连接池的主机数，超出后淘汰最久未使用的主机
+        maxsize: 每个主机保持的 keep-alive 连接数，应不小于下载线程数
+
+    Returns:
+        统计连接复用情况的 PoolManager（与原实现一致，不校验证书）；
+        只跟随重定向，连接错误与 5xx / 429 的重试（含 Retry-After）交由下载调度器，不在下载线程内等待
+    """
+    manager = urllib3.PoolManager(
+        num_pools=num_pools,
+        maxsize=maxsize,
+        block=False,
+        cert_reqs='CERT_NONE',
+        timeout=urllib3.Timeout(connect=DOWNLOAD_CONNECT_TIMEOUT, read=DOWNLOAD_READ_TIMEOUT),
+        retries=urllib3.Retry(
+            total=None, connect=0, read=0, status=0, other=0, redirect=10, respect_retry_after_header=False
+        ),
+    )
+    manager.pool_classes_by_scheme = {"http": _MeteredHTTPConnectionPool, "https": _MeteredHTTPSConnectionPool}
+    return manager
+
+
+def get_download_pool_manager() -> urllib3.PoolManager:
+    """获取进程内所有下载线程共享的连接池管理器"""
+    global _download_pool
+    if _download_pool is None:
+        with _download_pool_lock:
+            if _download_pool is None:
+                _download_pool = create_download_pool_manager()
+    return _download_pool
+
+
+def close_download_pool_manager() -> None:
+    """关闭共享的下载连接池（下次调用 get_download_pool_manager 时会重新创建）"""
+    global _download_pool
+    with _download_pool_lock:
+        if _download_pool is not None:
+            _download_pool.clear()
+            _download_pool = None
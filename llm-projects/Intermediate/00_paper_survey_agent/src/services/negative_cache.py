@@ -0,0 +1,232 @@
+"""
+下载失败链接的负缓存与按主机的熔断器
+
+下载失败的链接（失效的仓储地址、返回 404 / 403 的页面等）会在之后的 CORE 搜索中反复出现，
+每次都要经历完整的重试退避。这里把失败记录到 SQLite（多进程共享），有效期内直接跳过：
+- 链接级：记录状态码、失败类型（HTTP 错误 / 网络错误 / 非 PDF 内容）、失败次数与过期时间，
+  连续失败时有效期按指数增长；
+- 主机级：同一主机连续失败达到阈值后熔断，冷却期内跳过该主机的所有链接，
+  冷却结束后只放行一个探测请求（半开），成功则恢复，失败则以更长的冷却期再次熔断。
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from ..config import (
+    NEGATIVE_CACHE_PATH, NEGATIVE_CACHE_TTL, HOST_BREAKER_THRESHOLD, HOST_BREAKER_COOLDOWN
+)
+
+# 重试也不会成功的状态码，使用完整有效期；其余（5xx、429、网络错误）按短有效期处理
+PERMANENT_STATUSES = frozenset({400, 401, 403, 404, 410, 451})
+
+# 连续失败时有效期 / 冷却期的最大倍数
+MAX_BACKOFF_FACTOR = 16
+
+# 失败类型
+FAILURE_HTTP = "http"
+FAILURE_NETWORK = "network"
+# 返回 2xx 但内容不是 PDF（落地页、登录页等）：按永久性失败处理，且不计入主机熔断（主机本身可用）
+FAILURE_NON_PDF = "non_pdf"
+
+
+def url_host(url: str) -> str:
+    """提取链接的主机名（小写）"""
+    return (urlparse(url.strip()).hostname or "").lower()
+
+
+class NegativeCache:
+    """下载失败链接与主机的磁盘缓存"""
+
+    def __init__(self, path: str, ttl_seconds: int, breaker_threshold: int, breaker_cooldown: float):
+        """
+        Args:
+            path: SQLite 文件路径
+            ttl_seconds: 永久性失败（如 404）的基础有效期（秒），临时性失败使用其 1/24
+            breaker_threshold: 主机连续失败多少次后熔断，<= 0 表示不启用熔断
+            breaker_cooldown: 熔断的基础冷却时间（秒）
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._local = threading.local()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS failed_urls ("
+            " url TEXT PRIMARY KEY,"
+            " host TEXT NOT NULL,"
+            " status INTEGER,"
+            " reason TEXT NOT NULL,"
+            " failures INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " kind TEXT NOT NULL DEFAULT 'http')"
+        )
+        # 旧版本创建的表没有 kind 列
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(failed_urls)")}
+        if "kind" not in columns:
+            conn.execute("ALTER TABLE failed_urls ADD COLUMN kind TEXT NOT NULL DEFAULT 'http'")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS host_breakers ("
+            " host TEXT PRIMARY KEY,"
+            " failures INTEGER NOT NULL,"
+            " opened_until REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程持有独立的连接（sqlite3 连接不能跨线程共享）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _backoff(self, base: float, failures: int) -> float:
+        """按连续失败次数指数增长的时长"""
+        return base * min(2 ** max(failures - 1, 0), MAX_BACKOFF_FACTOR)
+
+    def check(self, url: str) -> Optional[str]:
+        """
+        检查链接是否应跳过
+
+        Returns:
+            跳过原因；可以下载时返回 None。熔断冷却期结束后，第一个调用者获得探测资格（返回 None），
+            其余调用者在探测结果出来之前继续被跳过。
+        """
+        url = url.strip()
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT status, reason, failures, expires_at FROM failed_urls WHERE url = ? AND expires_at > ?",
+                (url, now)
+            ).fetchone()
+            if row is not None:
+                status, reason, failures, expires_at = row
+                return (
+                    f"该链接近期已失败 {failures} 次（{reason}），"
+                    f"{int(expires_at - now)} 秒内不再重试"
+                )
+
+            host = url_host(url)
+            if self.breaker_threshold <= 0 or not host:
+                return None
+            row = conn.execute(
+                "SELECT failures, opened_until FROM host_breakers WHERE host = ?", (host,)
+            ).fetchone()
+            if row is None or row[0] < self.breaker_threshold:
+                return None
+            failures, opened_until = row
+            if opened_until > now:
+                return f"主机 {host} 连续失败 {failures} 次已熔断，{int(opened_until - now)} 秒后再试"
+
+            # 半开：抢占探测资格，探测期间其他请求仍被跳过
+            cooldown = self._backoff(self.breaker_cooldown, failures - self.breaker_threshold + 1)
+            claimed = conn.execute(
+                "UPDATE host_breakers SET opened_until = ? WHERE host = ? AND opened_until = ?",
+                (now + cooldown, host, opened_until)
+            ).rowcount
+            if not claimed:
+                return f"主机 {host} 已熔断，正在探测是否恢复"
+            print(f"  🔌 主机 {host} 熔断冷却结束，放行探测请求")
+            return None
+
+    def record_failure(
+        self, url: str, status: Optional[int] = None, reason: str = "", kind: Optional[str] = None
+    ) -> None:
+        """
+        记录一次下载失败（每次完整的下载尝试记录一次，而不是每次重试）
+
+        Args:
+            url: 下载链接
+            status: HTTP 状态码，网络错误等无状态码时为 None
+            reason: 失败原因
+            kind: 失败类型，默认按是否有状态码取 FAILURE_HTTP / FAILURE_NETWORK
+        """
+        url = url.strip()
+        host = url_host(url)
+        now = time.time()
+        kind = kind or (FAILURE_HTTP if status is not None else FAILURE_NETWORK)
+        permanent = status in PERMANENT_STATUSES or kind == FAILURE_NON_PDF
+        base_ttl = self.ttl_seconds if permanent else self.ttl_seconds / 24
+        reason = reason or (f"HTTP {status}" if status is not None else "网络错误")
+
+        conn = self._connect()
+        with conn:
+            row = conn.execute("SELECT failures FROM failed_urls WHERE url = ?", (url,)).fetchone()
+            failures = (row[0] if row else 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO failed_urls (url, host, status, reason, failures, expires_at, updated_at, kind)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, host, status, reason, failures, now + self._backoff(base_ttl, failures), now, kind)
+            )
+
+            if self.breaker_threshold <= 0 or not host or kind == FAILURE_NON_PDF:
+                return
+            row = conn.execute("SELECT failures FROM host_breakers WHERE host = ?", (host,)).fetchone()
+            host_failures = (row[0] if row else 0) + 1
+            opened_until = 0.0
+            if host_failures >= self.breaker_threshold:
+                opened_until = now + self._backoff(
+                    self.breaker_cooldown, host_failures - self.breaker_threshold + 1
+                )
+                print(f"  🔌 主机 {host} 连续失败 {host_failures} 次，熔断 {int(opened_until - now)} 秒")
+            conn.execute(
+                "INSERT OR REPLACE INTO host_breakers VALUES (?, ?, ?)", (host, host_failures, opened_until)
+            )
+
+    def record_success(self, url: str) -> None:
+        """记录一次下载成功：清除该链接的失败记录并重置主机熔断器"""
+        url = url.strip()
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM failed_urls WHERE url = ?", (url,))
+            conn.execute("DELETE FROM host_breakers WHERE host = ?", (url_host(url),))
+
+    def stats(self) -> Dict[str, Any]:
+        """返回当前生效的失败链接数（及按失败类型的明细）与熔断主机数"""
+        now = time.time()
+        conn = self._connect()
+        by_kind = dict(conn.execute(
+            "SELECT kind, COUNT(*) FROM failed_urls WHERE expires_at > ? GROUP BY kind", (now,)
+        ).fetchall())
+        blocked_urls = sum(by_kind.values())
+        open_hosts = conn.execute(
+            "SELECT COUNT(*) FROM host_breakers WHERE failures >= ? AND opened_until > ?",
+            (max(self.breaker_threshold, 1), now)
+        ).fetchone()[0]
+        return {"blocked_urls": blocked_urls, "blocked_by_kind": by_kind, "open_hosts": open_hosts}
+
+    def clear(self) -> None:
+        """清空所有失败记录"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM failed_urls")
+            conn.execute("DELETE FROM host_breakers")
+
+
+_negative_cache: Optional[NegativeCache] = None
+_negative_cache_lock = threading.Lock()
+
+
+def get_negative_cache() -> NegativeCache:
+    """获取进程内共享的负缓存实例"""
+    global _negative_cache
+    if _negative_cache is None:
+        with _negative_cache_lock:
+            if _negative_cache is None:
+                _negative_cache = NegativeCache(
+                    NEGATIVE_CACHE_PATH, NEGATIVE_CACHE_TTL, HOST_BREAKER_THRESHOLD, HOST_BREAKER_COOLDOWN
+                )
+    return _negative_cache
@@ -3,61 +3,161 @@
 """
 
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import pdfplumber
+import math
+import multiprocessing
+from typing import Dict, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from langchain_core.messages import HumanMessage
 
-from ..config import SAVE_DIR, llm, paper_analysis_prompt
+from ..config import (
+    SAVE_DIR, llm, paper_analysis_prompt, PDF_EXTRACT_WORKERS, PDF_EXTRACT_CHUNK_SIZE, PDF_EXTRACT_TIMEOUT
+)
 from ..models import PaperSummary
+from .paper_store import get_store_quota
+from .text_cache import get_text_cache, extract_pdf_chunk, timeout_enforceable
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    """
+    进程池的启动方式：优先 forkserver，不支持时使用 spawn
+
+    不使用 fork：调用方通常运行在已有下载线程、事件循环与 SQLite 连接的进程中，fork 会复制这些线程持有的锁
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
 
 
 class PaperService:
     """论文处理服务"""
     
-    def __init__(self):
-        """初始化论文服务"""
+    def __init__(self, extract_workers: Optional[int] = None):
+        """
+        初始化论文服务
+
+        Args:
+            extract_workers: 解析 PDF 的进程数，默认取 PDF_EXTRACT_WORKERS（0 表示 CPU 核数）
+        """
         self.llm = llm
+        workers = PDF_EXTRACT_WORKERS if extract_workers is None else extract_workers
+        self.extract_workers = max(1, workers or os.cpu_count() or 1)
 
     def extract_paper_content_from_save_dir(self) -> list[dict]:
-        """从保存目录中提取已下载的论文信息"""
-        papers_info = []
+        """
+        从保存目录中提取已下载的论文信息（按文件名排序，结果顺序与解析完成顺序无关）
 
+        PDF 的解析文本优先读取缓存，只解析新增或内容变化的文件；需要解析的文件交由进程池并行解析。
+        读取期间固定这些文件，不会被并发下载触发的容量淘汰删除；读取不更新其最近使用时间
+        （只有本次运行搜索命中或下载的论文才视为最近使用）
+        """
         if not SAVE_DIR or not os.path.exists(SAVE_DIR):
             print(f"⚠️ 保存目录 {SAVE_DIR} 不存在")
-            return papers_info
+            return []
 
         try:
-            for filename in os.listdir(SAVE_DIR):
-                if filename.lower().endswith('.pdf'):
-                    filepath = os.path.join(SAVE_DIR, filename)
-                    print(f"📄 读取PDF文件: {filename}")
-                    
-                    try:
-                        with pdfplumber.open(filepath) as pdf:
-                            text_content = ""
-                            for page in pdf.pages:
-                                page_text = page.extract_text()
-                                if page_text:
-                                    text_content += page_text + "\n"
-                            
-                            if text_content.strip():
-                                papers_info.append({
-                                    'filepath': filepath,
-                                    'filename': filename,
-                                    'content': text_content.strip()
-                                })
-                                print(f"  ✅ 成功读取，内容长度: {len(text_content)} 字符")
-                            else:
-                                print(f"  ⚠️ PDF文件 {filename} 内容为空")
-                                
-                    except Exception as e:
-                        print(f"  ❌ 读取PDF文件 {filename} 失败: {e}")
-                        
+            filenames = sorted(filename for filename in os.listdir(SAVE_DIR) if filename.lower().endswith(('.pdf', '.txt')))
         except Exception as e:
             print(f"❌ 遍历保存目录失败: {e}")
-        
+            return []
+
+        # 文件名即内容哈希（内容寻址存储）
+        with get_store_quota().pinned(os.path.splitext(filename)[0] for filename in filenames):
+            return self._read_papers(filenames)
+
+    def _read_papers(self, filenames: list[str]) -> list[dict]:
+        """读取保存目录中的指定文件，返回 {"filepath", "filename", "content"} 列表（跳过读取失败或内容为空的文件）"""
+        papers_info = []
+        text_cache = get_text_cache()
+        contents: Dict[str, str] = {}
+        pending_pdfs: list[tuple[str, str, str]] = []  # 需要解析的 (文件名, 路径, 内容哈希)
+
+        for filename in filenames:
+            filepath = os.path.join(SAVE_DIR, filename)
+            try:
+                if filename.lower().endswith('.pdf'):
+                    sha256, entry = text_cache.lookup(filepath)
+                    if entry is None:
+                        pending_pdfs.append((filename, filepath, sha256))
+                        continue
+                    print(f"⚡ 读取已缓存的PDF文本: {filename}")
+                    contents[filename] = entry["text"]
+                else:
+                    # 直接取自 CORE 搜索结果的全文，无需解析
+                    print(f"📝 读取全文文件: {filename}")
+                    with open(filepath, 'r', encoding='utf-8') as f:
+                        contents[filename] = f.read()
+            except Exception as e:
+                print(f"  ❌ 读取文件 {filename} 失败: {e}")
+
+        if pending_pdfs:
+            extracted = 0
+            for filename, text_content in self._extract_pdfs(pending_pdfs):
+                contents[filename] = text_content
+                extracted += 1
+            print(f"🗃️ 本次解析 {extracted}/{len(pending_pdfs)} 个PDF文件，结果已缓存，之后的运行直接读取")
+
+        for filename in filenames:
+            text_content = contents.get(filename)
+            if text_content is None:
+                continue
+            if text_content.strip():
+                papers_info.append({
+                    'filepath': os.path.join(SAVE_DIR, filename),
+                    'filename': filename,
+                    'content': text_content.strip()
+                })
+                print(f"  ✅ 成功读取 {filename}，内容长度: {len(text_content)} 字符")
+            else:
+                print(f"  ⚠️ 文件 {filename} 内容为空")
+
         return papers_info
 
+    def _extract_pdfs(self, pending_pdfs: list[tuple[str, str, str]]) -> Iterator[tuple[str, str]]:
+        """
+        解析 PDF 并写入解析文本缓存，按完成顺序逐个返回 (文件名, 文本)；解析失败或超时的文件跳过
+
+        文件数与进程数均大于 1 时，按块提交到进程池（每块 PDF_EXTRACT_CHUNK_SIZE 个文件，0 表示自动）；
+        否则在当前进程中逐个解析。当前线程无法限制解析时间（不在主线程，如在 agent 的工作线程中调用）且设置了
+        PDF_EXTRACT_TIMEOUT 时，即使只有一个进程也交由进程池解析，由工作进程执行超时
+        """
+        text_cache = get_text_cache()
+        workers = min(self.extract_workers, len(pending_pdfs))
+        completed = 0
+
+        def collect(chunk: list[tuple[str, str, str]], results: list) -> Iterator[tuple[str, str]]:
+            nonlocal completed
+            for (filename, _, sha256), (_, extracted, error) in zip(chunk, results):
+                completed += 1
+                if error is not None:
+                    print(f"  ❌ 解析PDF文件 {filename} 失败 ({completed}/{len(pending_pdfs)}): {error}")
+                    continue
+                text_cache.put(sha256, extracted["text"], extracted["page_offsets"])
+                print(f"📄 解析PDF文件完成 ({completed}/{len(pending_pdfs)}): {filename}")
+                yield filename, extracted["text"]
+
+        if workers <= 1 and (PDF_EXTRACT_TIMEOUT <= 0 or timeout_enforceable()):
+            for pdf in pending_pdfs:
+                yield from collect([pdf], extract_pdf_chunk([pdf[1]], PDF_EXTRACT_TIMEOUT))
+            return
+
+        # 自动分块：每个进程约分到 4 个任务，兼顾负载均衡与进程间通信开销
+        chunk_size = PDF_EXTRACT_CHUNK_SIZE or max(1, math.ceil(len(pending_pdfs) / (workers * 4)))
+        chunks = [pending_pdfs[i:i + chunk_size] for i in range(0, len(pending_pdfs), chunk_size)]
+        print(f"🧮 使用 {workers} 个进程解析 {len(pending_pdfs)} 个PDF文件（每个任务 {chunk_size} 个）")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_process_context()) as pool:
+            future_to_chunk = {
+                pool.submit(extract_pdf_chunk, [filepath for _, filepath, _ in chunk], PDF_EXTRACT_TIMEOUT): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(future_to_chunk):
+                chunk = future_to_chunk[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # 工作进程异常退出（如内存不足被终止），整块文件视为失败
+                    results = [(filepath, None, f"{type(e).__name__}: {e}") for _, filepath, _ in chunk]
+                yield from collect(chunk, results)
+
     def summarize_paper_content(self, paper_content: str, topic: str) -> PaperSummary:
         """使用LLM总结论文内容"""
         summarize_llm = self.llm.with_structured_output(PaperSummary)
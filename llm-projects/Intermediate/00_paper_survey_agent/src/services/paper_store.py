@@ -0,0 +1,665 @@
+"""
+本地论文存储
+
+SAVE_DIR 中既有下载的 PDF，也有直接取自 CORE 搜索结果 `fullText` 字段的全文。
+二者均按内容寻址保存（文件名为内容的 SHA-256），同一篇论文无论从哪个链接获取都只保存、解析与总结一次。
+清单文件（manifest.jsonl）按规范化链接、arXiv id 与 CORE id 索引已保存的论文，已下载过的论文无需再次获取；
+PDF 解析出的文本由解析文本缓存（text_cache.py）保存在 SAVE_DIR/.text/ 下，命中清单时直接返回。
+设置 SAVE_DIR_MAX_BYTES 后，超出容量时按最近使用时间（内容文件的修改时间，每次使用时更新）淘汰论文，
+同时删除其解析文本与清单记录；正在进行的运行开始之后用过的论文与固定的论文不会被淘汰。
+运行与固定以加锁的标记文件记录在 SAVE_DIR/.quota/ 下，共用同一 SAVE_DIR 的多个进程互相可见。
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from ..config import (
+    SAVE_DIR, CORE_FULLTEXT_MIN_CHARS, DOWNLOAD_MAX_MIRRORS, SAVE_DIR_MAX_BYTES, SAVE_DIR_LOW_WATERMARK
+)
+
+MANIFEST_FILENAME = "manifest.jsonl"
+TEXT_DIRNAME = ".text"
+PARTIAL_DIRNAME = ".partial"
+QUOTA_DIRNAME = ".quota"
+
+try:
+    import fcntl
+except ImportError:  # Windows：运行与固定只在当前进程内可见
+    fcntl = None
+
+# 不影响内容的跟踪参数
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+_ARXIV_ID_PATTERN = re.compile(
+    r"arxiv\.org/(?:abs|pdf)/((?:\d{4}\.\d{4,5})|(?:[a-z\-]+(?:\.[A-Z]{2})?/\d{7}))(?:v\d+)?(?:\.pdf)?",
+    re.IGNORECASE,
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化下载链接：忽略协议（http / https）、主机大小写、默认端口、片段、跟踪参数与末尾斜杠，
+    并将 arXiv 的 abs 页面视同 pdf 链接
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    if host.endswith("arxiv.org"):
+        path = path.replace("/abs/", "/pdf/").removesuffix(".pdf")
+    return urlunsplit(("", host, path, query, "")).lstrip("/")
+
+
+def arxiv_id(url: str) -> Optional[str]:
+    """从 arXiv 链接中提取不含版本号的论文 id"""
+    match = _ARXIV_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def pdf_url(url: str) -> str:
+    """将 arXiv 的 abs 页面链接改写为 PDF 链接，其他链接原样返回"""
+    return url.replace("arxiv.org/abs", "arxiv.org/pdf")
+
+
+def download_candidates(result: Dict[str, Any], max_mirrors: int = DOWNLOAD_MAX_MIRRORS) -> list[str]:
+    """
+    收集搜索结果中论文的全部下载链接：`downloadUrl` 在前，其后为 `sourceFulltextUrls` 中的备用链接
+    （arXiv 优先，其次是以 .pdf 结尾的链接），按规范化链接去重
+
+    Args:
+        result: CORE 搜索结果
+        max_mirrors: 最多保留的备用链接数
+
+    Returns:
+        候选下载链接（首个为主链接），没有任何链接时为空列表
+    """
+    primary = (result.get("downloadUrl") or "").strip()
+    sources = result.get("sourceFulltextUrls") or []
+    if isinstance(sources, str):
+        sources = [sources]
+    alternates = sorted(
+        (pdf_url(url.strip()) for url in sources if isinstance(url, str) and url.strip()),
+        key=lambda url: (arxiv_id(url) is None, not urlsplit(url).path.lower().endswith(".pdf")),
+    )
+    candidates: list[str] = []
+    seen = set()
+    for url in ([primary] if primary else []) + alternates:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(url)
+    return candidates[:1 + max(0, max_mirrors)]
+
+
+def usable_fulltext(result: Dict[str, Any]) -> Optional[str]:
+    """返回搜索结果中可直接使用的全文；缺失或过短（通常只是摘要或抽取失败）时返回 None"""
+    full_text = (result.get("fullText") or "").strip()
+    if len(full_text) < CORE_FULLTEXT_MIN_CHARS:
+        return None
+    return full_text
+
+
+def store_content(chunks: Iterable[bytes], suffix: str, save_dir: str = SAVE_DIR) -> tuple[str, int, str]:
+    """
+    将内容写入内容寻址存储：边写临时文件边计算 SHA-256，完成后原子重命名为 `<sha256><suffix>`；
+    相同内容已存在时丢弃新写入的临时文件
+
+    Args:
+        chunks: 内容分块（迭代过程中抛出的异常会向上传递，且不会留下不完整的文件）
+        suffix: 文件扩展名，如 ".pdf"
+        save_dir: 论文保存目录
+
+    Returns:
+        (保存路径, 字节数, SHA-256)
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=save_dir, prefix=".download-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        filepath = commit_content(tmp_path, digest.hexdigest(), suffix, save_dir)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return filepath, size, digest.hexdigest()
+
+
+def commit_content(tmp_path: str, sha256: str, suffix: str, save_dir: str = SAVE_DIR) -> str:
+    """
+    将已写完的临时文件原子移动到内容寻址路径 `<sha256><suffix>`；相同内容已存在时删除临时文件
+
+    Returns:
+        保存路径
+    """
+    filepath = os.path.join(save_dir, f"{sha256}{suffix}")
+    if os.path.exists(filepath):
+        os.unlink(tmp_path)
+        touch(filepath)
+        print(f"♻️ 内容已存在，复用: {filepath}")
+    else:
+        os.replace(tmp_path, filepath)
+        get_store_quota(save_dir).record_write(os.path.getsize(filepath), keep=filepath)
+    return filepath
+
+
+def touch(path: str) -> None:
+    """将文件的修改时间更新为当前时间，作为容量淘汰的最近使用时间"""
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def save_fulltext(result: Dict[str, Any], save_dir: str = SAVE_DIR) -> str:
+    """
+    将搜索结果中的全文写入本地论文存储，并在清单中登记其 CORE id 与下载链接；
+    清单中该链接或 CORE id 已对应相同内容时（如重复搜索或命中搜索缓存）不再写入文件与清单
+
+    Args:
+        result: 含 `id` 与 `fullText` 的 CORE 搜索结果
+        save_dir: 论文保存目录
+
+    Returns:
+        保存路径
+    """
+    content = f"{result.get('title') or ''}\n\n{result['fullText'].strip()}\n".encode("utf-8")
+    manifest = get_paper_manifest(save_dir)
+    record = manifest.lookup(result.get("downloadUrl"), result.get("id"))
+    if record is not None and record["sha256"] == hashlib.sha256(content).hexdigest():
+        return manifest.filepath(record)
+    filepath, size, sha256 = store_content([content], ".txt", save_dir)
+    manifest.add(sha256, os.path.basename(filepath), size, url=result.get("downloadUrl"), core_id=result.get("id"))
+    return filepath
+
+
+class PaperManifest:
+    """
+    论文清单：追加写入的 JSONL 文件 + 内存索引
+
+    每行一条记录 {"sha256", "filename", "size", "url", "core_id", "etag", "last_modified", "fetched_at"}；
+    同一内容可对应多条记录（不同链接或 CORE id）。
+    内存索引按规范化链接、arXiv id 与 CORE id 保存各自最新的记录，校验器（etag / last_modified）只属于记录的链接；
+    按内容哈希的索引只用于内容去重。
+    """
+
+    def __init__(self, save_dir: str):
+        """
+        Args:
+            save_dir: 论文保存目录，清单文件位于该目录下
+        """
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._by_hash: Dict[str, Dict[str, Any]] = {}
+        self._by_url: Dict[str, Dict[str, Any]] = {}
+        self._by_arxiv_id: Dict[str, Dict[str, Any]] = {}
+        self._by_core_id: Dict[str, Dict[str, Any]] = {}
+        # 清单文件以写了一半的行结尾（写入中途进程退出）时，下次追加前先补换行，避免新记录与残行连在一起
+        self._torn_tail = False
+        self._load()
+
+    def _load(self) -> None:
+        """从清单文件重建内存索引（忽略写了一半的行）"""
+        self._torn_tail = False
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._torn_tail = not line.endswith("\n")
+                try:
+                    self._index(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+
+    def _index(self, record: Dict[str, Any]) -> None:
+        self._by_hash[record["sha256"]] = record
+        if record.get("url"):
+            self._by_url[normalize_url(record["url"])] = record
+            paper_arxiv_id = arxiv_id(record["url"])
+            if paper_arxiv_id:
+                self._by_arxiv_id[paper_arxiv_id] = record
+        if record.get("core_id") is not None:
+            self._by_core_id[str(record["core_id"])] = record
+
+    def add(
+        self,
+        sha256: str,
+        filename: str,
+        size: int,
+        url: Optional[str] = None,
+        core_id: Any = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        登记一个已保存的内容及其来源（etag / last_modified 为该链接的服务器返回的校验器，用于之后的条件请求）；
+        未提供校验器且该链接已登记相同内容时，沿用其校验器（如镜像胜出后以主链接登记）
+        """
+        record = {
+            "sha256": sha256,
+            "filename": filename,
+            "size": size,
+            "url": url.strip() if url else None,
+            "core_id": str(core_id) if core_id is not None else None,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            previous = self._by_url.get(normalize_url(url)) if url else None
+            if etag is None and last_modified is None and previous is not None and previous["sha256"] == sha256:
+                record["etag"] = previous.get("etag")
+                record["last_modified"] = previous.get("last_modified")
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn_tail:
+                    line = "\n" + line
+                    self._torn_tail = False
+                f.write(line)
+            self._index(record)
+        return record
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """按内容哈希查询"""
+        with self._lock:
+            return self._by_hash.get(sha256)
+
+    def lookup_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """按下载链接查询（先按规范化链接，再按 arXiv id；后者返回的记录可能来自同一论文的其他链接）"""
+        with self._lock:
+            record = self._by_url.get(normalize_url(url))
+            if record is None:
+                paper_arxiv_id = arxiv_id(url)
+                record = self._by_arxiv_id.get(paper_arxiv_id) if paper_arxiv_id else None
+            return record
+
+    def lookup_core_id(self, core_id: Any) -> Optional[Dict[str, Any]]:
+        """按 CORE id 查询"""
+        with self._lock:
+            return self._by_core_id.get(str(core_id))
+
+    def filepath(self, record: Dict[str, Any]) -> str:
+        """记录对应的本地文件路径"""
+        return os.path.join(self.save_dir, record["filename"])
+
+    def lookup(self, url: Optional[str] = None, core_id: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        按链接或 CORE id 查询本地文件仍然存在的记录；
+        命中的是其他链接的记录（按 arXiv id 或 CORE id）时，返回不含校验器的副本，不向该链接发送其他链接的条件请求
+        """
+        candidates = [
+            self.lookup_url(url) if url else None,
+            self.lookup_core_id(core_id) if core_id is not None else None,
+        ]
+        for record in candidates:
+            if record is not None and os.path.exists(self.filepath(record)):
+                touch(self.filepath(record))
+                if not url or normalize_url(record.get("url") or "") != normalize_url(url):
+                    record = {**record, "etag": None, "last_modified": None}
+                return record
+        return None
+
+    def remove(self, sha256s: Iterable[str]) -> int:
+        """
+        删除指定内容的全部记录：重写清单文件（先写临时文件再原子替换）并重建内存索引
+
+        Returns:
+            删除的记录行数
+        """
+        sha256s = set(sha256s)
+        if not sha256s:
+            return 0
+        removed = 0
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            fd, tmp_path = tempfile.mkstemp(dir=self.save_dir, prefix=".manifest-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as out, open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        sha256 = json.loads(line)["sha256"]
+                    except (json.JSONDecodeError, KeyError):
+                        continue
+                    if sha256 in sha256s:
+                        removed += 1
+                    else:
+                        out.write(line)
+            os.replace(tmp_path, self.path)
+            self._by_hash.clear()
+            self._by_url.clear()
+            self._by_arxiv_id.clear()
+            self._by_core_id.clear()
+            self._load()
+        return removed
+
+
+_manifests: Dict[str, PaperManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_paper_manifest(save_dir: str = SAVE_DIR) -> PaperManifest:
+    """获取指定保存目录的共享清单"""
+    save_dir = os.path.abspath(save_dir)
+    with _manifests_lock:
+        manifest = _manifests.get(save_dir)
+        if manifest is None:
+            manifest = _manifests[save_dir] = PaperManifest(save_dir)
+        return manifest
+
+
+class PaperStoreQuota:
+    """
+    SAVE_DIR 容量管理：超出上限时按最近使用时间淘汰
+
+    淘汰单位：内容文件连同其解析文本（.text/<sha256>.*）、未完成的下载（.partial/ 下的 .part 与 .json）、
+    以及内容文件已不存在的解析文本。最近使用时间取各文件修改时间的最大值。
+    正在进行的运行（`active_run`）开始之后用过的条目与显式固定（`pin`）的内容不会被淘汰。
+
+    运行与固定同时写入 SAVE_DIR/.quota/ 下的标记文件并持有其文件锁（flock），任一进程淘汰时都会遵守；
+    进程退出后锁自动释放，遗留的标记在下次淘汰时删除。没有 fcntl 的平台（Windows）上只在当前进程内生效。
+    """
+
+    def __init__(self, save_dir: str, max_bytes: int, low_watermark: float = SAVE_DIR_LOW_WATERMARK):
+        """
+        Args:
+            save_dir: 论文保存目录
+            max_bytes: 容量上限（字节），<= 0 表示不限制
+            low_watermark: 触发淘汰后淘汰到上限的该比例为止
+        """
+        self.save_dir = os.path.abspath(save_dir)
+        self.max_bytes = max_bytes
+        self.low_watermark = min(max(low_watermark, 0.0), 1.0)
+        self._lock = threading.RLock()
+        self._usage: Optional[int] = None  # 估计值：首次需要时扫描目录，之后按写入累加，淘汰时重新扫描
+        self._runs: Dict[int, float] = {}
+        self._next_run_id = 0
+        self._pins: Dict[str, int] = {}
+        self._markers: Dict[tuple[str, Any], tuple[str, TextIO]] = {}  # ("run", 运行 id) / ("pin", 内容哈希) → 标记文件
+        self._stats = {"evictions": 0, "evicted_bytes": 0}
+        self._warned = False  # 已提示过无法淘汰到上限以下（直到下次成功淘汰前不再重复提示）
+
+    def _entries(self) -> list[Dict[str, Any]]:
+        """扫描目录，返回全部可淘汰的条目 {"paths", "size", "last_used", "sha256"}"""
+        def stat(path: str) -> Optional[os.stat_result]:
+            try:
+                return os.stat(path)
+            except OSError:
+                return None
+
+        entries: Dict[str, Dict[str, Any]] = {}
+
+        def add(key: str, path: str, sha256: Optional[str] = None) -> None:
+            st = stat(path)
+            if st is None:
+                return
+            entry = entries.setdefault(key, {"paths": [], "size": 0, "last_used": 0.0, "sha256": sha256})
+            entry["paths"].append(path)
+            entry["size"] += st.st_size
+            entry["last_used"] = max(entry["last_used"], st.st_mtime)
+
+        if not os.path.isdir(self.save_dir):
+            return []
+        for name in os.listdir(self.save_dir):
+            path = os.path.join(self.save_dir, name)
+            # 跳过清单、隐藏目录与写入中的临时文件
+            if name == MANIFEST_FILENAME or name.startswith(".") or not os.path.isfile(path):
+                continue
+            add(name, path, os.path.splitext(name)[0])
+        by_sha256 = {entry["sha256"]: key for key, entry in entries.items()}
+        text_dir = os.path.join(self.save_dir, TEXT_DIRNAME)
+        if os.path.isdir(text_dir):
+            for name in os.listdir(text_dir):
+                if name.startswith("."):
+                    continue
+                sha256 = name.split(".", 1)[0]
+                add(by_sha256.get(sha256, os.path.join(TEXT_DIRNAME, sha256)), os.path.join(text_dir, name), sha256)
+        partial_dir = os.path.join(self.save_dir, PARTIAL_DIRNAME)
+        if os.path.isdir(partial_dir):
+            for name in os.listdir(partial_dir):
+                # 锁文件为空文件，由持有锁的下载任务在结束时删除
+                if name.endswith(".lock"):
+                    continue
+                add(os.path.join(PARTIAL_DIRNAME, os.path.splitext(name)[0]), os.path.join(partial_dir, name))
+        return list(entries.values())
+
+    def usage(self) -> int:
+        """当前占用的字节数（重新扫描目录）"""
+        with self._lock:
+            self._usage = sum(entry["size"] for entry in self._entries())
+            return self._usage
+
+    def record_write(self, size: int, keep: Optional[str] = None) -> None:
+        """
+        登记新写入的字节数，累计超出上限时触发淘汰
+
+        Args:
+            size: 写入的字节数
+            keep: 刚写入的文件，本次淘汰中保留
+        """
+        if self.max_bytes <= 0:
+            return
+        with self._lock:
+            if self._usage is None:
+                self.usage()
+            else:
+                self._usage += size
+            if self._usage > self.max_bytes:
+                self.evict(keep=(keep,) if keep else ())
+
+    def evict(self, keep: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        按最近使用时间从旧到新淘汰，直到占用不超过上限的 low_watermark 比例
+
+        Args:
+            keep: 本次必须保留的文件路径
+
+        Returns:
+            {"evicted": 淘汰的条目数, "freed": 释放的字节数, "usage": 淘汰后的占用}
+        """
+        keep = {os.path.abspath(path) for path in keep}
+        with self._lock:
+            entries = self._entries()
+            usage = sum(entry["size"] for entry in entries)
+            target = int(self.max_bytes * self.low_watermark)
+            shared_runs, shared_pins = self._shared_protection()
+            run_starts = list(self._runs.values()) + shared_runs
+            protected_since = min(run_starts) if run_starts else None
+            pins = shared_pins.union(self._pins)
+            evicted_sha256s = []
+            evicted = freed = 0
+            for entry in sorted(entries, key=lambda entry: entry["last_used"]):
+                if usage - freed <= target:
+                    break
+                if protected_since is not None and entry["last_used"] >= protected_since:
+                    continue
+                if entry["sha256"] in pins or keep.intersection(entry["paths"]):
+                    continue
+                for path in entry["paths"]:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                freed += entry["size"]
+                evicted += 1
+                if entry["sha256"]:
+                    evicted_sha256s.append(entry["sha256"])
+            # 同步删除清单记录，之后按链接或 CORE id 查询时视为未下载
+            get_paper_manifest(self.save_dir).remove(evicted_sha256s)
+            self._stats["evictions"] += evicted
+            self._stats["evicted_bytes"] += freed
+            self._usage = usage - freed
+            warn = self._usage > self.max_bytes and not self._warned
+            self._warned = self._usage > self.max_bytes
+        if evicted:
+            print(f"🧹 论文存储超出容量上限，已淘汰 {evicted} 项最久未使用的内容，释放 {freed / 2**20:.1f} MB")
+        if warn:
+            print(f"⚠️ 论文存储占用 {self._usage / 2**20:.1f} MB 仍超出上限，其余内容均被正在进行的运行使用或已固定")
+        return {"evicted": evicted, "freed": freed, "usage": self._usage}
+
+    def begin_run(self) -> int:
+        """开始一次运行，返回运行 id；运行结束前，开始之后用过（修改时间不早于开始时间）的条目不会被淘汰"""
+        with self._lock:
+            self._next_run_id += 1
+            started = self._runs[self._next_run_id] = time.time()
+            self._add_marker(("run", self._next_run_id), repr(started))
+            return self._next_run_id
+
+    def end_run(self, run_id: int) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+            self._remove_marker(("run", run_id))
+
+    @contextmanager
+    def active_run(self) -> Iterator[int]:
+        """在 with 块内保持一次运行"""
+        run_id = self.begin_run()
+        try:
+            yield run_id
+        finally:
+            self.end_run(run_id)
+
+    def pin(self, sha256: str) -> None:
+        """固定一篇论文（可重复固定，需相同次数的 unpin 才解除）"""
+        with self._lock:
+            self._pins[sha256] = self._pins.get(sha256, 0) + 1
+            if self._pins[sha256] == 1:
+                self._add_marker(("pin", sha256), sha256)
+
+    def unpin(self, sha256: str) -> None:
+        with self._lock:
+            count = self._pins.get(sha256, 0) - 1
+            if count > 0:
+                self._pins[sha256] = count
+            else:
+                self._pins.pop(sha256, None)
+                self._remove_marker(("pin", sha256))
+
+    @contextmanager
+    def pinned(self, sha256s: Iterable[str]) -> Iterator[None]:
+        """在 with 块内固定多篇论文"""
+        sha256s = list(sha256s)
+        for sha256 in sha256s:
+            self.pin(sha256)
+        try:
+            yield
+        finally:
+            for sha256 in sha256s:
+                self.unpin(sha256)
+
+    def _add_marker(self, key: tuple[str, Any], content: str) -> None:
+        """创建加锁的标记文件（先在临时文件上加锁再改名，其他进程不会看到未加锁的标记）"""
+        if fcntl is None:
+            return
+        directory = os.path.join(self.save_dir, QUOTA_DIRNAME)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".marker-")
+        marker = os.fdopen(fd, "w", encoding="utf-8")
+        try:
+            fcntl.flock(marker, fcntl.LOCK_EX)
+            marker.write(content)
+            marker.flush()
+            path = os.path.join(directory, f"{key[0]}-{uuid.uuid4().hex}")
+            os.replace(tmp_path, path)
+        except BaseException:
+            marker.close()
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._markers[key] = (path, marker)
+
+    def _remove_marker(self, key: tuple[str, Any]) -> None:
+        """删除标记文件后再释放锁"""
+        path, marker = self._markers.pop(key, (None, None))
+        if marker is None:
+            return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        marker.close()
+
+    def _shared_protection(self) -> tuple[list[float], set[str]]:
+        """
+        读取所有进程（包括当前进程）仍然有效的标记，并删除已退出进程遗留的标记
+
+        Returns:
+            (各运行的开始时间, 固定的内容哈希)
+        """
+        directory = os.path.join(self.save_dir, QUOTA_DIRNAME)
+        run_starts: list[float] = []
+        pins: set[str] = set()
+        if fcntl is None or not os.path.isdir(directory):
+            return run_starts, pins
+        for name in os.listdir(directory):
+            if name.startswith("."):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                marker = open(path, "r", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with marker:
+                try:
+                    fcntl.flock(marker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # 持有者仍在运行
+                    content = marker.read().strip()
+                    if name.startswith("run-"):
+                        try:
+                            run_starts.append(float(content))
+                        except ValueError:
+                            pass
+                    elif name.startswith("pin-"):
+                        pins.add(content)
+                    continue
+                # 没有进程持有锁：持有者已退出，标记名称不会重复使用，可直接删除
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        return run_starts, pins
+
+    def stats(self) -> Dict[str, Any]:
+        """容量上限、估计占用、累计淘汰条目数与字节数、当前进程中进行中的运行数与固定的论文数"""
+        with self._lock:
+            return {
+                **self._stats,
+                "max_bytes": self.max_bytes,
+                "usage": self._usage,
+                "active_runs": len(self._runs),
+                "pinned": len(self._pins),
+            }
+
+
+_quotas: Dict[str, PaperStoreQuota] = {}
+_quotas_lock = threading.Lock()
+
+
+def get_store_quota(save_dir: str = SAVE_DIR) -> PaperStoreQuota:
+    """获取指定保存目录的共享容量管理器"""
+    save_dir = os.path.abspath(save_dir)
+    with _quotas_lock:
+        quota = _quotas.get(save_dir)
+        if quota is None:
+            quota = _quotas[save_dir] = PaperStoreQuota(save_dir, SAVE_DIR_MAX_BYTES)
+        return quota
@@ -0,0 +1,179 @@
+"""
+论文后台预取队列
+
+搜索只返回元数据，下载链接交由共享的下载调度器（按相关性排名排队）在后台下载与解析。
+后续阶段（`download-paper` 工具、综述生成节点）通过 Future 按需等待自己需要的论文。
+已结束的任务只保留最近 PREFETCH_MAX_FINISHED 个（结果中含论文全文），被丢弃的论文之后从论文清单读取。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Union
+from concurrent.futures import Future, wait as wait_futures
+
+from ..config import DOWNLOAD_MAX_RETRIES, ASYNC_DOWNLOAD_ENABLED, PREFETCH_MAX_FINISHED
+from .download_scheduler import DownloadScheduler, RetryLater, get_download_scheduler
+
+
+class PaperPrefetchQueue:
+    """后台论文预取队列"""
+
+    def __init__(self, scheduler: Optional[DownloadScheduler] = None, max_finished: int = PREFETCH_MAX_FINISHED):
+        """
+        Args:
+            scheduler: 执行下载的调度器，默认使用进程内共享的调度器
+            max_finished: 保留的已结束任务数，超出后丢弃最久未使用的（未结束的任务不受影响）
+        """
+        self._scheduler = scheduler or get_download_scheduler()
+        self.max_finished = max(0, max_finished)
+        # 按最近使用排序：最久未使用的在前
+        self._futures: "OrderedDict[str, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, core_id: Any = None, priority: float = 0.0, mirrors: Sequence[str] = ()) -> Future:
+        """
+        提交下载任务；同一链接已在队列中或已成功下载时直接返回已有的 Future
+
+        Args:
+            url: 下载链接
+            core_id: 论文的 CORE id（登记到论文清单）
+            priority: 调度优先级（相关性排名），数值越小越先下载
+            mirrors: 备用下载链接，主链接慢或失败时对冲请求
+
+        Returns:
+            结果为 `fetch_paper` 返回值（保存路径与论文内容）的 Future
+        """
+        url = url.strip()
+        with self._lock:
+            future = self._futures.get(url)
+            if future is not None and not self._failed(future):
+                self._futures.move_to_end(url)
+                return future
+            if ASYNC_DOWNLOAD_ENABLED:
+                # 异步引擎按提交顺序放行，链接已按相关性排序
+                from .async_downloader import get_async_download_engine
+                future = get_async_download_engine().submit(url, core_id, mirrors)
+            else:
+                future = self._scheduler.submit(
+                    url, self._download, url, core_id, tuple(mirrors), priority=priority, max_retries=DOWNLOAD_MAX_RETRIES
+                )
+            self._track(url, future)
+        return future
+
+    def _track(self, url: str, future: Future) -> None:
+        """登记任务，并丢弃超出 max_finished 的最久未使用的已结束任务（调用方持有锁）"""
+        self._futures[url] = future
+        self._futures.move_to_end(url)
+        finished = [key for key, tracked in self._futures.items() if tracked.done()]
+        for key in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._futures[key]
+
+    def submit_many(
+        self,
+        urls: Iterable[str],
+        core_ids: Optional[Mapping[str, Any]] = None,
+        mirrors: Optional[Mapping[str, Sequence[str]]] = None,
+    ) -> list[Future]:
+        """
+        批量提交下载任务；链接按相关性排序，排名即优先级
+
+        Args:
+            urls: 下载链接
+            core_ids: 下载链接 → CORE id
+            mirrors: 下载链接 → 备用下载链接
+        """
+        core_ids = core_ids or {}
+        mirrors = mirrors or {}
+        return [
+            self.submit(url, core_ids.get(url), priority=rank, mirrors=mirrors.get(url, ()))
+            for rank, url in enumerate(urls)
+        ]
+
+    @staticmethod
+    def _download(url: str, core_id: Any = None, mirrors: Sequence[str] = (), final_attempt: bool = True) -> str:
+        """后台线程中执行的下载任务（临时失败时抛出 RetryLater，由调度器延迟重试）"""
+        from ..tools.download_tools import fetch_paper
+        try:
+            result = fetch_paper(url, core_id, final_attempt=final_attempt, mirrors=mirrors)
+            print(f"  ✅ 后台下载完成: {os.path.basename(url)}")
+            return result
+        except RetryLater:
+            raise
+        except Exception as e:
+            print(f"  ❌ 后台下载失败: {url}: {e}")
+            raise
+
+    def get(self, url: str) -> Optional[Future]:
+        """获取指定链接的 Future，未提交过时返回 None"""
+        with self._lock:
+            return self._futures.get(url.strip())
+
+    def status(self, url: Optional[str] = None) -> Union[Dict[str, int], str]:
+        """
+        查询下载状态
+
+        Args:
+            url: 指定链接时返回该链接的状态（pending / running / done / failed / unknown），
+                 否则返回各状态的数量统计
+        """
+        if url is not None:
+            future = self.get(url)
+            return self._future_status(future) if future is not None else "unknown"
+
+        with self._lock:
+            futures = list(self._futures.values())
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for future in futures:
+            counts[self._future_status(future)] += 1
+        return counts
+
+    @staticmethod
+    def _failed(future: Future) -> bool:
+        """任务是否已结束且失败（含被取消）"""
+        return future.done() and (future.cancelled() or future.exception() is not None)
+
+    @classmethod
+    def _future_status(cls, future: Future) -> str:
+        """将 Future 状态映射为队列状态"""
+        if not future.done():
+            return "running" if future.running() else "pending"
+        return "failed" if cls._failed(future) else "done"
+
+    def wait(self, urls: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> Dict[str, int]:
+        """
+        等待下载完成
+
+        Args:
+            urls: 仅等待这些链接，None 表示等待所有已提交的任务
+            timeout: 最长等待时间（秒），None 表示一直等待
+
+        Returns:
+            等待结束时的状态统计
+        """
+        with self._lock:
+            if urls is None:
+                futures = list(self._futures.values())
+            else:
+                futures = [self._futures[url.strip()] for url in urls if url.strip() in self._futures]
+        if futures:
+            wait_futures(futures, timeout=timeout)
+        return self.status()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭队列；wait=False 时取消尚未开始的任务"""
+        self._scheduler.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_prefetch_queue: Optional[PaperPrefetchQueue] = None
+_prefetch_queue_lock = threading.Lock()
+
+
+def get_prefetch_queue() -> PaperPrefetchQueue:
+    """获取进程内共享的预取队列"""
+    global _prefetch_queue
+    if _prefetch_queue is None:
+        with _prefetch_queue_lock:
+            if _prefetch_queue is None:
+                _prefetch_queue = PaperPrefetchQueue()
+    return _prefetch_queue
@@ -0,0 +1,100 @@
+"""
+多查询结果去重与排序融合
+
+同一篇论文可能以不同的 CORE id 出现在多个子查询的结果中（不同仓储收录的副本），
+因此按 CORE id、DOI、规范化标题三种键进行合并，再用倒数排序融合（RRF）合并各查询的排名。
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """规范化标题：Unicode 归一、小写、去除标点与多余空白"""
+    if not title:
+        return ""
+    title = unicodedata.normalize("NFKC", title).casefold()
+    title = re.sub(r"[^\w\s]", " ", title)
+    return " ".join(title.split())
+
+
+def paper_keys(result: Dict[str, Any]) -> list[str]:
+    """生成用于去重的论文标识键"""
+    keys = []
+    if result.get("id"):
+        keys.append(f"core:{result['id']}")
+    doi = (result.get("doi") or "").strip().lower()
+    if doi:
+        keys.append(f"doi:{doi.removeprefix('https://doi.org/')}")
+    title = normalize_title(result.get("title"))
+    if title:
+        keys.append(f"title:{title}")
+    return keys
+
+
+def reciprocal_rank_fusion(result_lists: list[list[Dict[str, Any]]], k: int = 60) -> list[tuple[Dict[str, Any], float]]:
+    """
+    去重并以倒数排序融合（RRF）合并多个排名列表
+
+    每篇论文的得分为 sum(1 / (k + rank))，rank 从 1 开始；同一查询内重复出现的论文只计首次（最高）排名。
+
+    Args:
+        result_lists: 各子查询按相关性排序的结果列表
+        k: RRF 平滑常数，越大越削弱头部排名的优势
+
+    Returns:
+        按融合得分降序排列的 (论文, 得分) 列表；合并的副本会补全代表条目缺失的字段（如下载链接）
+    """
+    parent: list[int] = []
+    papers: list[Dict[str, Any]] = []
+    scores: list[float] = []
+    key_to_cluster: Dict[str, int] = {}
+
+    def find(cluster: int) -> int:
+        while parent[cluster] != cluster:
+            parent[cluster] = parent[parent[cluster]]
+            cluster = parent[cluster]
+        return cluster
+
+    def union(a: int, b: int) -> int:
+        a, b = find(a), find(b)
+        if a == b:
+            return a
+        # 保留较早出现的条目作为代表
+        keep, drop = min(a, b), max(a, b)
+        parent[drop] = keep
+        scores[keep] += scores[drop]
+        for field, value in papers[drop].items():
+            if value and not papers[keep].get(field):
+                papers[keep][field] = value
+        return keep
+
+    for results in result_lists:
+        scored_in_list: set[int] = set()
+        for rank, result in enumerate(results, start=1):
+            keys = paper_keys(result)
+            clusters = {find(key_to_cluster[key]) for key in keys if key in key_to_cluster}
+            if clusters:
+                cluster = min(clusters)
+                for other in clusters:
+                    cluster = union(cluster, other)
+                for field, value in result.items():
+                    if value and not papers[cluster].get(field):
+                        papers[cluster][field] = value
+            else:
+                cluster = len(papers)
+                parent.append(cluster)
+                papers.append(dict(result))
+                scores.append(0.0)
+            for key in keys:
+                key_to_cluster[key] = cluster
+
+            # 合并可能改变代表条目，比较前先映射到当前的根
+            scored_in_list = {find(c) for c in scored_in_list}
+            if cluster not in scored_in_list:
+                scores[cluster] += 1.0 / (k + rank)
+                scored_in_list.add(cluster)
+
+    roots = sorted({find(cluster) for cluster in range(len(papers))}, key=lambda c: (-scores[c], c))
+    return [(papers[cluster], scores[cluster]) for cluster in roots]
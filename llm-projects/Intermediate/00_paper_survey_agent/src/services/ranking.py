@@ -0,0 +1,156 @@
+"""
+搜索结果本地重排序
+
+下载前用 BM25 对标题与摘要打分，只下载排名靠前且超过阈值的论文，
+避免把带宽和 PDF 解析时间花在不相关的结果上。
+
+IDF 表可以预先计算（`build_idf_table` + `save_idf_table`，例如基于历史搜索结果），
+通过 IDF_TABLE_PATH 加载；未配置时使用当前候选集合计算。
+"""
+
+import re
+import json
+import math
+from typing import Any, Dict, Iterable, Optional
+
+from ..config import IDF_TABLE_PATH
+
+# 常见英文停用词（CORE 查询要求使用英文）
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were with "
+    "we our using based via into over under than these those which while not".split()
+)
+
+# IDF 表中用于未登录词的键
+DEFAULT_IDF_KEY = "__default__"
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """小写分词并去除停用词与单字符词"""
+    if not text:
+        return []
+    return [token for token in re.findall(r"\w+", text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def query_topic(query: str) -> str:
+    """从 CORE 查询语句中提取主题词：去掉字段限定（如 `title:`、`yearPublished>`）与引号"""
+    return re.sub(r"\b\w+\s*(?::|>=|<=|>|<)", " ", query).replace('"', " ")
+
+
+def document_text(result: Dict[str, Any]) -> str:
+    """参与打分的文本：标题重复一次以提高其权重"""
+    title = result.get("title") or ""
+    return f"{title} {title} {result.get('abstract') or ''}"
+
+
+def build_idf_table(documents: Iterable[str]) -> Dict[str, float]:
+    """
+    由语料计算 IDF 表（BM25 的平滑 IDF：ln(1 + (N - df + 0.5) / (df + 0.5))）
+
+    Returns:
+        词 → IDF；`__default__` 为未登录词使用的 IDF（按 df=1 计算）
+    """
+    document_frequency: Dict[str, int] = {}
+    total = 0
+    for document in documents:
+        total += 1
+        for token in set(tokenize(document)):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+
+    table = {
+        token: math.log(1 + (total - df + 0.5) / (df + 0.5))
+        for token, df in document_frequency.items()
+    }
+    table[DEFAULT_IDF_KEY] = math.log(1 + (total - 1 + 0.5) / 1.5)
+    return table
+
+
+def save_idf_table(table: Dict[str, float], path: str) -> None:
+    """保存 IDF 表为 JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False)
+
+
+class BM25Ranker:
+    """基于 BM25 的搜索结果重排序器"""
+
+    def __init__(self, idf_table: Optional[Dict[str, float]] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            idf_table: 预计算的 IDF 表；为 None 时按每批候选结果现算
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.idf_table = idf_table
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "BM25Ranker":
+        """从 JSON 文件加载预计算的 IDF 表"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def score(self, topic: str, documents: list[str]) -> list[float]:
+        """计算每篇文档相对主题的 BM25 得分"""
+        query_terms = set(tokenize(topic))
+        tokenized = [tokenize(document) for document in documents]
+        if not query_terms or not tokenized:
+            return [0.0] * len(documents)
+
+        idf_table = self.idf_table if self.idf_table is not None else build_idf_table(documents)
+        default_idf = idf_table.get(DEFAULT_IDF_KEY, 0.0)
+        average_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+
+        scores = []
+        for tokens in tokenized:
+            term_frequency: Dict[str, int] = {}
+            for token in tokens:
+                if token in query_terms:
+                    term_frequency[token] = term_frequency.get(token, 0) + 1
+            length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / average_length)
+            scores.append(sum((
+                idf_table.get(term, default_idf) * tf * (self.k1 + 1) / (tf + length_norm)
+                for term, tf in term_frequency.items()
+            ), 0.0))
+        return scores
+
+    def rank(self, topic: str, results: list[Dict[str, Any]]) -> list[tuple[Dict[str, Any], float]]:
+        """按得分降序返回 (结果, 得分)，同分时保持 CORE 的原始顺序"""
+        scores = self.score(topic, [document_text(result) for result in results])
+        order = sorted(range(len(results)), key=lambda i: (-scores[i], i))
+        return [(results[i], scores[i]) for i in order]
+
+
+def select_for_download(
+    ranker: BM25Ranker, topic: str, results: list[Dict[str, Any]], top_k: int, min_score: float
+) -> list[Dict[str, Any]]:
+    """
+    按主题重排序并筛选需要下载的搜索结果
+
+    Args:
+        ranker: 重排序器
+        topic: 主题（通常为搜索查询）
+        results: CORE 搜索结果
+        top_k: 最多保留的数量，0 表示不限
+        min_score: 得分不低于该阈值才保留，<= 0 表示只重排序、不按得分筛选
+
+    Returns:
+        按得分降序排列的待下载结果
+    """
+    ranked = ranker.rank(query_topic(topic), results)
+    selected = [result for result, score in ranked if score >= min_score]
+    if len(selected) < len(ranked):
+        print(f"🔻 {len(ranked) - len(selected)} 篇结果的重排序得分低于阈值 {min_score:g}，不下载")
+    return selected[:top_k] if top_k > 0 else selected
+
+
+_ranker: Optional[BM25Ranker] = None
+
+
+def get_ranker() -> BM25Ranker:
+    """获取共享的重排序器（配置了 IDF_TABLE_PATH 时加载预计算的 IDF 表）"""
+    global _ranker
+    if _ranker is None:
+        _ranker = BM25Ranker.from_file(IDF_TABLE_PATH) if IDF_TABLE_PATH else BM25Ranker()
+    return _ranker
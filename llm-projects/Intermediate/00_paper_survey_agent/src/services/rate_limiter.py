@@ -0,0 +1,178 @@
+"""
+CORE API 令牌桶限流器
+
+所有 CORE 请求（同步、异步、分页预取线程）在发出前都需从同一个令牌桶取得令牌。
+收到 429 时按 Retry-After 暂停整个令牌桶，而不是各线程各自盲目退避。
+配置状态文件后，同一台机器上的多个进程通过 SQLite 共享同一份请求预算。
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from ..config import CORE_RATE_LIMIT, CORE_RATE_BURST, CORE_RATE_LIMIT_STATE
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucketRateLimiter:
+    """令牌桶限流器（可选跨进程共享）"""
+
+    def __init__(self, rate: float, burst: int, state_path: Optional[str] = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即平均每秒请求数），<= 0 表示不限流
+            burst: 令牌桶容量（允许的突发请求数）
+            state_path: SQLite 状态文件路径；为空时仅在当前进程内限流
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated_at = time.time()
+        self._blocked_until = 0.0
+        self._local = threading.local()
+
+        if state_path:
+            state_dir = os.path.dirname(state_path)
+            if state_dir:
+                os.makedirs(state_dir, exist_ok=True)
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limit ("
+                    " name TEXT PRIMARY KEY, tokens REAL NOT NULL,"
+                    " updated_at REAL NOT NULL, blocked_until REAL NOT NULL)"
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO rate_limit VALUES ('core', ?, ?, 0)",
+                    (float(self.burst), time.time())
+                )
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程持有独立的连接；isolation_level=None 以便手动 BEGIN IMMEDIATE"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.state_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _take(self, tokens: float, updated_at: float, blocked_until: float, now: float) -> tuple[float, float, float]:
+        """
+        尝试取出一个令牌
+
+        Returns:
+            (需要等待的秒数, 新的令牌数, 新的更新时间)；等待秒数为 0 表示已取得令牌
+        """
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+        if blocked_until > now:
+            return blocked_until - now, tokens, now
+        if tokens >= 1:
+            return 0.0, tokens - 1, now
+        return (1 - tokens) / self.rate, tokens, now
+
+    def _try_acquire(self) -> float:
+        """尝试取得令牌，返回需要等待的秒数（0 表示成功）"""
+        now = time.time()
+        if not self.state_path:
+            with self._lock:
+                delay, self._tokens, self._updated_at = self._take(self._tokens, self._updated_at, self._blocked_until, now)
+            return delay
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated_at, blocked_until = conn.execute(
+                "SELECT tokens, updated_at, blocked_until FROM rate_limit WHERE name = 'core'"
+            ).fetchone()
+            delay, tokens, updated_at = self._take(tokens, updated_at, blocked_until, now)
+            conn.execute("UPDATE rate_limit SET tokens = ?, updated_at = ? WHERE name = 'core'", (tokens, updated_at))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return delay
+
+    def acquire(self) -> float:
+        """阻塞直到取得令牌，返回总等待时间（秒）"""
+        waited = 0.0
+        while self.enabled:
+            delay = self._try_acquire()
+            if delay <= 0:
+                break
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    async def aacquire(self) -> float:
+        """异步等待令牌，等待期间不阻塞事件循环（跨进程共享时 SQLite 事务可能等待其他进程的锁，在线程中执行）"""
+        waited = 0.0
+        while self.enabled:
+            delay = await asyncio.to_thread(self._try_acquire) if self.state_path else self._try_acquire()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+            waited += delay
+        return waited
+
+    def penalize(self, retry_after: float) -> None:
+        """服务端限流（429）时暂停整个令牌桶 retry_after 秒，所有线程与进程共同遵守"""
+        blocked_until = time.time() + retry_after
+        if not self.state_path:
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, blocked_until)
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE rate_limit SET blocked_until = MAX(blocked_until, ?) WHERE name = 'core'", (blocked_until,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def apenalize(self, retry_after: float) -> None:
+        """`penalize` 的异步版本（跨进程共享时 SQLite 事务可能等待其他进程的锁，在线程中执行）"""
+        if self.state_path:
+            await asyncio.to_thread(self.penalize, retry_after)
+        else:
+            self.penalize(retry_after)
+
+
+_core_rate_limiter: Optional[TokenBucketRateLimiter] = None
+_core_rate_limiter_lock = threading.Lock()
+
+
+def get_core_rate_limiter() -> TokenBucketRateLimiter:
+    """获取进程内共享的 CORE API 限流器"""
+    global _core_rate_limiter
+    if _core_rate_limiter is None:
+        with _core_rate_limiter_lock:
+            if _core_rate_limiter is None:
+                _core_rate_limiter = TokenBucketRateLimiter(CORE_RATE_LIMIT, CORE_RATE_BURST, CORE_RATE_LIMIT_STATE or None)
+    return _core_rate_limiter
@@ -0,0 +1,159 @@
+"""
+搜索结果格式化
+
+search-papers 的返回值会作为 ToolMessage 在之后每一轮 agent / judge 调用中重复发送给 LLM，
+因此按 token 预算输出紧凑摘要：截断摘要、限制作者数量，仍超出预算时省略排名靠后的结果；
+每条结果始终保留下载链接，agent 可直接据此选择要下载的论文。
+完整元数据保存在进程内的元数据存储中，可通过 get-paper-details 工具按 ID 查询。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from ..config import SEARCH_RESULT_TOKEN_BUDGET, SEARCH_ABSTRACT_MAX_CHARS, SEARCH_MAX_AUTHORS
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数
+
+    中日韩字符约 1 字符 / token，其余文本约 4 字符 / token，
+    足以用于预算控制，且无需在运行时下载分词器词表。
+    """
+    cjk_chars = sum(1 for char in text if "⺀" <= char <= "鿿" or "가" <= char <= "힯")
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """按字符数截断，尽量在单词边界处断开"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if " " in cut[max_chars // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut + "…"
+
+
+def _format_authors(authors: list[Dict[str, Any]], max_authors: int) -> str:
+    """格式化作者列表，超出上限时以“等 N 人”结尾"""
+    names = [author.get("name", "") for author in authors if author.get("name")]
+    if len(names) <= max_authors:
+        return "; ".join(names)
+    return f"{'; '.join(names[:max_authors])} 等 {len(names)} 人"
+
+
+def _format_entry(index: int, result: Dict[str, Any], abstract_chars: int, max_authors: int, id_only: bool) -> str:
+    """格式化单条结果"""
+    year = result.get("yearPublished") or (result.get("publishedDate") or "")[:4]
+    lines = [f"[{index}] ID: {result.get('id', '')} | {year} | {result.get('title') or ''}"]
+    if not id_only:
+        authors = _format_authors(result.get("authors") or [], max_authors)
+        if authors:
+            lines.append(f"    作者: {authors}")
+        abstract = result.get("abstract") or ""
+        if abstract and abstract_chars > 0:
+            lines.append(f"    摘要: {_truncate(abstract, abstract_chars)}")
+    link = result.get("downloadUrl") or next(iter(result.get("sourceFulltextUrls") or []), "")
+    if link:
+        lines.append(f"    链接: {link}")
+    return "\n".join(lines)
+
+
+def format_search_results(
+    results: list[Dict[str, Any]],
+    token_budget: int = SEARCH_RESULT_TOKEN_BUDGET,
+    max_abstract_chars: int = SEARCH_ABSTRACT_MAX_CHARS,
+    max_authors: int = SEARCH_MAX_AUTHORS,
+    id_only: bool = False,
+) -> str:
+    """
+    在 token 预算内格式化搜索结果
+
+    超出预算时依次：逐步缩短摘要 → 去掉摘要 → 省略排名靠后的结果；作者与下载链接始终保留
+
+    Args:
+        results: CORE 搜索结果
+        token_budget: 输出的 token 预算（估算值）
+        max_abstract_chars: 每篇摘要的最大字符数
+        max_authors: 每篇最多列出的作者数
+        id_only: 仅输出 ID、年份、标题与下载链接（由调用方显式指定，不会因超出预算而自动启用）
+
+    Returns:
+        格式化后的结果文本
+    """
+    if not results:
+        return "未找到相关结果"
+
+    footer = "\n（以上为精简信息，可使用 get-paper-details 工具按 ID 查询完整元数据）"
+    budget = token_budget - estimate_tokens(footer)
+
+    abstract_levels = [0] if id_only else [max_abstract_chars, max_abstract_chars // 2, max_abstract_chars // 4, 0]
+    for abstract_chars in abstract_levels[:-1]:
+        entries = [_format_entry(i, result, abstract_chars, max_authors, id_only) for i, result in enumerate(results, 1)]
+        text = "\n".join(entries)
+        if estimate_tokens(text) <= budget:
+            return text + footer
+
+    # 不含摘要，仍超出预算时截掉排名靠后的结果（保留的结果仍带作者与链接）
+    entries = []
+    used = 0
+    for i, result in enumerate(results, 1):
+        entry = _format_entry(i, result, 0, max_authors, id_only)
+        cost = estimate_tokens(entry) + 1
+        if used + cost > budget and entries:
+            entries.append(f"…… 另有 {len(results) - i + 1} 篇结果因长度限制已省略")
+            break
+        entries.append(entry)
+        used += cost
+    return "\n".join(entries) + footer
+
+
+class PaperMetadataStore:
+    """按 CORE ID 保存完整搜索结果元数据的进程内存储（LRU，有容量上限）"""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._papers: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_many(self, results: Iterable[Dict[str, Any]]) -> None:
+        """保存搜索结果（不保存体积较大的 fullText 字段）"""
+        with self._lock:
+            for result in results:
+                if result.get("id") is None:
+                    continue
+                key = str(result["id"])
+                self._papers[key] = {field: value for field, value in result.items() if field != "fullText"}
+                self._papers.move_to_end(key)
+            while len(self._papers) > self.max_entries:
+                self._papers.popitem(last=False)
+
+    def get(self, paper_id: Any) -> Optional[Dict[str, Any]]:
+        """按 ID 查询元数据"""
+        with self._lock:
+            return self._papers.get(str(paper_id).strip())
+
+
+_metadata_store = PaperMetadataStore()
+
+
+def get_metadata_store() -> PaperMetadataStore:
+    """获取进程内共享的论文元数据存储"""
+    return _metadata_store
+
+
+def format_paper_details(result: Dict[str, Any]) -> str:
+    """格式化单篇论文的完整元数据"""
+    published_date_str = result.get('publishedDate') or result.get('yearPublished', '')
+    authors_str = ' and '.join([item['name'] for item in result.get('authors', []) if item.get('name')])
+    return (
+        f"* ID: {result.get('id', '')}\n"
+        f"* 标题: {result.get('title', '')}\n"
+        f"* 发表日期: {published_date_str}\n"
+        f"* 作者: {authors_str}\n"
+        f"* DOI: {result.get('doi') or ''}\n"
+        f"* 摘要: {result.get('abstract', '')}\n"
+        f"* 论文下载链接: {result.get('downloadUrl') or result.get('sourceFulltextUrls', '')}"
+    )
@@ -0,0 +1,160 @@
+"""
+CORE 搜索响应缓存
+
+基于 SQLite 的磁盘缓存，同一台机器上的多个进程可共享同一个缓存文件。
+缓存键为 CORE API 地址与规范化后的 (query, limit, offset)，支持 TTL 过期与按容量的 LRU 淘汰；
+指向本地桩服务（CORE_API_BASE_URL）时的合成或回放结果与真实 API 的结果互不混用。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Dict, Optional
+
+from ..config import SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_BYTES, CORE_API_BASE_URL
+
+
+class SearchCache:
+    """CORE 搜索响应的磁盘缓存"""
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        """
+        Args:
+            path: SQLite 缓存文件路径
+            ttl_seconds: 缓存条目有效期（秒）
+            max_bytes: 缓存内容总大小上限（字节），超出后按最近访问时间淘汰
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache(last_access)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO cache_stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程持有独立的连接（sqlite3 连接不能跨线程共享）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(query: str, limit: int, offset: int, base_url: str = CORE_API_BASE_URL) -> str:
+        """
+        生成缓存键
+
+        查询仅做 Unicode 与空白规范化，不改变大小写：CORE 查询语法中的 AND / OR 等操作符区分大小写。
+        base_url 为响应来源的 API 地址，不同地址（如本地桩服务）的结果使用不同的键。
+        """
+        normalized_query = " ".join(unicodedata.normalize("NFKC", query).split())
+        raw_key = json.dumps([base_url.rstrip("/"), normalized_query, int(limit), int(offset)], ensure_ascii=False)
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，未命中或已过期时返回 None"""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT value FROM search_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("UPDATE cache_stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+            conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.execute("UPDATE cache_stats SET value = value + 1 WHERE name = 'hits'")
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """写入缓存，并在超出容量时淘汰最久未访问的条目"""
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now + self.ttl_seconds, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """删除过期条目，并按 LRU 顺序淘汰直至总大小不超过上限"""
+        evicted = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,)).rowcount
+        total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM search_cache").fetchone()[0]
+        if total_size > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM search_cache ORDER BY last_access ASC").fetchall()
+            stale_keys = []
+            for key, size in rows:
+                if total_size <= self.max_bytes:
+                    break
+                stale_keys.append((key,))
+                total_size -= size
+            conn.executemany("DELETE FROM search_cache WHERE key = ?", stale_keys)
+            evicted += len(stale_keys)
+        if evicted:
+            conn.execute("UPDATE cache_stats SET value = value + ? WHERE name = 'evictions'", (evicted,))
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计信息（命中/未命中计数为所有进程累计值）"""
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        entries, total_size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+        ).fetchone()
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total_size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        """清空缓存条目与统计计数"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM search_cache")
+            conn.execute("UPDATE cache_stats SET value = 0")
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """获取进程内共享的搜索缓存实例"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchCache(SEARCH_CACHE_PATH, SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_BYTES)
+    return _search_cache
@@ -0,0 +1,208 @@
+"""
+PDF 解析文本缓存
+
+解析结果按 (内容 SHA-256, 解析器名称, 解析器版本) 保存在 SAVE_DIR/.text/<sha256>.<解析器>-<版本>.json，
+包含全文与每页在全文中的起始偏移。同一内容无论文件名或来源链接如何只解析一次；
+升级 pdfplumber 或修改解析逻辑（提升 EXTRACTOR_REVISION）后，旧版本的结果不再命中，按需重新解析。
+"""
+
+import os
+import re
+import json
+import signal
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Sequence
+import pdfplumber
+
+from ..config import SAVE_DIR
+from .paper_store import TEXT_DIRNAME, get_store_quota
+
+EXTRACTOR_NAME = "pdfplumber"
+# 修改解析逻辑或输出格式时提升，使已缓存的旧结果失效
+EXTRACTOR_REVISION = 1
+EXTRACTOR_VERSION = f"{pdfplumber.__version__}-r{EXTRACTOR_REVISION}"
+
+_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def extract_pdf(filepath: str) -> Dict[str, Any]:
+    """
+    用 pdfplumber 逐页提取 PDF 文本（每页文本后接一个换行，无文本的页为空行）
+
+    Returns:
+        {"text": 全文, "page_offsets": 每页在全文中的起始偏移}
+    """
+    text = ""
+    page_offsets = []
+    with pdfplumber.open(filepath) as pdf:
+        for page in pdf.pages:
+            page_offsets.append(len(text))
+            text += (page.extract_text() or "") + "\n"
+    return {"text": text, "page_offsets": page_offsets}
+
+
+def _on_extract_timeout(signum, frame):
+    raise TimeoutError("PDF 解析超时")
+
+
+def timeout_enforceable() -> bool:
+    """当前线程能否通过 SIGALRM 中断解析（只在支持该信号的平台的主线程中可用，进程池的工作进程满足条件）"""
+    return hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+
+
+def extract_pdf_with_timeout(filepath: str, timeout: float) -> Dict[str, Any]:
+    """
+    带超时的 `extract_pdf`：通过 SIGALRM 中断解析，`timeout_enforceable()` 为 False 时不限时
+
+    Raises:
+        TimeoutError: 解析超过 timeout 秒
+    """
+    if timeout <= 0 or not timeout_enforceable():
+        return extract_pdf(filepath)
+    previous = signal.signal(signal.SIGALRM, _on_extract_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_pdf(filepath)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_pdf_chunk(filepaths: Sequence[str], timeout: float) -> list[tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    进程池任务：依次解析一组 PDF，每个文件单独计时，单个文件失败或超时不影响其余文件
+
+    Returns:
+        与 filepaths 顺序一致的 (文件路径, `extract_pdf` 结果, 错误信息)，成功时错误信息为 None
+    """
+    results = []
+    for filepath in filepaths:
+        try:
+            results.append((filepath, extract_pdf_with_timeout(filepath, timeout), None))
+        except Exception as e:
+            results.append((filepath, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def page_text(entry: Dict[str, Any], page: int) -> str:
+    """按页码（从 0 开始）取出缓存条目中一页的文本"""
+    offsets = entry["page_offsets"]
+    end = offsets[page + 1] if page + 1 < len(offsets) else len(entry["text"])
+    return entry["text"][offsets[page]:end]
+
+
+def file_sha256(filepath: str) -> str:
+    """内容 SHA-256：内容寻址保存的文件直接取文件名，其他文件读取内容计算"""
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    if _SHA256_PATTERN.match(stem):
+        return stem
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractedTextCache:
+    """按内容哈希与解析器版本索引的解析文本缓存"""
+
+    def __init__(self, save_dir: str, extractor: str = EXTRACTOR_NAME, version: str = EXTRACTOR_VERSION):
+        """
+        Args:
+            save_dir: 论文保存目录，缓存位于其下的 .text/
+            extractor / version: 解析器名称与版本，只命中相同解析器与版本的结果
+        """
+        self.directory = os.path.join(save_dir, TEXT_DIRNAME)
+        self.save_dir = save_dir
+        self.extractor = extractor
+        self.version = version
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def path(self, sha256: str) -> str:
+        """缓存条目的保存路径"""
+        return os.path.join(self.directory, f"{sha256}.{self.extractor}-{self.version}.json")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """读取缓存条目 {"sha256", "extractor", "version", "text", "page_offsets"}，未命中时返回 None"""
+        try:
+            with open(self.path(sha256), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, sha256: str, text: str, page_offsets: list[int]) -> Dict[str, Any]:
+        """保存解析结果（先写临时文件再原子替换），并删除同一内容其他解析器版本的旧结果"""
+        entry = {
+            "sha256": sha256,
+            "extractor": self.extractor,
+            "version": self.version,
+            "page_offsets": page_offsets,
+            "text": text,
+        }
+        path = self.path(sha256)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".entry-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        for name in os.listdir(self.directory):
+            if name.startswith(f"{sha256}.") and os.path.join(self.directory, name) != path:
+                os.unlink(os.path.join(self.directory, name))
+        get_store_quota(self.save_dir).record_write(os.path.getsize(path), keep=path)
+        return entry
+
+    def lookup(self, filepath: str, sha256: Optional[str] = None) -> tuple[str, Optional[Dict[str, Any]]]:
+        """
+        查询文件的缓存条目并计入命中 / 未命中
+
+        Returns:
+            (内容哈希, 缓存条目)，未命中时条目为 None；解析后以该哈希调用 `put` 保存
+        """
+        sha256 = sha256 or file_sha256(filepath)
+        entry = self.get(sha256)
+        self._count("misses" if entry is None else "hits")
+        return sha256, entry
+
+    def load_or_extract(self, filepath: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        读取 PDF 的解析文本，未命中时解析并保存
+
+        Args:
+            filepath: PDF 文件路径
+            sha256: 内容哈希，未提供时按 `file_sha256` 计算
+
+        Returns:
+            缓存条目，另含 "cached"（是否命中缓存）
+        """
+        sha256, entry = self.lookup(filepath, sha256)
+        if entry is not None:
+            return {**entry, "cached": True}
+        extracted = extract_pdf(filepath)
+        entry = self.put(sha256, extracted["text"], extracted["page_offsets"])
+        return {**entry, "cached": False}
+
+    def stats(self) -> Dict[str, Any]:
+        """累计命中与未命中（解析）次数"""
+        with self._lock:
+            return {**self._stats, "extractor": self.extractor, "version": self.version}
+
+
+_text_caches: Dict[str, ExtractedTextCache] = {}
+_text_caches_lock = threading.Lock()
+
+
+def get_text_cache(save_dir: str = SAVE_DIR) -> ExtractedTextCache:
+    """获取指定保存目录的共享解析文本缓存"""
+    save_dir = os.path.abspath(save_dir)
+    with _text_caches_lock:
+        cache = _text_caches.get(save_dir)
+        if cache is None:
+            cache = _text_caches[save_dir] = ExtractedTextCache(save_dir)
+        return cache
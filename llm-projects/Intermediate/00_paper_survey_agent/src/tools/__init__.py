@@ -4,16 +4,18 @@
 包含所有Agent使用的工具函数。
 """
 
-from .search_tools import search_papers
+from .search_tools import search_papers, search_papers_batch, get_paper_details
 from .download_tools import download_paper
 from .feedback_tools import ask_human_feedback
 
 # 工具注册
-tools = [search_papers, download_paper, ask_human_feedback]
+tools = [search_papers, search_papers_batch, get_paper_details, download_paper, ask_human_feedback]
 tools_dict = {tool.name: tool for tool in tools}
 
 __all__ = [
     "search_papers",
+    "search_papers_batch",
+    "get_paper_details",
     "download_paper", 
     "ask_human_feedback",
     "tools",
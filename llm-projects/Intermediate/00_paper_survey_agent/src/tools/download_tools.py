@@ -3,17 +3,88 @@
 """
 
 import os
-import io
+import json
 import time
+import hashlib
+import threading
+import weakref
 import urllib3
-import re
-import uuid
-from datetime import datetime
-from urllib.parse import urlparse
-import pdfplumber
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait as wait_futures
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Mapping, Optional, Sequence, TextIO
 from langchain_core.tools import tool
 
-from ..config import SAVE_DIR
+try:
+    import fcntl
+except ImportError:  # Windows：未完成下载只在进程内互斥
+    fcntl = None
+
+from ..config import (
+    SAVE_DIR, NEGATIVE_CACHE_ENABLED, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_MAX_BYTES, DOWNLOAD_REVALIDATE_AFTER,
+    DOWNLOAD_MAX_CONCURRENCY, DOWNLOAD_MAX_MIRRORS, DOWNLOAD_HEDGE_DELAY, PREFETCH_WAIT_TIMEOUT
+)
+from ..services.negative_cache import PERMANENT_STATUSES, FAILURE_NON_PDF, get_negative_cache, url_host
+from ..services.http_session import get_download_pool_manager
+from ..services.rate_limiter import parse_retry_after
+from ..services.download_scheduler import RetryLater, get_download_scheduler
+from ..services.paper_store import PARTIAL_DIRNAME, commit_content, get_paper_manifest, normalize_url, pdf_url
+from ..services.text_cache import get_text_cache
+
+
+# PDF 文件头；规范允许其前有少量其他字节，因此在响应开头的 PDF_SNIFF_BYTES 字节内查找
+PDF_MAGIC = b"%PDF-"
+PDF_SNIFF_BYTES = 1024
+# 明确不是 PDF 的内容类型（application/octet-stream 等通用类型仍以文件头为准）
+NON_PDF_CONTENT_TYPES = ("text/", "image/", "audio/", "video/", "application/json", "application/xml",
+                         "application/xhtml+xml", "application/javascript")
+
+
+# 模拟浏览器请求头避免403错误
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    # 不使用传输压缩：Range 的偏移基于编码后的字节，压缩会使续传位置失效（PDF 本身已压缩）
+    'Accept-Encoding': 'identity',
+    'Connection': 'keep-alive',
+}
+
+
+class DownloadError(Exception):
+    """
+    下载失败（携带 HTTP 状态码，网络错误时为 None）
+
+    retryable 表示临时失败（5xx、429、网络错误等），可由调度器延迟重试；
+    retry_after 为服务器通过 Retry-After 建议的等待时间（秒）；
+    failure_kind 为记录到负缓存的失败类型（None 表示按状态码推断）
+    """
+
+    failure_kind: Optional[str] = None
+
+    def __init__(
+        self, message: str, status: Optional[int] = None, retryable: bool = False, retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class DownloadInterrupted(DownloadError):
+    """传输中断（已接收的部分保留在未完成下载中，重试时续传）"""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=True)
+
+
+class DownloadCancelled(DownloadError):
+    """下载被取消（例如镜像竞速中其他链接已胜出）"""
+
+
+class NotPdfError(DownloadError):
+    """响应不是 PDF（落地页、登录页等），在读取响应体之前或读取开头后即中止"""
+
+    failure_kind = FAILURE_NON_PDF
 
 
 @tool("download-paper")
@@ -27,55 +98,596 @@ def download_paper(url: str) -> str:
         论文内容
     """
     try:
-        http = urllib3.PoolManager(cert_reqs='CERT_NONE')
-        
-        # 模拟浏览器请求头避免403错误
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-        }
-
-        if "arxiv.org/abs" in url:
-            url = url.replace("arxiv.org/abs", "arxiv.org/pdf")
-        
-        max_retries = 5
-        for attempt in range(max_retries):
-            response = http.request('GET', url, headers=headers)
-            if 200 <= response.status < 300:
-                pdf_file = io.BytesIO(response.data)
-
-                save_dir = SAVE_DIR
-                os.makedirs(save_dir, exist_ok=True)
-
-                parsed_url = urlparse(url)
-                filename = os.path.basename(parsed_url.path)
-                # print(f"[DEBUG] PDF文件预期保存文件名: {filename}")
-                if not str(filename).endswith('.pdf'):
-                    # 如果无法从URL获取文件名，使用时间戳+uuid
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    unique_id = str(uuid.uuid4())
-                    filename = f"{timestamp}_{unique_id}.pdf"
-                
-                # 移除不安全字符
-                filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-                filepath = os.path.join(save_dir, filename)
-
-                # 保存至本地
-                with open(filepath, 'wb') as f:
-                    f.write(response.data)
-                print(f"📄 PDF文件已保存到: {filepath}")
-                
-                with pdfplumber.open(pdf_file) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() + "\n"
-                return f"📄 PDF文件已保存到: {filepath}\n论文内容: {text}"
-            elif attempt < max_retries - 1:
-                time.sleep(2 ** (attempt + 2))
-            else:
-                raise Exception(f"下载论文时收到非2xx状态码: {response.status}")
+        # 已下载过的论文（包括之前的运行）直接返回本地文件
+        cached = cached_paper(url)
+        if cached is not None:
+            return cached
+        # 搜索阶段已加入后台预取队列且未失败的论文直接等待其结果，避免重复下载；
+        # 未提交或已失败的链接重新交由下载调度器执行（优先于后台预取任务），失败时按退避重试
+        from ..services.prefetch_queue import get_prefetch_queue
+        future = get_prefetch_queue().submit(url, priority=-1)
+        return future.result(timeout=PREFETCH_WAIT_TIMEOUT)
+    except FutureTimeoutError:
+        return f"下载论文超时: 等待 {PREFETCH_WAIT_TIMEOUT:g} 秒后仍未完成，下载仍在后台进行，可稍后重试"
     except Exception as e:
         return f"下载论文时出错: {e}"
+
+
+def _lookup_cached(url: str, core_id: Any = None) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    从论文清单中查找已保存的论文（按规范化链接、arXiv id 或 CORE id）
+
+    Returns:
+        (清单记录, 可直接返回的结果)；记录超过重新验证时间时，结果为 None
+    """
+    manifest = get_paper_manifest()
+    record = manifest.lookup(url, core_id)
+    if record is None or needs_revalidation(record):
+        return record, None
+    text = load_or_extract_text(record)
+    return record, f"📄 论文已存在于本地: {manifest.filepath(record)}\n论文内容: {text}"
+
+
+def load_or_extract_text(record: Dict[str, Any], save_dir: str = SAVE_DIR) -> str:
+    """读取记录对应的文本：全文文件直接读取，PDF 从解析文本缓存读取，未解析过（如异步引擎批量下载的论文）时在此时解析"""
+    filepath = get_paper_manifest(save_dir).filepath(record)
+    if record["filename"].endswith(".txt"):
+        with open(filepath, "r", encoding="utf-8") as f:
+            return f.read()
+    return get_text_cache(save_dir).load_or_extract(filepath, record["sha256"])["text"]
+
+
+def needs_revalidation(record: Dict[str, Any]) -> bool:
+    """带有校验器且超过重新验证时间的记录需要向服务器确认（没有校验器的记录始终直接使用）"""
+    if DOWNLOAD_REVALIDATE_AFTER < 0 or not (record.get("etag") or record.get("last_modified")):
+        return False
+    return time.time() - record["fetched_at"] > DOWNLOAD_REVALIDATE_AFTER
+
+
+def cached_paper(url: str, core_id: Any = None) -> Optional[str]:
+    """
+    返回已保存且无需重新验证的论文
+
+    Returns:
+        与 `fetch_paper` 格式一致的保存路径与论文内容；未保存过或需要重新验证时返回 None
+    """
+    return _lookup_cached(url, core_id)[1]
+
+
+def fetch_paper(url: str, core_id: Any = None, final_attempt: bool = True, mirrors: Sequence[str] = ()) -> str:
+    """
+    下载论文并提取文本（单次尝试）；已保存过的论文直接返回本地文件（超过重新验证时间时发送条件请求），
+    近期失败过的链接或已熔断的主机直接跳过，下载结果记录到负缓存
+
+    提供备用链接时进行对冲请求：先请求主链接，超过 DOWNLOAD_HEDGE_DELAY 秒未完成或失败时依次并行请求备用链接，
+    先得到有效 PDF 的链接胜出，其余请求取消。
+
+    Args:
+        url: 论文下载链接
+        core_id: 论文的 CORE id（已知时登记到论文清单）
+        final_attempt: 是否为最后一次尝试；否则临时失败时抛出 `RetryLater`，交由下载调度器延迟重试，
+                       且不记录到负缓存
+        mirrors: 同一论文的备用下载链接（如 `sourceFulltextUrls`）
+
+    Returns:
+        保存路径与论文内容
+
+    Raises:
+        RetryLater: 非最后一次尝试时遇到临时失败（有备用链接时为全部链接均失败）
+        Exception: 下载或解析失败，或链接被负缓存跳过
+    """
+    candidates = [url]
+    seen = {normalize_url(url)}
+    for mirror in mirrors:
+        if normalize_url(mirror) not in seen:
+            seen.add(normalize_url(mirror))
+            candidates.append(mirror)
+    if len(candidates) == 1:
+        return _fetch_candidate(url, core_id, final_attempt)
+
+    for candidate in candidates:
+        cached = cached_paper(candidate, core_id)
+        if cached is not None:
+            return cached
+    winner, result = _race_mirrors(candidates, core_id, final_attempt)
+    if winner != url:
+        # 以主链接登记同一内容，之后按主链接查询（如 download-paper 工具）时直接命中
+        manifest = get_paper_manifest()
+        record = manifest.lookup_url(winner)
+        if record is not None:
+            manifest.add(record["sha256"], record["filename"], record["size"], url=url, core_id=core_id)
+    return result
+
+
+def _fetch_candidate(
+    url: str, core_id: Any = None, final_attempt: bool = True, cancel: Optional[threading.Event] = None
+) -> str:
+    """单个链接的下载：查询论文清单与负缓存，下载后记录结果"""
+    record, cached = _lookup_cached(url, core_id)
+    if cached is not None:
+        return cached
+
+    negative_cache = get_negative_cache() if NEGATIVE_CACHE_ENABLED else None
+    if negative_cache is not None:
+        reason = negative_cache.check(url)
+        if reason is not None:
+            raise Exception(f"跳过下载: {reason}")
+    try:
+        result = _fetch_paper(url, core_id, record, cancel)
+    except DownloadCancelled:
+        raise
+    except Exception as e:
+        if isinstance(e, DownloadError) and e.retryable and not final_attempt:
+            raise RetryLater(e, e.retry_after) from e
+        # 不再重试：删除为续传保留的未完成下载（其他任务正在写入时保留）
+        PartialDownload(url).discard_if_idle()
+        if negative_cache is not None:
+            negative_cache.record_failure(
+                url, getattr(e, "status", None), str(e)[:200], kind=getattr(e, "failure_kind", None)
+            )
+        raise
+    if negative_cache is not None:
+        negative_cache.record_success(url)
+    return result
+
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """镜像竞速使用的线程池（竞速期间调度器的下载线程只负责等待）"""
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=DOWNLOAD_MAX_CONCURRENCY * (1 + max(1, DOWNLOAD_MAX_MIRRORS)),
+                    thread_name_prefix="paper-hedge",
+                )
+    return _hedge_executor
+
+
+def _race_mirrors(candidates: list[str], core_id: Any, final_attempt: bool) -> tuple[str, str]:
+    """
+    对冲请求同一论文的多个链接
+
+    主链接使用调度器分配给本任务的主机名额；备用链接须先占用所属主机在调度器中的名额（与下载任务共用单主机并发上限），
+    主机已满时暂不启用，稍后再试。主链接结束后，与其同主机的备用链接可直接沿用本任务的名额。
+
+    Returns:
+        (胜出的链接, 下载结果)
+
+    Raises:
+        RetryLater: 全部链接失败且其中有临时失败（非最后一次尝试）
+        Exception: 全部链接失败时，主链接的失败原因
+    """
+    executor = _get_hedge_executor()
+    scheduler = get_download_scheduler()
+    own_host = url_host(candidates[0])
+    cancel = threading.Event()
+    remaining = list(candidates[1:])
+    # 链接 → 占用的调度器名额（None 表示使用本任务的名额）
+    pending: Dict[Future, tuple[str, Optional[str]]] = {}
+    errors: list[Exception] = []
+
+    def fetch(candidate: str, slot: Optional[str]) -> str:
+        try:
+            return _fetch_candidate(candidate, core_id, final_attempt, cancel)
+        finally:
+            if slot is not None:
+                scheduler.release_host(slot)
+
+    def start(candidate: str, slot: Optional[str]) -> None:
+        pending[executor.submit(fetch, candidate, slot)] = (candidate, slot)
+
+    def launch() -> Optional[str]:
+        """启动下一个能取得主机名额的备用链接，返回该链接；所在主机均已满时返回 None"""
+        own_slot_free = all(slot is not None for _, slot in pending.values())
+        for candidate in remaining:
+            if own_slot_free and url_host(candidate) == own_host:
+                slot = None
+            elif scheduler.try_acquire_host(candidate):
+                slot = candidate
+            else:
+                continue
+            remaining.remove(candidate)
+            start(candidate, slot)
+            return candidate
+        return None
+
+    start(candidates[0], None)
+    try:
+        while pending:
+            timeout = DOWNLOAD_HEDGE_DELAY if remaining and DOWNLOAD_HEDGE_DELAY >= 0 else None
+            done, _ = wait_futures(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                launched = launch()
+                if launched is not None:
+                    print(f"  🏁 {DOWNLOAD_HEDGE_DELAY:g} 秒内未完成，并行请求备用链接: {launched}")
+                continue
+            for future in done:
+                candidate, _ = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    # 失败时立即启用下一个备用链接
+                    if remaining:
+                        launch()
+                    continue
+                if candidate != candidates[0]:
+                    print(f"  🏁 备用链接胜出: {candidate}")
+                return candidate, result
+    finally:
+        # 取消其余仍在进行的请求
+        cancel.set()
+
+    if remaining:
+        # 剩余备用链接所在主机的名额一直被占满，未能尝试：按临时失败处理，交由调度器稍后重试
+        busy = DownloadError(f"{len(remaining)} 个备用链接所在主机已达到并发上限，未能尝试", retryable=True)
+        errors.append(RetryLater(busy) if not final_attempt else busy)
+    retry = next((e for e in errors if isinstance(e, RetryLater)), None)
+    if retry is not None:
+        raise retry
+    raise errors[0]
+
+
+def _fetch_paper(
+    url: str,
+    core_id: Any = None,
+    cached_record: Optional[Dict[str, Any]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """
+    下载论文并提取文本（不经过负缓存）
+
+    Args:
+        url: 论文下载链接
+        core_id: 论文的 CORE id
+        cached_record: 已保存的清单记录，提供时发送条件请求，304 时复用本地文件
+        cancel: 设置后停止接收响应体并丢弃已接收的部分
+    """
+    if cancel is not None and cancel.is_set():
+        raise DownloadCancelled("下载已取消")
+    source_url = url
+    http = get_download_pool_manager()
+    headers = {**DOWNLOAD_HEADERS, **conditional_headers(cached_record)}
+    url = pdf_url(url)
+
+    partial = PartialDownload(source_url)
+    # 同一链接同时只有一个线程或进程写入未完成下载
+    with partial.lock() as waited:
+        if waited:
+            # 等待期间其他任务可能已完成同一链接的下载
+            cached = cached_paper(source_url, core_id)
+            if cached is not None:
+                return cached
+        try:
+            # 不预读响应体，2xx 时按块流式写入文件
+            response = http.request('GET', url, headers={**headers, **partial.range_headers()}, preload_content=False)
+        except urllib3.exceptions.HTTPError as e:
+            raise DownloadError(f"请求失败: {e}", retryable=True) from e
+
+        if response.status == 304 and cached_record is not None:
+            response.drain_conn()
+            response.release_conn()
+            return _reuse_cached(cached_record, source_url, core_id)
+
+        if response.status in (200, 206):
+            # 按内容寻址保存至本地，同一篇论文只保存一份
+            try:
+                content_type = non_pdf_content_type(response.headers)
+                if content_type:
+                    raise NotPdfError(f"响应不是 PDF（Content-Type: {content_type}）", response.status)
+                filepath, size, sha256 = partial.write(response, cancel=cancel)
+            except DownloadInterrupted:
+                print(f"  ⚠️ 下载中断，已保留 {partial.size} 字节，重试时续传")
+                raise
+            except DownloadError:
+                # 响应体未读完，关闭连接而不是放回连接池
+                response.close()
+                partial.discard()
+                raise
+            finally:
+                response.release_conn()
+            print(f"📄 PDF文件已保存到: {filepath}")
+        
+            text = get_text_cache().load_or_extract(filepath, sha256)["text"]
+            # 解析成功后再登记到清单，之后对同一论文的请求直接返回
+            manifest = get_paper_manifest()
+            manifest.add(
+                sha256, os.path.basename(filepath), size, url=source_url, core_id=core_id,
+                etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"),
+            )
+            return f"📄 PDF文件已保存到: {filepath}\n论文内容: {text}"
+
+        response.drain_conn()
+        response.release_conn()
+        if response.status == 416:
+            # 未完成的部分已失效（例如文件在服务器端变短），重试时从头下载
+            partial.discard()
+        raise DownloadError(
+            f"下载论文时收到非2xx状态码: {response.status}",
+            response.status,
+            retryable=response.status not in PERMANENT_STATUSES,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+
+
+def conditional_headers(record: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """根据清单记录中的校验器生成条件请求头（没有记录或校验器时为空）"""
+    headers = {}
+    if record is not None:
+        if record.get("etag"):
+            headers['If-None-Match'] = record["etag"]
+        if record.get("last_modified"):
+            headers['If-Modified-Since'] = record["last_modified"]
+    return headers
+
+
+def _reuse_cached(record: Dict[str, Any], url: str, core_id: Any = None) -> str:
+    """服务器返回 304：刷新清单中的验证时间并复用本地文件"""
+    manifest = get_paper_manifest()
+    filepath = manifest.filepath(record)
+    text = load_or_extract_text(record)
+    manifest.add(
+        record["sha256"], record["filename"], record["size"], url=url, core_id=core_id,
+        etag=record.get("etag"), last_modified=record.get("last_modified"),
+    )
+    print(f"♻️ 服务器确认论文未变化（304），复用本地文件: {filepath}")
+    return f"📄 论文已存在于本地: {filepath}\n论文内容: {text}"
+
+
+# 未完成下载的进程内锁（按 .part 路径），不再使用时自动回收
+_partial_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_partial_locks_guard = threading.Lock()
+
+
+class PartialDownload:
+    """
+    未完成的下载：SAVE_DIR/.partial/ 下的内容文件与校验器元数据
+
+    传输中断时保留已接收的字节；重试（包括之后的运行）时以 Range + If-Range 续传，
+    服务器不支持续传或文件已变化时返回 200，自动从头下载。
+    写入前须持有 `lock()`：进程内按路径互斥，并对 .lock 文件加 flock，同一链接同时只有一个线程或进程写入。
+    """
+
+    def __init__(self, url: str, save_dir: str = SAVE_DIR):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
+        self.directory = os.path.join(save_dir, PARTIAL_DIRNAME)
+        self.path = os.path.join(self.directory, f"{key}.part")
+        self.meta_path = os.path.join(self.directory, f"{key}.json")
+        self.lock_path = os.path.join(self.directory, f"{key}.lock")
+
+    def _acquire(self, blocking: bool) -> Optional[tuple[threading.Lock, Optional[TextIO], bool]]:
+        """
+        取得进程内锁与文件锁
+
+        Returns:
+            (进程内锁, 已加锁的 .lock 文件, 是否等待过)；blocking 为 False 且已被占用时返回 None
+        """
+        with _partial_locks_guard:
+            thread_lock = _partial_locks.get(self.path)
+            if thread_lock is None:
+                thread_lock = _partial_locks[self.path] = threading.Lock()
+        waited = not thread_lock.acquire(blocking=False)
+        if waited:
+            if not blocking:
+                return None
+            thread_lock.acquire()
+        if fcntl is None:
+            return thread_lock, None, waited
+        lock_file = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            while True:
+                lock_file = open(self.lock_path, "a")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    if not blocking:
+                        lock_file.close()
+                        thread_lock.release()
+                        return None
+                    waited = True
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # 等待期间持有者可能已删除锁文件，此时锁住的是已不存在的文件，需重新打开
+                try:
+                    if os.fstat(lock_file.fileno()).st_ino == os.stat(self.lock_path).st_ino:
+                        return thread_lock, lock_file, waited
+                except FileNotFoundError:
+                    pass
+                lock_file.close()
+        except BaseException:
+            if lock_file is not None:
+                lock_file.close()
+            thread_lock.release()
+            raise
+
+    def _release(self, thread_lock: threading.Lock, lock_file: Optional[TextIO]) -> None:
+        """释放锁；未完成的内容已不存在（完成或被丢弃）时一并删除锁文件"""
+        try:
+            if lock_file is not None:
+                if not os.path.exists(self.path):
+                    try:
+                        os.unlink(self.lock_path)
+                    except FileNotFoundError:
+                        pass
+                lock_file.close()
+        finally:
+            thread_lock.release()
+
+    @contextmanager
+    def lock(self) -> Iterator[bool]:
+        """
+        独占未完成下载，其他线程或进程正在写入同一链接时阻塞等待
+
+        Yields:
+            是否等待过其他任务（等待后应先检查论文是否已由其他任务下载完成）
+        """
+        thread_lock, lock_file, waited = self._acquire(blocking=True)
+        try:
+            yield waited
+        finally:
+            self._release(thread_lock, lock_file)
+
+    def discard_if_idle(self) -> bool:
+        """没有其他任务正在写入时删除未完成的内容与元数据（下载不再重试时调用），返回是否已删除"""
+        acquired = self._acquire(blocking=False)
+        if acquired is None:
+            return False
+        thread_lock, lock_file, _ = acquired
+        try:
+            self.discard()
+        finally:
+            self._release(thread_lock, lock_file)
+        return True
+
+    @property
+    def size(self) -> int:
+        """已接收的字节数"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def _validator(self) -> Optional[str]:
+        """首次响应的 ETag（优先）或 Last-Modified"""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return meta.get("etag") or meta.get("last_modified")
+
+    def range_headers(self) -> Dict[str, str]:
+        """续传请求头；没有已接收的内容或缺少校验器（无法确认文件未变化）时为空"""
+        validator = self._validator()
+        if not self.size or not validator:
+            return {}
+        return {'Range': f"bytes={self.size}-", 'If-Range': validator}
+
+    def _open(self, response: urllib3.BaseHTTPResponse) -> tuple[BinaryIO, int]:
+        """根据响应决定续传还是从头写入，返回 (文件对象, 起始偏移)"""
+        os.makedirs(self.directory, exist_ok=True)
+        offset = self.size
+        content_range = response.headers.get("Content-Range", "")
+        if response.status == 206 and content_range.startswith(f"bytes {offset}-"):
+            return open(self.path, "ab"), offset
+
+        meta = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        return open(self.path, "wb"), 0
+
+    def write(
+        self,
+        response: urllib3.BaseHTTPResponse,
+        max_bytes: int = DOWNLOAD_MAX_BYTES,
+        cancel: Optional[threading.Event] = None,
+    ) -> tuple[str, int, str]:
+        """
+        接收响应体（续传时追加到已有内容之后），完成后移入内容寻址存储；cancel 被设置时在下一块之前停止
+
+        Returns:
+            (保存路径, 字节数, SHA-256)
+
+        Raises:
+            DownloadInterrupted: 传输中断，已接收的内容保留
+            DownloadCancelled: 下载被取消
+            DownloadError: 超过大小上限或续传响应无效
+        """
+        if response.status == 206 and not response.headers.get("Content-Range", "").startswith(f"bytes {self.size}-"):
+            raise DownloadError(f"续传响应的范围与已接收的 {self.size} 字节不一致")
+        # 从头接收时检查文件头；续传时开头已在首次接收时检查过
+        sniff_pdf = not (response.status == 206 and self.size)
+        f, offset = self._open(response)
+        # 0 表示不限制，只用于未设置上限的情况；续传时已接收的内容已达到上限则放弃（剩余额度不能当作不限制）
+        remaining_bytes = max_bytes - offset if max_bytes > 0 else 0
+        if max_bytes > 0 and remaining_bytes <= 0:
+            f.close()
+            self.discard()
+            raise DownloadError(f"已接收 {offset} 字节，达到文件大小上限 {max_bytes} 字节")
+        digest = hashlib.sha256()
+        if offset:
+            print(f"  ⏩ 从第 {offset} 字节续传")
+            # 续传时先对已有内容计算哈希，之后的字节边接收边计算
+            with open(self.path, "rb") as existing:
+                for chunk in iter(lambda: existing.read(DOWNLOAD_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        size = offset
+        with f:
+            for chunk in _iter_response_chunks(response, remaining_bytes, sniff_pdf=sniff_pdf):
+                if cancel is not None and cancel.is_set():
+                    raise DownloadCancelled("下载已取消")
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+
+        filepath = commit_content(self.path, digest.hexdigest(), ".pdf")
+        self.discard()
+        return filepath, size, digest.hexdigest()
+
+    def discard(self) -> None:
+        """删除未完成的内容与元数据"""
+        for path in (self.path, self.meta_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def non_pdf_content_type(headers: Mapping[str, str]) -> Optional[str]:
+    """响应头中的 Content-Type 明确不是 PDF 时返回该类型（在读取响应体之前即可中止），否则返回 None"""
+    content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type if content_type.startswith(NON_PDF_CONTENT_TYPES) else None
+
+
+def _sniff_pdf_head(response: urllib3.BaseHTTPResponse) -> bytes:
+    """读取响应开头（最多 PDF_SNIFF_BYTES 字节）并检查 PDF 文件头，返回已读取的字节"""
+    head = b""
+    while len(head) < PDF_SNIFF_BYTES and PDF_MAGIC not in head:
+        chunk = response.read1(PDF_SNIFF_BYTES - len(head))
+        if not chunk:
+            break
+        head += chunk
+    if PDF_MAGIC not in head:
+        preview = head[:40].decode("latin-1").split("\n")[0].strip()
+        raise NotPdfError(f"响应不是 PDF（开头为 {preview!r}）", response.status)
+    return head
+
+
+def _iter_response_chunks(
+    response: urllib3.BaseHTTPResponse,
+    max_bytes: int = DOWNLOAD_MAX_BYTES,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    sniff_pdf: bool = False,
+) -> Iterator[bytes]:
+    """
+    按块读取响应体并检查大小上限；内存占用与文件大小无关
+
+    Args:
+        response: 未预读响应体的 urllib3 响应
+        max_bytes: 文件大小上限（字节），<= 0 表示不限制
+        chunk_size: 每次读取的块大小（字节）
+        sniff_pdf: 先只读取开头检查 PDF 文件头，不是 PDF 时不再读取其余部分
+
+    Raises:
+        DownloadError: 超过大小上限
+        NotPdfError: 开头不是 PDF 文件头
+        DownloadInterrupted: 传输中断
+    """
+    content_length = response.headers.get("Content-Length", "")
+    if max_bytes > 0 and content_length.isdigit() and int(content_length) > max_bytes:
+        raise DownloadError(f"文件大小 {int(content_length)} 字节超过上限 {max_bytes} 字节")
+
+    size = 0
+    try:
+        if sniff_pdf:
+            head = _sniff_pdf_head(response)
+            size += len(head)
+            yield head
+        # read1 返回已到达的数据（不等待凑满一块），传输中断前收到的字节也能写入未完成下载
+        while chunk := response.read1(chunk_size):
+            size += len(chunk)
+            if max_bytes > 0 and size > max_bytes:
+                raise DownloadError(f"文件大小超过上限 {max_bytes} 字节")
+            yield chunk
+    except urllib3.exceptions.HTTPError as e:
+        raise DownloadInterrupted(f"下载中断: {e}") from e
@@ -2,23 +2,111 @@
 搜索工具模块
 """
 
-from langchain_core.tools import tool
-from ..models import SearchPapersInput
+from typing import Optional
+from langchain_core.tools import StructuredTool, tool
+from ..models import SearchPapersInput, SearchPapersBatchInput, PaperDetailsInput
 
+# 由工具节点从状态中注入运行级配置的工具
+SEARCH_TOOL_NAMES = ("search-papers", "search-papers-batch")
 
-@tool("search-papers", args_schema=SearchPapersInput)
-def search_papers(query: str, max_papers: int = 1) -> str:
+
+def _core_api(
+    top_k_results: int,
+    topic: Optional[str] = None,
+    rerank_top_k: Optional[int] = None,
+    rerank_min_score: Optional[float] = None,
+):
+    """按本次运行的主题与重排序配置创建 CoreAPIWrapper（未指定的项使用全局配置）"""
+    from ..services.core_api import CoreAPIWrapper
+    options = {"topic": topic, "rerank_top_k": rerank_top_k, "rerank_min_score": rerank_min_score}
+    return CoreAPIWrapper(top_k_results=top_k_results, **{key: value for key, value in options.items() if value is not None})
+
+
+def _search_papers(query: str, max_papers: int = 1, id_only: bool = False, **run_options) -> str:
     """使用CORE API搜索科学论文
-    
+
     示例：
     {"query": "Attention is all you need", "max_papers": 1}
-    
+
     返回：
         找到的相关论文列表及对应的相关信息
     """
     try:
-        from ..services.core_api import CoreAPIWrapper
         print(f"🔍 正在搜索论文: {query} (最多 {max_papers} 篇)")
-        return CoreAPIWrapper(top_k_results=max_papers).search(query)
+        return _core_api(max_papers, **run_options).search(query, id_only)
+    except Exception as e:
+        return f"执行论文搜索时出错: {e}"
+
+
+async def _asearch_papers(query: str, max_papers: int = 1, id_only: bool = False, **run_options) -> str:
+    """使用CORE API搜索科学论文（异步版本，供 `ainvoke` 直接在事件循环中执行）"""
+    try:
+        print(f"🔍 正在搜索论文: {query} (最多 {max_papers} 篇)")
+        return await _core_api(max_papers, **run_options).asearch(query, id_only)
     except Exception as e:
         return f"执行论文搜索时出错: {e}"
+
+
+# 同时提供同步与异步实现，`ainvoke` 不再回退到线程池执行同步函数
+search_papers = StructuredTool.from_function(
+    func=_search_papers,
+    coroutine=_asearch_papers,
+    name="search-papers",
+    args_schema=SearchPapersInput,
+)
+
+
+def _search_papers_batch(
+    queries: list[str], max_papers_per_query: int = 10, max_papers: int = 20, id_only: bool = False, **run_options
+) -> str:
+    """使用CORE API并发执行多个子查询，按CORE ID、DOI与标题去重后融合排名，一次返回一份论文列表（需要从多个角度检索同一主题时，优先使用该工具而不是多次调用 `search-papers`）
+
+    示例：
+    {"queries": ["diffusion models AND image generation", "score-based generative models"], "max_papers_per_query": 10, "max_papers": 20}
+
+    返回：
+        去重融合后的论文列表及对应的相关信息
+    """
+    try:
+        print(f"🔍 正在批量搜索论文: {len(queries)} 个子查询 (每个最多 {max_papers_per_query} 篇，保留 {max_papers} 篇)")
+        return _core_api(max_papers_per_query, **run_options).batch_search(queries, max_results=max_papers, id_only=id_only)
+    except Exception as e:
+        return f"执行批量论文搜索时出错: {e}"
+
+
+async def _asearch_papers_batch(
+    queries: list[str], max_papers_per_query: int = 10, max_papers: int = 20, id_only: bool = False, **run_options
+) -> str:
+    """批量搜索论文（异步版本）"""
+    try:
+        print(f"🔍 正在批量搜索论文: {len(queries)} 个子查询 (每个最多 {max_papers_per_query} 篇，保留 {max_papers} 篇)")
+        return await _core_api(max_papers_per_query, **run_options).abatch_search(queries, max_results=max_papers, id_only=id_only)
+    except Exception as e:
+        return f"执行批量论文搜索时出错: {e}"
+
+
+search_papers_batch = StructuredTool.from_function(
+    func=_search_papers_batch,
+    coroutine=_asearch_papers_batch,
+    name="search-papers-batch",
+    args_schema=SearchPapersBatchInput,
+)
+
+
+@tool("get-paper-details", args_schema=PaperDetailsInput)
+def get_paper_details(ids: list[str]) -> str:
+    """按 CORE ID 查询论文的完整元数据（完整摘要、全部作者、DOI、下载链接）。搜索工具只返回精简信息，需要更多细节时使用该工具
+
+    示例：
+    {"ids": ["123456", "789012"]}
+
+    返回：
+        对应论文的完整元数据
+    """
+    from ..services.result_formatter import get_metadata_store, format_paper_details
+    store = get_metadata_store()
+    docs = []
+    for paper_id in ids:
+        result = store.get(paper_id)
+        docs.append(format_paper_details(result) if result else f"* ID: {paper_id}\n未找到该论文，请先使用搜索工具检索")
+    return "\n-----\n".join(docs)
@@ -6,5 +6,8 @@ from langchain_core.tools import BaseTool
 
 
 def format_tools_description(tools: list[BaseTool]) -> str:
-    """格式化工具描述"""
-    return "\n\n".join([f"- {tool.name}: {tool.description}\n输入参数: {tool.args}" for tool in tools])
+    """格式化工具描述（只列出 LLM 可填写的参数，不含由工具节点注入的参数）"""
+    return "\n\n".join([
+        f"- {tool.name}: {tool.description}\n输入参数: {tool.tool_call_schema.model_json_schema().get('properties', {})}"
+        for tool in tools
+    ])
@@ -0,0 +1,104 @@
+"""
+测试公共配置
+
+src.config 在导入时读取环境变量并创建 LLM 客户端，因此在导入任何被测模块之前：
+设置占位的模型配置，并把论文保存目录与各类缓存指向本次测试会话的临时目录，避免读写项目下的 papers/ 与 .cache/。
+下载相关测试共用本地论文服务（`server`）与生成的 PDF（`paper_pdf`）。
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
+
+_session_dir = tempfile.mkdtemp(prefix="paper-survey-tests-")
+os.environ.setdefault("DEFAULT_MODEL", "gpt-4o-mini")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["SAVE_DIR"] = os.path.join(_session_dir, "papers")
+os.environ["SEARCH_CACHE_PATH"] = os.path.join(_session_dir, "search_cache.sqlite")
+os.environ["NEGATIVE_CACHE_PATH"] = os.path.join(_session_dir, "negative_cache.sqlite")
+# 下载相关测试直接检查单次请求的行为，不经过负缓存
+os.environ["NEGATIVE_CACHE_ENABLED"] = "false"
+
+
+class PaperServer(ThreadingHTTPServer):
+    """按路径提供文件的测试服务：支持 ETag 条件请求与 If-Range 续传，可让下一次响应在中途断开"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PaperHandler)
+        self.files: Dict[str, tuple[bytes, str, str]] = {}  # 路径 → (内容, Content-Type, ETag)
+        self.requests: list[Dict[str, Any]] = []
+        self.truncate_next: Optional[str] = None
+
+    @property
+    def origin(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def add(self, path: str, body: bytes, content_type: str = "application/pdf") -> str:
+        self.files[path] = (body, content_type, f'"{hashlib.sha256(body).hexdigest()[:16]}"')
+        return self.origin + path
+
+
+class PaperHandler(BaseHTTPRequestHandler):
+    server: PaperServer
+
+    def do_GET(self):
+        self.server.requests.append({"path": self.path, **self.headers})
+        body, content_type, etag = self.server.files[self.path]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        status, start = 200, 0
+        byte_range = self.headers.get("Range", "")
+        if byte_range.startswith("bytes=") and self.headers.get("If-Range") == etag:
+            status, start = 206, int(byte_range[len("bytes="):].rstrip("-"))
+        payload = body[start:]
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+        if self.server.truncate_next == self.path:
+            # 声明完整长度，只发送一半后断开
+            self.server.truncate_next = None
+            self.wfile.write(payload[:len(payload) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    paper_server = PaperServer()
+    thread = threading.Thread(target=paper_server.serve_forever, daemon=True)
+    thread.start()
+    yield paper_server
+    paper_server.shutdown()
+    paper_server.server_close()
+
+
+@pytest.fixture(scope="module")
+def paper_pdf() -> bytes:
+    from benchmarks.pdf_fixtures import make_paper_pdf
+
+    return make_paper_pdf("Conditional requests and resumable downloads", num_pages=2, seed=7)
@@ -0,0 +1,89 @@
+"""异步下载引擎：单主机并发上限、本地命中、条件请求与事件循环外的阻塞操作"""
+
+import asyncio
+import hashlib
+import threading
+
+from src.services import async_downloader
+from src.services.async_downloader import AsyncDownloadEngine, BackgroundDownloadEngine
+from src.services.paper_store import get_paper_manifest
+from src.tools import download_tools
+from src.tools.download_tools import NotPdfError
+
+
+def download_many(urls, **engine_kwargs):
+    async def run():
+        async with AsyncDownloadEngine(**engine_kwargs) as engine:
+            return await engine.download_many(urls), engine.stats()
+
+    return asyncio.run(run())
+
+
+def test_download_many_respects_per_host_limit(server, paper_pdf):
+    urls = [server.add(f"/batch-{i}.pdf", paper_pdf + str(i).encode()) for i in range(6)]
+    results, stats = download_many(urls, max_concurrency=8, per_host=2)
+    assert [result["url"] for result in results] == urls
+    assert stats["downloaded"] == 6 and stats["peak_concurrency"] <= 2
+    for i, result in enumerate(results):
+        assert result["sha256"] == hashlib.sha256(paper_pdf + str(i).encode()).hexdigest()
+        assert get_paper_manifest().lookup(urls[i])["sha256"] == result["sha256"]
+
+
+def test_downloaded_papers_are_reused_from_manifest(server, paper_pdf):
+    url = server.add("/async-cached.pdf", paper_pdf)
+    download_many([url])
+    results, stats = download_many([url])
+    assert results[0]["cached"] and stats["cached"] == 1
+    assert len(server.requests) == 1
+
+
+def test_revalidation_sends_conditional_request(server, paper_pdf, monkeypatch):
+    url = server.add("/async-revalidate.pdf", paper_pdf)
+    download_many([url])
+    monkeypatch.setattr(download_tools, "DOWNLOAD_REVALIDATE_AFTER", 0)
+    results, stats = download_many([url])
+    assert results[0]["cached"] and stats["not_modified"] == 1
+    assert server.requests[-1]["If-None-Match"] == server.files["/async-revalidate.pdf"][2]
+
+
+def test_failures_are_returned_in_place(server, paper_pdf):
+    good = server.add("/async-good.pdf", paper_pdf)
+    bad = server.add("/async-landing", b"<html>" + b"x" * 4096 + b"</html>", content_type="application/octet-stream")
+    results, stats = download_many([bad, good], max_retries=0)
+    assert isinstance(results[0], NotPdfError)
+    assert results[1]["url"] == good
+    assert stats["failed"] == 1 and get_paper_manifest().lookup(bad) is None
+
+
+def test_blocking_work_runs_off_the_event_loop(server, paper_pdf, monkeypatch):
+    threads = []
+    write_block, commit = async_downloader._write_block, AsyncDownloadEngine._commit
+
+    def record_write(*args):
+        threads.append(threading.current_thread())
+        return write_block(*args)
+
+    def record_commit(self, *args):
+        threads.append(threading.current_thread())
+        return commit(self, *args)
+
+    monkeypatch.setattr(async_downloader, "_write_block", record_write)
+    monkeypatch.setattr(AsyncDownloadEngine, "_commit", record_commit)
+
+    async def run() -> threading.Thread:
+        async with AsyncDownloadEngine() as engine:
+            await engine.download(server.add("/async-threads.pdf", paper_pdf))
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) >= 2
+    assert all(thread is not loop_thread for thread in threads)
+
+
+def test_background_engine_returns_text(server, paper_pdf):
+    engine = BackgroundDownloadEngine()
+    try:
+        result = engine.fetch_paper(server.add("/async-text.pdf", paper_pdf))
+    finally:
+        engine.close()
+    assert "PDF文件已保存到" in result and "Conditional requests" in result
@@ -0,0 +1,218 @@
+"""CORE API 封装：异步搜索路径、分页、CORE 全文保存与运行级重排序配置（CORE 请求替换为内存中的假服务）"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import pytest
+
+from src.services.core_api import CoreAPIWrapper
+from src.services.paper_store import get_paper_manifest
+from src.services.prefetch_queue import get_prefetch_queue
+from src.services.search_cache import SearchCache, get_search_cache
+from src.tools.download_tools import download_paper
+
+
+class FakeCore:
+    """按查询确定性生成结果的假 CORE 搜索服务，记录每次请求的 (query, limit, offset)；scroll 游标为下一页的偏移"""
+
+    def __init__(self, total_hits: int = 1000):
+        self.total_hits = total_hits
+        self.requests: list[tuple[str, int, int]] = []
+
+    def search(
+        self, query: str, limit: int, offset: int, scroll: bool = False, scroll_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if scroll_id:
+            offset = int(scroll_id)
+        self.requests.append((query, limit, offset))
+        end = min(offset + limit, self.total_hits)
+        results = [
+            {"id": f"{query}-{i}", "title": f"{query} paper {i}", "abstract": f"About {query}.", "yearPublished": 2024}
+            for i in range(offset, end)
+        ]
+        response = {"totalHits": self.total_hits, "results": results}
+        if scroll or scroll_id:
+            response["scrollId"] = str(end)
+        return response
+
+
+@pytest.fixture
+def core(monkeypatch) -> FakeCore:
+    fake = FakeCore()
+
+    def request_search(self, query: str, limit: Optional[int] = None, offset: int = 0, *args) -> Dict[str, Any]:
+        return fake.search(query, limit or self.top_k_results, offset, *args)
+
+    async def arequest_search(self, query: str, limit: Optional[int] = None, offset: int = 0, *args) -> Dict[str, Any]:
+        return request_search(self, query, limit, offset, *args)
+
+    monkeypatch.setattr(CoreAPIWrapper, "_request_search", request_search)
+    monkeypatch.setattr(CoreAPIWrapper, "_arequest_search", arequest_search)
+    get_search_cache().clear()
+    return fake
+
+
+def test_asearch_returns_formatted_results_and_reuses_cache(core):
+    first = asyncio.run(CoreAPIWrapper(top_k_results=3).asearch("graph networks"))
+    assert "graph networks paper 0" in first and "graph networks paper 2" in first
+    second = asyncio.run(CoreAPIWrapper(top_k_results=3).asearch("graph networks"))
+    assert second == first
+    assert core.requests == [("graph networks", 3, 0)]
+
+
+def test_asearch_keeps_blocking_work_off_the_event_loop(core, monkeypatch):
+    threads = []
+    cache_get, cache_set = SearchCache.get, SearchCache.set
+
+    def record(name, func):
+        def wrapper(*args, **kwargs):
+            threads.append((name, threading.current_thread()))
+            return func(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(SearchCache, "get", record("cache.get", cache_get))
+    monkeypatch.setattr(SearchCache, "set", record("cache.set", cache_set))
+    monkeypatch.setattr(CoreAPIWrapper, "_dispatch_downloads", record("dispatch", lambda *args: None))
+
+    async def search() -> threading.Thread:
+        await CoreAPIWrapper(top_k_results=2).asearch("event loops")
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(search())
+    assert [name for name, _ in threads] == ["cache.get", "cache.set", "dispatch"]
+    # SQLite 缓存读写与下载分发都不在事件循环所在的线程中执行
+    assert all(thread is not loop_thread for _, thread in threads)
+
+
+def test_async_search_tool_runs_natively(core):
+    from src.tools.search_tools import search_papers
+
+    result = asyncio.run(search_papers.ainvoke({"query": "tool path", "max_papers": 2}))
+    assert "tool path paper 1" in result
+    assert core.requests == [("tool path", 2, 0)]
+
+
+def test_offset_paging_stops_at_total_hits(core):
+    core.total_hits = 250
+    pages = list(CoreAPIWrapper().iter_search_pages("deep paging", page_size=100, prefetch=3))
+    assert [len(page) for page in pages] == [100, 100, 50]
+    # 得知结果总数后不再请求超出 totalHits 的页
+    assert sorted(offset for _, _, offset in core.requests) == [0, 100, 200]
+    assert [limit for _, limit, _ in sorted(core.requests, key=lambda request: request[2])] == [100, 100, 50]
+
+
+def test_offset_paging_respects_max_results(core):
+    results = list(CoreAPIWrapper().iter_search_results("bounded", max_results=130, page_size=50))
+    assert len(results) == 130
+    assert results[-1]["id"] == "bounded-129"
+    assert max(offset + limit for _, limit, offset in core.requests) == 130
+
+
+def test_stopping_early_does_not_fetch_every_page(core):
+    for page in CoreAPIWrapper().iter_search_pages("lazy", page_size=10, prefetch=2):
+        break
+    # 首页 + 预取窗口内的页，远少于结果总数对应的 100 页
+    assert len(core.requests) <= 3
+
+
+def test_scroll_paging_follows_cursor_until_exhausted(core):
+    core.total_hits = 25
+    pages = list(CoreAPIWrapper().iter_search_pages("scrolling", page_size=10, use_scroll=True))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [offset for _, _, offset in core.requests] == [0, 10, 20]
+
+
+def test_scroll_paging_respects_max_results(core):
+    results = list(CoreAPIWrapper().iter_search_results("scroll cap", max_results=15, page_size=10, use_scroll=True))
+    assert len(results) == 15
+    assert len(core.requests) == 2
+
+
+def test_search_beyond_page_cap_is_paginated(core):
+    core.total_hits = 150
+    result = asyncio.run(CoreAPIWrapper(top_k_results=180).asearch("wide", id_only=True))
+    assert "wide-0" in result
+    # 单次请求最多 100 条，第二页不足 limit 时停止
+    assert core.requests == [("wide", 100, 0), ("wide", 80, 100)]
+
+
+def fulltext_result(paper_id: str, text: str = "Full text body. " * 200) -> Dict[str, Any]:
+    return {
+        "id": paper_id,
+        "title": f"Paper {paper_id}",
+        "abstract": "Abstract.",
+        "downloadUrl": f"https://repo.test/{paper_id}.pdf",
+        "fullText": text,
+    }
+
+
+def manifest_lines(core_id: str) -> int:
+    manifest = get_paper_manifest()
+    with open(manifest.path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if f'"core_id": "{core_id}"' in line)
+
+
+def test_fulltext_results_skip_pdf_download(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(CoreAPIWrapper, "_enqueue_downloads", staticmethod(lambda downloads, mirrors=None: enqueued.append(downloads)))
+    results = [fulltext_result("ft-1"), fulltext_result("ft-2", text="too short")]
+    CoreAPIWrapper()._dispatch_downloads({"results": results}, "full text")
+    # 全文过短的结果仍然下载 PDF
+    assert enqueued == [{"https://repo.test/ft-2.pdf": "ft-2"}]
+    # download-paper 直接从论文清单返回已保存的全文，不经过预取队列
+    assert get_prefetch_queue().get("https://repo.test/ft-1.pdf") is None
+    assert "Full text body." in download_paper.invoke({"url": "https://repo.test/ft-1.pdf"})
+
+
+def test_repeated_searches_do_not_rewrite_stored_fulltexts(monkeypatch):
+    monkeypatch.setattr(CoreAPIWrapper, "_enqueue_downloads", staticmethod(lambda downloads, mirrors=None: None))
+    results = [fulltext_result(f"repeat-{i}") for i in range(3)]
+    for _ in range(3):
+        CoreAPIWrapper()._dispatch_downloads({"results": results}, "repeat")
+    assert [manifest_lines(f"repeat-{i}") for i in range(3)] == [1, 1, 1]
+
+    # 全文内容变化时保存新版本
+    CoreAPIWrapper()._dispatch_downloads({"results": [fulltext_result("repeat-0", text="Revised text. " * 200)]}, "repeat")
+    assert manifest_lines("repeat-0") == 2
+    assert "Revised text." in download_paper.invoke({"url": "https://repo.test/repeat-0.pdf"})
+
+
+def test_run_topic_and_overrides_reach_the_reranker(core, monkeypatch):
+    from src.core.nodes import _with_run_options
+    from src.services import core_api
+    from src.tools.search_tools import search_papers
+
+    state = {"topic": "protein folding", "rerank_top_k": 1, "rerank_min_score": None}
+    tool_call = {"name": "search-papers", "args": {"query": "graph networks", "max_papers": 3}, "id": "call-1"}
+    args = _with_run_options(tool_call, state)
+    assert args == {"query": "graph networks", "max_papers": 3, "topic": "protein folding", "rerank_top_k": 1}
+    # 其他工具的参数不变
+    assert _with_run_options({"name": "download-paper", "args": {"url": "u"}}, state) == {"url": "u"}
+
+    calls = []
+
+    def select(ranker, topic, results, top_k, min_score):
+        calls.append((topic, top_k, min_score))
+        return results[:top_k]
+
+    monkeypatch.setattr(core_api, "select_for_download", select)
+    monkeypatch.setattr(CoreAPIWrapper, "_enqueue_downloads", staticmethod(lambda downloads, mirrors=None: None))
+    search_papers.invoke(args)
+    assert calls == [("protein folding graph networks", 1, core_api.RERANK_MIN_SCORE)]
+
+
+def test_rerank_defaults_do_not_cap_downloads(monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(CoreAPIWrapper, "_enqueue_downloads", staticmethod(lambda downloads, mirrors=None: enqueued.append(downloads)))
+    results = [{"id": f"cap-{i}", "title": f"Paper {i}", "downloadUrl": f"https://repo.test/cap-{i}.pdf"} for i in range(15)]
+    CoreAPIWrapper()._dispatch_downloads({"results": results}, "unrelated query")
+    assert len(enqueued[0]) == 15
+
+
+def test_search_cache_is_separate_per_base_url(core, monkeypatch):
+    CoreAPIWrapper(top_k_results=2).search("cached per server")
+    monkeypatch.setattr(CoreAPIWrapper, "base_url", "http://127.0.0.1:8765/v3")
+    CoreAPIWrapper(top_k_results=2).search("cached per server")
+    # 切换到桩服务后不读取真实 API 的缓存结果
+    assert len(core.requests) == 2
@@ -0,0 +1,153 @@
+"""论文下载调度器：优先级、单主机并发上限、重试次数、重试预算与对冲请求名额"""
+
+import threading
+import time
+
+import pytest
+
+from src.services import download_scheduler
+from src.services.download_scheduler import DownloadScheduler, RetryLater, backoff_delay
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """重试不等待，测试只关心重试次数"""
+    monkeypatch.setattr(download_scheduler, "backoff_delay", lambda attempt: 0.0)
+
+
+def test_backoff_delay_is_full_jitter_with_cap():
+    for attempt in range(8):
+        delays = [backoff_delay(attempt, base=1.0, cap=10.0) for _ in range(200)]
+        assert all(0 <= delay <= min(10.0, 2 ** attempt) for delay in delays)
+        # 全抖动：取值分布在整个区间内，而不是集中在上限附近
+        assert min(delays) < min(10.0, 2 ** attempt) / 2
+
+
+def test_jobs_run_in_priority_order():
+    scheduler = DownloadScheduler(max_concurrency=1, per_host=1)
+    gate = threading.Event()
+    order = []
+    scheduler.submit("http://a.test/blocker", gate.wait)
+    time.sleep(0.05)
+    futures = [
+        scheduler.submit(f"http://a.test/{priority}", order.append, priority, priority=priority)
+        for priority in (3, 1, 2, 0)
+    ]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    scheduler.shutdown()
+    assert order == [0, 1, 2, 3]
+
+
+def test_per_host_limit():
+    scheduler = DownloadScheduler(max_concurrency=4, per_host=2)
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def job(host: str) -> None:
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        time.sleep(0.05)
+        with lock:
+            running[host] -= 1
+
+    futures = [scheduler.submit(f"http://{host}/{i}", job, host) for i in range(6) for host in ("a.test", "b.test")]
+    for future in futures:
+        future.result(timeout=5)
+    scheduler.shutdown()
+    assert peak == {"a.test": 2, "b.test": 2}
+
+
+def test_busy_host_does_not_block_other_hosts():
+    scheduler = DownloadScheduler(max_concurrency=2, per_host=1)
+    gate = threading.Event()
+    scheduler.submit("http://slow.test/1", gate.wait)
+    queued = scheduler.submit("http://slow.test/2", lambda: "slow")
+    # 优先级更低，但所属主机有空闲名额，先于 slow.test 的排队任务执行
+    other = scheduler.submit("http://fast.test/1", lambda: "fast", priority=10)
+    assert other.result(timeout=5) == "fast"
+    assert not queued.done()
+    gate.set()
+    assert queued.result(timeout=5) == "slow"
+    scheduler.shutdown()
+
+
+def test_retries_are_capped(no_backoff):
+    scheduler = DownloadScheduler(max_concurrency=1, host_retry_budget=-1)
+    attempts = []
+
+    def flaky(final_attempt: bool) -> None:
+        attempts.append(final_attempt)
+        raise RetryLater(ConnectionError("reset"))
+
+    future = scheduler.submit("http://a.test/x", flaky, max_retries=2)
+    with pytest.raises(ConnectionError):
+        future.result(timeout=5)
+    scheduler.shutdown()
+    # 首次 + 2 次重试，只有最后一次标记为 final_attempt
+    assert attempts == [False, False, True]
+    stats = scheduler.stats()
+    assert (stats["retries"], stats["retries_exhausted"], stats["failed"]) == (2, 1, 1)
+
+
+def test_retry_succeeds_after_transient_failure(no_backoff):
+    scheduler = DownloadScheduler(max_concurrency=1, host_retry_budget=-1)
+    attempts = []
+
+    def flaky(final_attempt: bool) -> str:
+        attempts.append(final_attempt)
+        if len(attempts) == 1:
+            raise RetryLater(ConnectionError("reset"))
+        return "ok"
+
+    assert scheduler.submit("http://a.test/x", flaky, max_retries=3).result(timeout=5) == "ok"
+    scheduler.shutdown()
+    assert len(attempts) == 2
+
+
+def test_host_retry_budget(no_backoff):
+    scheduler = DownloadScheduler(max_concurrency=1, host_retry_budget=1, retry_window=60)
+
+    def always_fails(final_attempt: bool) -> None:
+        raise RetryLater(ConnectionError("reset"))
+
+    futures = [scheduler.submit(f"http://a.test/{i}", always_fails, max_retries=5) for i in range(2)]
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+    scheduler.shutdown()
+    # 主机在窗口内只允许 1 次重试
+    assert scheduler.stats()["retries_by_host"] == {"a.test": 1}
+
+
+def test_retry_after_is_respected(no_backoff):
+    scheduler = DownloadScheduler(max_concurrency=1, host_retry_budget=-1)
+    started = []
+
+    def throttled(final_attempt: bool) -> str:
+        started.append(time.monotonic())
+        if len(started) == 1:
+            raise RetryLater(ConnectionError("429"), delay=0.2)
+        return "ok"
+
+    assert scheduler.submit("http://a.test/x", throttled, max_retries=1).result(timeout=5) == "ok"
+    scheduler.shutdown()
+    assert started[1] - started[0] >= 0.2
+
+
+def test_hedge_slots_count_against_per_host_limit():
+    scheduler = DownloadScheduler(max_concurrency=2, per_host=1)
+    assert scheduler.try_acquire_host("http://a.test/mirror.pdf")
+    assert not scheduler.try_acquire_host("http://a.test/other.pdf")
+    # 对冲请求占用名额期间，同主机的下载任务排队等待
+    future = scheduler.submit("http://a.test/job.pdf", lambda: "done")
+    time.sleep(0.1)
+    assert not future.done()
+    assert scheduler.stats()["hedging_by_host"] == {"a.test": 1}
+    scheduler.release_host("http://a.test/mirror.pdf")
+    assert future.result(timeout=5) == "done"
+    scheduler.shutdown()
+    assert scheduler.stats()["hedging_by_host"] == {}
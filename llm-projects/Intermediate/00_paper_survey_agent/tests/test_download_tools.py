@@ -0,0 +1,189 @@
+"""论文下载：流式写入、未完成下载的并发控制、论文清单登记、条件请求（304）、断点续传（Range）、镜像竞速与 PDF 文件头检查"""
+
+import fcntl
+import hashlib
+import os
+import threading
+import time
+
+import pytest
+
+from src.services.download_scheduler import RetryLater
+from src.services.paper_store import get_paper_manifest
+from src.tools import download_tools
+from src.tools.download_tools import DownloadError, NotPdfError, PartialDownload, fetch_paper
+
+
+def test_streamed_download_is_saved_and_extracted(server, paper_pdf):
+    url = server.add("/stream.pdf", paper_pdf)
+    result = fetch_paper(url)
+    assert "PDF文件已保存到" in result and "Conditional requests" in result
+    filepath = result.splitlines()[0].split(": ", 1)[1]
+    with open(filepath, "rb") as f:
+        assert f.read() == paper_pdf
+    # 临时文件与锁文件均已清理
+    partial = PartialDownload(url)
+    assert partial.size == 0 and not os.path.exists(partial.lock_path)
+
+
+def test_download_registers_manifest_and_returns_text(server, paper_pdf):
+    url = server.add("/fresh.pdf", paper_pdf)
+    result = fetch_paper(url, core_id="fresh-1")
+    assert "PDF文件已保存到" in result and "Conditional requests" in result
+
+    record = get_paper_manifest().lookup(url)
+    assert record["sha256"] == hashlib.sha256(paper_pdf).hexdigest()
+    assert record["etag"] == server.files["/fresh.pdf"][2]
+    # 再次请求（按链接或 CORE id）直接读取本地文件，不发送请求
+    assert "论文已存在于本地" in fetch_paper(url)
+    assert "论文已存在于本地" in fetch_paper("https://repo.test/other-link.pdf", core_id="fresh-1")
+    assert len(server.requests) == 1
+
+
+def test_concurrent_downloads_of_one_url_are_serialized(server, paper_pdf):
+    url = server.add("/shared.pdf", paper_pdf)
+    results = []
+    with PartialDownload(url).lock():
+        worker = threading.Thread(target=lambda: results.append(fetch_paper(url)))
+        worker.start()
+        time.sleep(0.2)
+        # 其他任务持有锁时不发送请求，也不写入未完成下载
+        assert server.requests == []
+    worker.join(timeout=10)
+    assert "PDF文件已保存到" in results[0]
+    assert len(server.requests) == 1
+
+    # 等待期间同一链接已由其他任务下载完成时，直接返回已保存的论文
+    results.clear()
+    with PartialDownload(url).lock():
+        worker = threading.Thread(target=lambda: results.append(fetch_paper(url)))
+        worker.start()
+        time.sleep(0.1)
+    worker.join(timeout=10)
+    assert "论文已存在于本地" in results[0]
+    assert len(server.requests) == 1
+
+
+def test_final_failure_discards_partial_download(server, paper_pdf):
+    url = server.add("/broken.pdf", paper_pdf)
+    server.truncate_next = "/broken.pdf"
+    with pytest.raises(DownloadError):
+        fetch_paper(url, final_attempt=True)
+    # 不再重试时不保留为续传准备的内容
+    partial = PartialDownload(url)
+    assert partial.size == 0
+    assert not os.path.exists(partial.meta_path) and not os.path.exists(partial.lock_path)
+
+
+def test_discard_if_idle_keeps_partial_being_written(tmp_path):
+    url = "https://repo.test/busy.pdf"
+    partial = PartialDownload(url, save_dir=str(tmp_path))
+    os.makedirs(partial.directory)
+    with open(partial.path, "wb") as f:
+        f.write(b"%PDF-partial")
+    with partial.lock():
+        # 其他线程不等待锁，直接放弃删除
+        done = []
+        checker = threading.Thread(target=lambda: done.append(PartialDownload(url, save_dir=str(tmp_path)).discard_if_idle()))
+        checker.start()
+        checker.join(timeout=5)
+        assert done == [False]
+    # 另一进程持有文件锁时同样保留
+    with open(partial.lock_path, "a") as other_process:
+        fcntl.flock(other_process, fcntl.LOCK_EX)
+        assert not partial.discard_if_idle()
+    assert partial.size > 0
+    assert partial.discard_if_idle()
+    assert partial.size == 0 and not os.path.exists(partial.lock_path)
+
+
+def test_revalidation_reuses_local_file_on_304(server, paper_pdf, monkeypatch):
+    url = server.add("/revalidate.pdf", paper_pdf)
+    fetch_paper(url)
+    monkeypatch.setattr(download_tools, "DOWNLOAD_REVALIDATE_AFTER", 0)
+
+    result = fetch_paper(url)
+    assert "论文已存在于本地" in result
+    assert server.requests[-1]["If-None-Match"] == server.files["/revalidate.pdf"][2]
+    assert len(server.requests) == 2
+
+
+def test_interrupted_download_resumes_with_range(server, paper_pdf):
+    url = server.add("/resume.pdf", paper_pdf)
+    server.truncate_next = "/resume.pdf"
+    # 非最后一次尝试：临时失败交由调度器重试，已接收的部分保留
+    with pytest.raises(RetryLater):
+        fetch_paper(url, final_attempt=False)
+    received = PartialDownload(url).size
+    assert 0 < received < len(paper_pdf)
+
+    result = fetch_paper(url)
+    assert "PDF文件已保存到" in result
+    resumed = server.requests[-1]
+    assert resumed["Range"] == f"bytes={received}-"
+    assert resumed["If-Range"] == server.files["/resume.pdf"][2]
+    # 续传拼接后的内容与原文件一致，未完成的部分已清理
+    assert get_paper_manifest().lookup(url)["sha256"] == hashlib.sha256(paper_pdf).hexdigest()
+    assert PartialDownload(url).size == 0
+
+
+def test_changed_file_restarts_instead_of_resuming(server, paper_pdf):
+    url = server.add("/changed.pdf", paper_pdf)
+    server.truncate_next = "/changed.pdf"
+    with pytest.raises(RetryLater):
+        fetch_paper(url, final_attempt=False)
+    # 服务器端文件已变化：If-Range 不匹配，返回完整的新文件而不是拼接到旧的部分之后
+    updated = paper_pdf + b"\n% revised\n"
+    server.add("/changed.pdf", updated)
+    assert "PDF文件已保存到" in fetch_paper(url)
+    assert get_paper_manifest().lookup(url)["sha256"] == hashlib.sha256(updated).hexdigest()
+
+
+def test_mirror_wins_when_primary_fails(server, paper_pdf):
+    primary = "http://127.0.0.1:1/unreachable.pdf"
+    mirror = server.add("/mirror.pdf", paper_pdf)
+    result = fetch_paper(primary, core_id="mirrored-1", mirrors=[mirror])
+    assert "PDF文件已保存到" in result
+    # 以主链接登记同一内容，但镜像的校验器不属于主链接
+    record = get_paper_manifest().lookup(primary)
+    assert record["sha256"] == hashlib.sha256(paper_pdf).hexdigest()
+    assert record["etag"] is None
+    assert get_paper_manifest().lookup(mirror)["etag"] == server.files["/mirror.pdf"][2]
+
+
+def test_non_pdf_response_is_rejected(server):
+    url = server.add("/landing", b"<html>" + b"x" * 4096 + b"</html>", content_type="application/octet-stream")
+    with pytest.raises(NotPdfError):
+        fetch_paper(url)
+    assert get_paper_manifest().lookup(url) is None
+    assert PartialDownload(url).size == 0
+
+
+def test_html_content_type_is_rejected_before_reading_body(server):
+    url = server.add("/login", b"%PDF-" + b"x" * 4096, content_type="text/html; charset=utf-8")
+    with pytest.raises(NotPdfError, match="text/html"):
+        fetch_paper(url)
+    assert get_paper_manifest().lookup(url) is None
+
+
+class _ResumedResponse:
+    """续传的 206 响应（只用于 PartialDownload.write 的大小上限检查，不会被读取）"""
+
+    status = 206
+
+    def __init__(self, offset: int, total: int):
+        self.headers = {"Content-Range": f"bytes {offset}-{total - 1}/{total}", "ETag": '"v1"'}
+
+    def read1(self, size: int) -> bytes:
+        raise AssertionError("达到上限后不应继续读取响应体")
+
+
+def test_resume_at_size_limit_aborts(tmp_path):
+    partial = PartialDownload("https://repo.test/huge.pdf", save_dir=str(tmp_path))
+    os.makedirs(partial.directory)
+    with open(partial.path, "wb") as f:
+        f.write(b"%PDF-" + b"x" * 95)
+    # 已接收的字节达到上限：剩余额度为 0 不能当作“不限制”
+    with pytest.raises(DownloadError, match="上限"):
+        partial.write(_ResumedResponse(100, 200), max_bytes=100)
+    assert partial.size == 0
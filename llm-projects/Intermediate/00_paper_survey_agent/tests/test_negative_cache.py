@@ -0,0 +1,75 @@
+"""下载失败负缓存与按主机的熔断器"""
+
+import time
+
+from src.services.negative_cache import FAILURE_NON_PDF, NegativeCache
+
+
+def make_cache(tmp_path, ttl_seconds=3600, breaker_threshold=3, breaker_cooldown=60.0):
+    return NegativeCache(str(tmp_path / "failures.sqlite"), ttl_seconds, breaker_threshold, breaker_cooldown)
+
+
+def test_failed_url_is_skipped_until_success(tmp_path):
+    cache = make_cache(tmp_path)
+    url = "https://repo.test/paper.pdf"
+    assert cache.check(url) is None
+    cache.record_failure(url, 404, "not found")
+    assert "not found" in cache.check(url)
+    cache.record_success(url)
+    assert cache.check(url) is None
+
+
+def test_transient_failures_expire_sooner_than_permanent(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=2.4)
+    cache.record_failure("https://a.test/gone.pdf", 404)
+    cache.record_failure("https://b.test/busy.pdf", 503)
+    # 临时性失败的有效期为 ttl / 24 = 0.1 秒
+    time.sleep(0.15)
+    assert cache.check("https://b.test/busy.pdf") is None
+    assert cache.check("https://a.test/gone.pdf") is not None
+
+
+def test_repeated_failures_back_off_exponentially(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=100)
+    url = "https://a.test/gone.pdf"
+
+    def expires_in() -> float:
+        conn = cache._connect()
+        return conn.execute("SELECT expires_at FROM failed_urls WHERE url = ?", (url,)).fetchone()[0] - time.time()
+
+    cache.record_failure(url, 404)
+    first = expires_in()
+    cache.record_failure(url, 404)
+    assert expires_in() > first * 1.9
+
+
+def test_breaker_opens_after_consecutive_host_failures(tmp_path):
+    cache = make_cache(tmp_path, breaker_threshold=2)
+    cache.record_failure("https://down.test/1.pdf", 503)
+    assert cache.check("https://down.test/other.pdf") is None
+    cache.record_failure("https://down.test/2.pdf", 503)
+    reason = cache.check("https://down.test/other.pdf")
+    assert reason is not None and "熔断" in reason
+    # 其他主机不受影响
+    assert cache.check("https://up.test/1.pdf") is None
+    assert cache.stats()["open_hosts"] == 1
+
+
+def test_breaker_half_open_allows_single_probe(tmp_path):
+    cache = make_cache(tmp_path, breaker_threshold=1, breaker_cooldown=0.05)
+    cache.record_failure("https://down.test/1.pdf", 503)
+    assert cache.check("https://down.test/2.pdf") is not None
+    time.sleep(0.1)
+    # 冷却结束后只放行一个探测请求
+    assert cache.check("https://down.test/2.pdf") is None
+    assert cache.check("https://down.test/3.pdf") is not None
+    cache.record_success("https://down.test/2.pdf")
+    assert cache.check("https://down.test/3.pdf") is None
+
+
+def test_non_pdf_failures_do_not_trip_the_breaker(tmp_path):
+    cache = make_cache(tmp_path, breaker_threshold=1)
+    cache.record_failure("https://repo.test/landing", 200, "HTML 落地页", kind=FAILURE_NON_PDF)
+    assert cache.check("https://repo.test/landing") is not None
+    assert cache.check("https://repo.test/paper.pdf") is None
+    assert cache.stats()["blocked_by_kind"] == {FAILURE_NON_PDF: 1}
@@ -0,0 +1,81 @@
+"""论文处理服务：PDF 在进程池中并行解析、单个文件的超时与失败隔离"""
+
+import threading
+import time
+
+import pytest
+
+from benchmarks.pdf_fixtures import make_paper_pdf
+from src.services import paper_service, text_cache
+from src.services.paper_service import PaperService
+from src.services.text_cache import extract_pdf_chunk, get_text_cache
+
+
+@pytest.fixture
+def save_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(paper_service, "SAVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def write_pdfs(directory, count: int, seed: int) -> list[str]:
+    """写入 count 个不同的 PDF（解析文本缓存按内容命中，各测试使用不同的 seed）"""
+    names = []
+    for i in range(count):
+        name = f"paper-{i}.pdf"
+        (directory / name).write_bytes(make_paper_pdf(f"Process pool paper {i}", num_pages=1, seed=seed + i))
+        names.append(name)
+    return names
+
+
+def test_chunk_times_out_slow_file_and_keeps_others(tmp_path, paper_pdf, monkeypatch):
+    slow, good = tmp_path / "slow.pdf", tmp_path / "good.pdf"
+    slow.write_bytes(paper_pdf)
+    good.write_bytes(paper_pdf)
+    extract_pdf = text_cache.extract_pdf
+
+    def slow_extract(filepath):
+        if filepath == str(slow):
+            time.sleep(30)
+        return extract_pdf(filepath)
+
+    monkeypatch.setattr(text_cache, "extract_pdf", slow_extract)
+    started = time.monotonic()
+    results = extract_pdf_chunk([str(slow), str(good)], timeout=5)
+    assert time.monotonic() - started < 20
+    assert results[0][1] is None and results[0][2].startswith("TimeoutError")
+    assert results[1][2] is None and "Conditional requests" in results[1][1]["text"]
+
+
+def test_pool_parses_in_filename_order_and_skips_broken_files(save_dir):
+    names = write_pdfs(save_dir, 5, seed=100)
+    (save_dir / "broken.pdf").write_bytes(b"%PDF-1.4 not really a pdf")
+    papers = PaperService(extract_workers=2).extract_paper_content_from_save_dir()
+    assert [paper["filename"] for paper in papers] == names
+    assert all(f"Process pool paper {i}" in paper["content"] for i, paper in enumerate(papers))
+    # 解析结果已缓存，之后的运行不再解析
+    hits = get_text_cache().stats()["hits"]
+    assert PaperService(extract_workers=2).extract_paper_content_from_save_dir() == papers
+    assert get_text_cache().stats()["hits"] == hits + len(names)
+
+
+def test_timeout_is_enforced_in_pool_when_not_on_main_thread(save_dir, monkeypatch):
+    write_pdfs(save_dir, 1, seed=200)
+    pools = []
+    pool_class = paper_service.ProcessPoolExecutor
+
+    class RecordingPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            pools.append(kwargs.get("max_workers"))
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(paper_service, "ProcessPoolExecutor", RecordingPool)
+    monkeypatch.setattr(paper_service, "PDF_EXTRACT_TIMEOUT", 30)
+    papers = []
+    # 工作线程中无法使用 SIGALRM，即使只有一个进程也交由进程池解析
+    worker = threading.Thread(
+        target=lambda: papers.extend(PaperService(extract_workers=1).extract_paper_content_from_save_dir())
+    )
+    worker.start()
+    worker.join(timeout=60)
+    assert pools == [1]
+    assert len(papers) == 1
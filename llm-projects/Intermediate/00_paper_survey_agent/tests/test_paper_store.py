@@ -0,0 +1,221 @@
+"""本地论文存储：链接规范化、内容寻址保存、JSONL 清单与容量淘汰"""
+
+import os
+import subprocess
+import sys
+import time
+
+from src.services import paper_service
+from src.services.paper_service import PaperService
+from src.services.paper_store import (
+    MANIFEST_FILENAME, QUOTA_DIRNAME, TEXT_DIRNAME, PaperManifest, PaperStoreQuota, get_paper_manifest, normalize_url,
+    store_content,
+)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_paper(save_dir, content: bytes, age: float = 0.0) -> tuple[str, str]:
+    """按内容寻址保存一篇论文并登记清单，修改时间设为 age 秒之前；返回 (路径, 内容哈希)"""
+    filepath, size, sha256 = store_content([content], ".pdf", str(save_dir))
+    get_paper_manifest(str(save_dir)).add(sha256, os.path.basename(filepath), size, url=f"https://repo.test/{sha256[:8]}")
+    mtime = time.time() - age
+    os.utime(filepath, (mtime, mtime))
+    return filepath, sha256
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Repo.Test:443/a/b.pdf/?utm_source=x&b=2&a=1#page=2") == "repo.test/a/b.pdf?a=1&b=2"
+    assert normalize_url("http://arxiv.org/abs/2101.00001") == normalize_url("https://arxiv.org/pdf/2101.00001.pdf")
+
+
+def test_store_content_deduplicates(tmp_path):
+    first, _, sha256 = store_content([b"%PDF-", b"same"], ".pdf", str(tmp_path))
+    second, _, _ = store_content([b"%PDF-same"], ".pdf", str(tmp_path))
+    assert first == second == str(tmp_path / f"{sha256}.pdf")
+    assert [name for name in os.listdir(tmp_path) if not name.startswith(".")] == [f"{sha256}.pdf"]
+
+
+def test_manifest_reloads_and_skips_torn_lines(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    manifest.add("aaa", "aaa.pdf", 1, url="https://repo.test/a.pdf")
+    manifest.add("bbb", "bbb.pdf", 2, url="https://repo.test/b.pdf", etag='"v1"')
+    # 模拟写入中途崩溃留下的半行
+    with open(tmp_path / MANIFEST_FILENAME, "a", encoding="utf-8") as f:
+        f.write('{"sha256": "ccc", "filen')
+    reloaded = PaperManifest(str(tmp_path))
+    assert reloaded.get("bbb")["etag"] == '"v1"'
+    assert reloaded.get("ccc") is None
+    # 残行之后追加的记录单独成行，重新加载后仍可读取
+    reloaded.add("ddd", "ddd.pdf", 3, url="https://repo.test/d.pdf")
+    assert PaperManifest(str(tmp_path)).get("ddd")["size"] == 3
+
+
+def test_manifest_remove_rewrites_file(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    manifest.add("aaa", "aaa.pdf", 1, url="https://repo.test/a.pdf")
+    manifest.add("aaa", "aaa.pdf", 1, url="https://repo.test/a2.pdf")
+    manifest.add("bbb", "bbb.pdf", 1, url="https://repo.test/b.pdf")
+    assert manifest.remove(["aaa"]) == 2
+    assert manifest.get("aaa") is None
+    assert manifest.lookup_url("https://repo.test/a2.pdf") is None
+    assert PaperManifest(str(tmp_path)).get("bbb") is not None
+
+
+def test_manifest_lookup_by_url_arxiv_id_and_core_id(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    (tmp_path / "abc.pdf").write_bytes(b"%PDF-")
+    manifest.add("abc", "abc.pdf", 5, url="https://arxiv.org/abs/2101.00001v2", core_id=42, etag='"v1"')
+    assert manifest.lookup("http://arxiv.org/pdf/2101.00001v2.pdf")["etag"] == '"v1"'
+    # 其他版本号的链接按 arXiv id 命中，但不带原链接的校验器
+    other_version = manifest.lookup("https://export.arxiv.org/abs/2101.00001v3")
+    assert other_version["sha256"] == "abc" and other_version["etag"] is None
+    assert manifest.lookup(core_id="42")["sha256"] == "abc"
+    assert manifest.lookup("https://repo.test/unknown.pdf") is None
+
+
+def test_manifest_ignores_records_whose_file_is_gone(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    manifest.add("gone", "gone.pdf", 5, url="https://repo.test/gone.pdf")
+    assert manifest.get("gone") is not None
+    assert manifest.lookup("https://repo.test/gone.pdf") is None
+
+
+def test_urls_serving_same_content_keep_their_own_validators(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    (tmp_path / "same.pdf").write_bytes(b"%PDF-")
+    manifest.add("same", "same.pdf", 5, url="https://repo.test/a.pdf", etag='"a"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    manifest.add("same", "same.pdf", 5, url="https://mirror.test/b.pdf", etag='"b"')
+    for reloaded in (manifest, PaperManifest(str(tmp_path))):
+        first = reloaded.lookup("https://repo.test/a.pdf")
+        assert (first["url"], first["etag"], first["last_modified"]) == (
+            "https://repo.test/a.pdf", '"a"', "Mon, 01 Jan 2024 00:00:00 GMT",
+        )
+        second = reloaded.lookup("https://mirror.test/b.pdf")
+        assert (second["url"], second["etag"], second["last_modified"]) == ("https://mirror.test/b.pdf", '"b"', None)
+
+
+def test_add_without_validators_keeps_those_of_the_same_content(tmp_path):
+    manifest = PaperManifest(str(tmp_path))
+    (tmp_path / "v1.pdf").write_bytes(b"%PDF-1")
+    (tmp_path / "v2.pdf").write_bytes(b"%PDF-2")
+    manifest.add("v1", "v1.pdf", 6, url="https://repo.test/a.pdf", etag='"v1"')
+    # 例如镜像胜出后以主链接重新登记同一内容
+    manifest.add("v1", "v1.pdf", 6, url="https://repo.test/a.pdf", core_id=7)
+    assert PaperManifest(str(tmp_path)).lookup("https://repo.test/a.pdf")["etag"] == '"v1"'
+    # 内容变化时旧校验器失效
+    manifest.add("v2", "v2.pdf", 6, url="https://repo.test/a.pdf")
+    assert manifest.lookup("https://repo.test/a.pdf")["etag"] is None
+
+
+def test_quota_evicts_least_recently_used_with_text_and_manifest(tmp_path):
+    old_path, old_sha = write_paper(tmp_path, b"%PDF-old" + b"x" * 1000, age=300)
+    mid_path, mid_sha = write_paper(tmp_path, b"%PDF-mid" + b"x" * 1000, age=200)
+    new_path, new_sha = write_paper(tmp_path, b"%PDF-new" + b"x" * 1000, age=100)
+    os.makedirs(tmp_path / TEXT_DIRNAME)
+    text_path = tmp_path / TEXT_DIRNAME / f"{old_sha}.pdfplumber-test.json"
+    text_path.write_text("{}")
+    os.utime(text_path, (time.time() - 300, time.time() - 300))
+
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=2100, low_watermark=1.0)
+    result = quota.evict()
+    assert result["evicted"] == 1
+    assert not os.path.exists(old_path) and not text_path.exists()
+    assert os.path.exists(mid_path) and os.path.exists(new_path)
+    assert get_paper_manifest(str(tmp_path)).get(old_sha) is None
+    assert get_paper_manifest(str(tmp_path)).get(mid_sha) is not None
+
+
+def test_quota_low_watermark(tmp_path):
+    for i in range(4):
+        write_paper(tmp_path, b"%PDF-" + bytes([i]) * 1000, age=100 - i)
+    # 超出上限后淘汰到上限的一半以下
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=3500, low_watermark=0.5)
+    assert quota.evict()["evicted"] == 3
+    assert quota.usage() <= 1750
+
+
+def test_quota_protects_active_run_and_pins(tmp_path):
+    old_path, old_sha = write_paper(tmp_path, b"%PDF-old" + b"x" * 1000, age=300)
+    pinned_path, pinned_sha = write_paper(tmp_path, b"%PDF-pin" + b"x" * 1000, age=200)
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=500, low_watermark=1.0)
+    quota.pin(pinned_sha)
+    with quota.active_run():
+        # 运行开始之后用过的论文不会被淘汰
+        used_path, _ = write_paper(tmp_path, b"%PDF-used" + b"x" * 1000)
+        quota.evict()
+    assert not os.path.exists(old_path)
+    assert os.path.exists(pinned_path) and os.path.exists(used_path)
+    quota.unpin(pinned_sha)
+    quota.evict()
+    assert not os.path.exists(pinned_path)
+
+
+def test_record_write_triggers_eviction_and_keeps_new_file(tmp_path):
+    old_path, _ = write_paper(tmp_path, b"%PDF-old" + b"x" * 1000, age=300)
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=1500, low_watermark=1.0)
+    quota.usage()
+    new_path, _ = write_paper(tmp_path, b"%PDF-new" + b"x" * 1000, age=600)
+    # 新文件的修改时间更早，但作为刚写入的文件本次保留
+    quota.record_write(os.path.getsize(new_path), keep=new_path)
+    assert os.path.exists(new_path)
+    assert not os.path.exists(old_path)
+
+
+def hold_in_other_process(save_dir, action: str) -> subprocess.Popen:
+    """在另一个进程中对 save_dir 执行 action（如 pin 或 begin_run），保持到标准输入关闭"""
+    code = (
+        "import sys\n"
+        "from src.services.paper_store import PaperStoreQuota\n"
+        f"quota = PaperStoreQuota({str(save_dir)!r}, max_bytes=1)\n"
+        f"quota.{action}\n"
+        "print('ready', flush=True)\n"
+        "sys.stdin.read()\n"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=PROJECT_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    assert process.stdout.readline().strip() == "ready"
+    return process
+
+
+def test_pins_and_runs_of_other_processes_are_respected(tmp_path):
+    old_path, _ = write_paper(tmp_path, b"%PDF-old" + b"x" * 1000, age=300)
+    pinned_path, pinned_sha = write_paper(tmp_path, b"%PDF-pin" + b"x" * 1000, age=200)
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=500, low_watermark=1.0)
+    pinner = hold_in_other_process(tmp_path, f"pin({pinned_sha!r})")
+    runner = hold_in_other_process(tmp_path, "begin_run()")
+    try:
+        used_path, _ = write_paper(tmp_path, b"%PDF-used" + b"x" * 1000)
+        quota.evict()
+        assert not os.path.exists(old_path)
+        assert os.path.exists(pinned_path) and os.path.exists(used_path)
+    finally:
+        for process in (pinner, runner):
+            process.communicate(timeout=10)
+    # 持有进程退出后不再保护，遗留的标记在淘汰时删除
+    quota.evict()
+    assert not os.path.exists(pinned_path) and not os.path.exists(used_path)
+    assert os.listdir(tmp_path / QUOTA_DIRNAME) == []
+
+
+def test_reading_papers_pins_them_without_refreshing_last_use(tmp_path, monkeypatch):
+    path, sha256 = write_paper(tmp_path, b"Full text of an old paper.", age=300)
+    os.rename(path, tmp_path / f"{sha256}.txt")
+    monkeypatch.setattr(paper_service, "SAVE_DIR", str(tmp_path))
+    quota = PaperStoreQuota(str(tmp_path), max_bytes=1, low_watermark=1.0)
+    monkeypatch.setattr(paper_service, "get_store_quota", lambda: quota)
+    pinned_during_read = []
+    read_papers = PaperService._read_papers
+
+    def read_and_record(self, filenames):
+        pinned_during_read.extend(quota.stats()["pinned"] for _ in filenames)
+        return read_papers(self, filenames)
+
+    monkeypatch.setattr(PaperService, "_read_papers", read_and_record)
+    papers = PaperService(extract_workers=1).extract_paper_content_from_save_dir()
+    assert [paper["content"] for paper in papers] == ["Full text of an old paper."]
+    assert pinned_during_read == [1]
+    assert quota.stats()["pinned"] == 0
+    # 读取不算作本次运行用过，修改时间保持不变
+    assert time.time() - os.path.getmtime(tmp_path / f"{sha256}.txt") > 200
@@ -0,0 +1,84 @@
+"""后台预取队列：同一链接去重、失败后重新提交与已结束任务的数量上限"""
+
+from concurrent.futures import Future
+from typing import Any, Dict
+
+from src.services.prefetch_queue import PaperPrefetchQueue
+
+
+class FakeScheduler:
+    """只记录提交的任务，Future 由测试手动完成"""
+
+    def __init__(self):
+        self.submitted: list[Dict[str, Any]] = []
+
+    def submit(self, url: str, fn, *args, priority: float = 0.0, max_retries: int = 0) -> Future:
+        future: Future = Future()
+        self.submitted.append({"url": url, "args": args, "priority": priority, "future": future})
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        pass
+
+
+def make_queue(max_finished: int = 16) -> tuple[PaperPrefetchQueue, FakeScheduler]:
+    scheduler = FakeScheduler()
+    return PaperPrefetchQueue(scheduler=scheduler, max_finished=max_finished), scheduler
+
+
+def test_same_url_shares_one_future():
+    queue, scheduler = make_queue()
+    first = queue.submit("https://repo.test/a.pdf", core_id=1)
+    assert queue.submit(" https://repo.test/a.pdf ", priority=-1) is first
+    assert len(scheduler.submitted) == 1
+    # 成功完成后仍直接复用结果
+    first.set_result("text")
+    assert queue.submit("https://repo.test/a.pdf") is first
+    assert len(scheduler.submitted) == 1
+
+
+def test_failed_download_is_resubmitted():
+    queue, scheduler = make_queue()
+    failed = queue.submit("https://repo.test/a.pdf")
+    failed.set_exception(ConnectionError("reset"))
+    assert queue.status("https://repo.test/a.pdf") == "failed"
+    retried = queue.submit("https://repo.test/a.pdf", priority=-1)
+    assert retried is not failed
+    assert scheduler.submitted[-1]["priority"] == -1
+    assert queue.status("https://repo.test/a.pdf") == "pending"
+
+
+def test_submit_many_uses_rank_as_priority_and_passes_mirrors():
+    queue, scheduler = make_queue()
+    queue.submit_many(
+        ["https://repo.test/a.pdf", "https://repo.test/b.pdf"],
+        core_ids={"https://repo.test/b.pdf": 7},
+        mirrors={"https://repo.test/b.pdf": ["https://mirror.test/b.pdf"]},
+    )
+    assert [job["priority"] for job in scheduler.submitted] == [0, 1]
+    assert scheduler.submitted[1]["args"] == ("https://repo.test/b.pdf", 7, ("https://mirror.test/b.pdf",))
+
+
+def test_finished_futures_are_capped_lru():
+    queue, scheduler = make_queue(max_finished=2)
+    futures = {name: queue.submit(f"https://repo.test/{name}.pdf") for name in "abcd"}
+    for name in "abc":
+        futures[name].set_result(name)
+    # 再次使用 a，b 成为最久未使用的已结束任务
+    queue.submit("https://repo.test/a.pdf")
+    queue.submit("https://repo.test/e.pdf")
+    assert queue.get("https://repo.test/b.pdf") is None
+    assert queue.get("https://repo.test/a.pdf") is futures["a"]
+    assert queue.get("https://repo.test/c.pdf") is futures["c"]
+    # 未结束的任务不受上限影响
+    assert queue.get("https://repo.test/d.pdf") is futures["d"]
+    assert queue.status() == {"pending": 2, "running": 0, "done": 2, "failed": 0}
+
+
+def test_wait_returns_status_counts():
+    queue, _ = make_queue()
+    done = queue.submit("https://repo.test/a.pdf")
+    queue.submit("https://repo.test/b.pdf")
+    done.set_result("text")
+    assert queue.wait(["https://repo.test/a.pdf"], timeout=1) == {"pending": 1, "running": 0, "done": 1, "failed": 0}
+    assert queue.wait(timeout=0.01)["pending"] == 1
@@ -0,0 +1,60 @@
+"""多查询结果去重（union-find）与倒数排序融合"""
+
+import pytest
+
+from src.services.rank_fusion import normalize_title, paper_keys, reciprocal_rank_fusion
+
+
+def paper(core_id, title, doi=None, **fields):
+    return {"id": core_id, "title": title, "doi": doi, **fields}
+
+
+def test_normalize_title_and_keys():
+    assert normalize_title("  Attention Is All You Need! ") == normalize_title("attention is all you need")
+    assert paper_keys(paper(1, "A Title", "https://doi.org/10.1/X")) == ["core:1", "doi:10.1/x", "title:a title"]
+    assert paper_keys({"title": ""}) == []
+
+
+def test_scores_sum_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([[paper(1, "A"), paper(2, "B")], [paper(2, "B"), paper(3, "C")]], k=60)
+    assert [result["id"] for result, _ in fused] == [2, 1, 3]
+    scores = {result["id"]: score for result, score in fused}
+    assert scores[2] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores[1] == pytest.approx(1 / 61)
+
+
+def test_duplicates_merge_across_different_keys():
+    # 不同 CORE id 的副本分别通过 DOI 与标题相连，传递合并为一篇
+    fused = reciprocal_rank_fusion([
+        [paper(1, "Graph Networks", doi="10.1/gn")],
+        [paper(2, "Graph networks.", doi=None, downloadUrl="https://repo.test/gn.pdf")],
+        [paper(3, "Another title", doi="10.1/GN")],
+    ])
+    assert len(fused) == 1
+    merged, score = fused[0]
+    assert merged["id"] == 1
+    # 副本补全代表条目缺失的字段
+    assert merged["downloadUrl"] == "https://repo.test/gn.pdf"
+    assert score == pytest.approx(3 / 61)
+
+
+def test_late_bridge_merges_two_existing_clusters():
+    first, second = paper(1, "Title One", doi="10.1/a"), paper(2, "Title Two", doi="10.1/b")
+    # 第二个查询中的条目同时带有两个簇的键，使两个簇合并
+    bridge = paper(3, "Title Two", doi="10.1/a")
+    fused = reciprocal_rank_fusion([[first, second], [bridge]])
+    assert len(fused) == 1
+    assert fused[0][0]["id"] == 1
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62 + 1 / 61)
+
+
+def test_duplicate_within_one_list_counts_once():
+    fused = reciprocal_rank_fusion([[paper(1, "Same"), paper(2, "same")]])
+    assert len(fused) == 1
+    assert fused[0][1] == pytest.approx(1 / 61)
+
+
+def test_inputs_are_not_mutated():
+    original = paper(1, "A")
+    reciprocal_rank_fusion([[original], [paper(2, "a", downloadUrl="https://repo.test/a.pdf")]])
+    assert "downloadUrl" not in original
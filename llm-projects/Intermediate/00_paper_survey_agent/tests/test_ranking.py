@@ -0,0 +1,60 @@
+"""下载前的 BM25 重排序：排序、top_k / min_score 筛选与运行级主题"""
+
+import json
+
+from src.services.ranking import (
+    DEFAULT_IDF_KEY, BM25Ranker, build_idf_table, query_topic, save_idf_table, select_for_download, tokenize,
+)
+
+
+def paper(title: str, abstract: str = "") -> dict:
+    return {"id": title, "title": title, "abstract": abstract}
+
+
+RESULTS = [
+    paper("A survey of cooking recipes", "Kitchen techniques and food."),
+    paper("Graph neural networks for molecules", "Message passing on molecular graphs."),
+    paper("Neural networks", "A general introduction."),
+    paper("Protein folding with graph neural networks", "Graph neural networks predict protein structure."),
+]
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The Graph of a Neural-Network, v2") == ["graph", "neural", "network", "v2"]
+    assert tokenize(None) == []
+
+
+def test_query_topic_strips_field_qualifiers():
+    assert tokenize(query_topic('title:"graph networks" AND yearPublished>=2020')) == ["graph", "networks", "2020"]
+
+
+def test_rank_orders_by_relevance_and_keeps_ties_stable():
+    ranked = BM25Ranker().rank("graph neural networks", RESULTS)
+    titles = [result["title"] for result, _ in ranked]
+    assert titles[0] == "Protein folding with graph neural networks"
+    assert titles[-1] == "A survey of cooking recipes"
+    assert ranked[-1][1] == 0.0
+    # 全部得分相同时保持 CORE 的原始顺序
+    assert [result for result, _ in BM25Ranker().rank("quantum", RESULTS)] == RESULTS
+
+
+def test_select_for_download_applies_top_k_and_min_score():
+    ranker = BM25Ranker()
+    assert len(select_for_download(ranker, "graph neural networks", RESULTS, top_k=0, min_score=0.0)) == 4
+    top_two = select_for_download(ranker, "graph neural networks", RESULTS, top_k=2, min_score=0.0)
+    assert [result["title"] for result in top_two] == [
+        "Protein folding with graph neural networks", "Graph neural networks for molecules",
+    ]
+    # 正的阈值过滤与主题没有任何共同词的结果
+    relevant = select_for_download(ranker, "graph neural networks", RESULTS, top_k=0, min_score=0.01)
+    assert "A survey of cooking recipes" not in [result["title"] for result in relevant]
+
+
+def test_precomputed_idf_table_round_trips(tmp_path):
+    table = build_idf_table(["graph networks", "graph models", "cooking"])
+    assert table["graph"] < table["cooking"]
+    assert DEFAULT_IDF_KEY in table
+    path = tmp_path / "idf.json"
+    save_idf_table(table, str(path))
+    assert json.loads(path.read_text()) == table
+    assert BM25Ranker.from_file(str(path)).idf_table == table
@@ -0,0 +1,102 @@
+"""CORE API 令牌桶限流器"""
+
+import asyncio
+import threading
+import time
+
+from src.services import core_api
+from src.services.core_api import CoreAPIWrapper
+from src.services.rate_limiter import TokenBucketRateLimiter, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Thu, 01 Jan 2099 00:00:00 GMT") > 1e6
+
+
+def test_burst_then_rate_limited():
+    limiter = TokenBucketRateLimiter(rate=20, burst=3)
+    start = time.monotonic()
+    for _ in range(3):
+        assert limiter.acquire() == 0.0
+    assert time.monotonic() - start < 0.05
+    # 令牌用完后按速率补充：第 4 个请求约等待 1 / 20 秒
+    assert 0.03 <= limiter.acquire() <= 0.1
+
+
+def test_disabled_limiter_never_waits():
+    limiter = TokenBucketRateLimiter(rate=0, burst=1)
+    assert not limiter.enabled
+    assert sum(limiter.acquire() for _ in range(10)) == 0.0
+
+
+def test_penalize_pauses_the_bucket():
+    limiter = TokenBucketRateLimiter(rate=1000, burst=10)
+    limiter.penalize(0.1)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_shared_state_between_instances(tmp_path):
+    path = str(tmp_path / "rate.sqlite")
+    first = TokenBucketRateLimiter(rate=20, burst=2, state_path=path)
+    second = TokenBucketRateLimiter(rate=20, burst=2, state_path=path)
+    first.acquire()
+    first.acquire()
+    # 另一个实例（模拟另一个进程）共享同一份令牌
+    assert second.acquire() > 0
+
+
+def test_aacquire_spaces_concurrent_requests(tmp_path):
+    limiter = TokenBucketRateLimiter(rate=50, burst=2, state_path=str(tmp_path / "rate.sqlite"))
+
+    async def main() -> float:
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.aacquire() for _ in range(7)))
+        return time.monotonic() - start
+
+    # 2 个突发令牌之后的 5 个请求按 50 / 秒放行
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_apenalize_updates_shared_state_off_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "rate.sqlite")
+    limiter = TokenBucketRateLimiter(rate=1000, burst=10, state_path=path)
+    threads = []
+    penalize = limiter.penalize
+
+    def record(retry_after: float) -> None:
+        threads.append(threading.current_thread())
+        penalize(retry_after)
+
+    monkeypatch.setattr(limiter, "penalize", record)
+
+    async def main() -> threading.Thread:
+        await limiter.apenalize(0.1)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+    assert threads and threads[0] is not loop_thread
+    # 暂停写入共享状态，另一个实例同样需要等待
+    assert TokenBucketRateLimiter(rate=1000, burst=10, state_path=path).acquire() >= 0.05
+
+
+def test_async_search_throttling_uses_apenalize(monkeypatch):
+    calls = []
+
+    class Limiter:
+        def penalize(self, retry_after: float) -> None:
+            calls.append(("penalize", retry_after))
+
+        async def apenalize(self, retry_after: float) -> None:
+            calls.append(("apenalize", retry_after))
+
+    monkeypatch.setattr(core_api, "get_core_rate_limiter", lambda: Limiter())
+    assert asyncio.run(CoreAPIWrapper._athrottled(429, {"Retry-After": "2"}, 0))
+    assert not asyncio.run(CoreAPIWrapper._athrottled(503, {}, 0))
+    assert CoreAPIWrapper._throttled(503, {"Retry-After": "1"}, 0)
+    assert calls == [("apenalize", 2.0), ("penalize", 1.0)]
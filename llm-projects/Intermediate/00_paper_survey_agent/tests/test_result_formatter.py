@@ -0,0 +1,75 @@
+"""搜索结果按 token 预算格式化"""
+
+from src.services.result_formatter import PaperMetadataStore, estimate_tokens, format_search_results
+
+
+def make_results(count: int, abstract_words: int = 300, authors: int = 6) -> list[dict]:
+    return [
+        {
+            "id": 1000 + i,
+            "title": f"Paper {i} on efficient retrieval",
+            "yearPublished": 2020 + i % 5,
+            "authors": [{"name": f"Author {i}-{j}"} for j in range(authors)],
+            "abstract": " ".join(f"word{j}" for j in range(abstract_words)),
+            "downloadUrl": f"https://repo.test/{i}.pdf",
+        }
+        for i in range(count)
+    ]
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("论文检索") == 4
+
+
+def test_small_result_set_keeps_abstracts_and_limits_authors():
+    text = format_search_results(make_results(2), token_budget=4000, max_abstract_chars=100, max_authors=3)
+    assert "摘要: word0" in text
+    assert "Author 0-2 等 6 人" in text and "Author 0-3" not in text
+    assert "链接: https://repo.test/1.pdf" in text
+
+
+def test_abstracts_shrink_before_results_are_dropped():
+    results = make_results(10)
+    full = format_search_results(results, token_budget=100_000, max_abstract_chars=400)
+    budget = estimate_tokens(full) * 2 // 3
+    text = format_search_results(results, token_budget=budget, max_abstract_chars=400)
+    assert estimate_tokens(text) <= budget
+    assert "摘要:" in text
+    assert all(f"ID: {result['id']}" in text for result in results)
+
+
+def test_over_budget_drops_lower_ranked_results_but_keeps_links_and_authors():
+    results = make_results(100)
+    text = format_search_results(results, token_budget=1000)
+    assert estimate_tokens(text) <= 1000
+    assert "摘要:" not in text
+    assert "另有" in text and "篇结果因长度限制已省略" in text
+    kept = [result for result in results if f"ID: {result['id']} " in text]
+    # 保留排名靠前的结果，每条都带作者与下载链接
+    assert kept == results[:len(kept)] and len(kept) > 5
+    for result in kept:
+        assert result["downloadUrl"] in text
+        assert result["authors"][0]["name"] in text
+
+
+def test_id_only_is_explicit_and_keeps_links():
+    results = make_results(20)
+    text = format_search_results(results, token_budget=100_000, id_only=True)
+    assert "作者:" not in text and "摘要:" not in text
+    assert all(result["downloadUrl"] in text for result in results)
+    # 默认不会退化为仅 ID 的格式
+    assert "作者:" in format_search_results(results, token_budget=500)
+
+
+def test_empty_results():
+    assert format_search_results([]) == "未找到相关结果"
+
+
+def test_metadata_store_is_bounded_lru_without_fulltext():
+    store = PaperMetadataStore(max_entries=2)
+    store.add_many([{"id": 1, "fullText": "long"}, {"id": 2}])
+    store.add_many([{"id": 1}, {"id": 3}])
+    assert store.get(2) is None
+    assert store.get(" 1 ") == {"id": 1}
+    assert "fullText" not in store.get(3)
@@ -0,0 +1,73 @@
+"""SQLite 搜索缓存：TTL 过期与 LRU 淘汰"""
+
+import time
+
+from src.services.search_cache import SearchCache
+
+
+def make_cache(tmp_path, ttl_seconds=3600, max_bytes=10_000):
+    return SearchCache(str(tmp_path / "cache.sqlite"), ttl_seconds, max_bytes)
+
+
+def test_key_normalizes_whitespace_but_keeps_case():
+    assert SearchCache.make_key("deep  learning\n", 10, 0) == SearchCache.make_key("deep learning", 10, 0)
+    # CORE 查询中的 AND / OR 区分大小写
+    assert SearchCache.make_key("a AND b", 10, 0) != SearchCache.make_key("a and b", 10, 0)
+    assert SearchCache.make_key("q", 10, 0) != SearchCache.make_key("q", 10, 10)
+
+
+def test_key_depends_on_api_base_url():
+    # 本地桩服务的合成结果不能命中（或污染）真实 API 的缓存
+    stub = SearchCache.make_key("q", 10, 0, "http://127.0.0.1:8765/v3")
+    assert stub != SearchCache.make_key("q", 10, 0, "https://api.core.ac.uk/v3")
+    assert stub == SearchCache.make_key("q", 10, 0, "http://127.0.0.1:8765/v3/")
+
+
+def test_get_returns_stored_value_and_counts_hits(tmp_path):
+    cache = make_cache(tmp_path)
+    key = SearchCache.make_key("transformers", 10, 0)
+    assert cache.get(key) is None
+    cache.set(key, {"results": [{"id": 1}]})
+    assert cache.get(key) == {"results": [{"id": 1}]}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_expired_entries_are_misses_and_evicted(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=0.05)
+    cache.set("old", {"v": 1})
+    time.sleep(0.1)
+    assert cache.get("old") is None
+    # 下一次写入时清理过期条目
+    cache.set("new", {"v": 2})
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    payload = {"v": "x" * 100}
+    cache = make_cache(tmp_path, max_bytes=250)
+    cache.set("a", payload)
+    time.sleep(0.01)
+    cache.set("b", payload)
+    time.sleep(0.01)
+    # 读取 a 后，b 成为最久未访问的条目
+    assert cache.get("a") is not None
+    time.sleep(0.01)
+    cache.set("c", payload)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] <= 250
+
+
+def test_oversized_values_are_not_stored(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=50)
+    cache.set("big", {"v": "x" * 100})
+    assert cache.get("big") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_are_shared_between_instances(tmp_path):
+    make_cache(tmp_path).set("k", {"v": 1})
+    assert make_cache(tmp_path).get("k") == {"v": 1}
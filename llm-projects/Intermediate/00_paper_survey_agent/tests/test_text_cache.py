@@ -0,0 +1,72 @@
+"""PDF 解析文本缓存：按内容哈希命中、解析器版本变化后失效与分页偏移"""
+
+import hashlib
+import os
+
+import pytest
+
+from src.services import text_cache
+from src.services.text_cache import ExtractedTextCache, file_sha256, page_text
+
+
+@pytest.fixture
+def pdf_file(tmp_path, paper_pdf) -> str:
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(paper_pdf)
+    return str(path)
+
+
+def count_extractions(monkeypatch) -> list[str]:
+    calls = []
+    extract_pdf = text_cache.extract_pdf
+
+    def counting(filepath):
+        calls.append(filepath)
+        return extract_pdf(filepath)
+
+    monkeypatch.setattr(text_cache, "extract_pdf", counting)
+    return calls
+
+
+def test_second_load_hits_cache(tmp_path, pdf_file, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    cache = ExtractedTextCache(str(tmp_path))
+    first = cache.load_or_extract(pdf_file)
+    second = cache.load_or_extract(pdf_file)
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["text"] == first["text"] and "Conditional requests" in first["text"]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_same_content_under_another_name_is_not_parsed_again(tmp_path, pdf_file, paper_pdf, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    cache = ExtractedTextCache(str(tmp_path))
+    cache.load_or_extract(pdf_file)
+    copy = tmp_path / "renamed-copy.pdf"
+    copy.write_bytes(paper_pdf)
+    assert file_sha256(str(copy)) == hashlib.sha256(paper_pdf).hexdigest()
+    assert cache.load_or_extract(str(copy))["cached"]
+    assert len(calls) == 1
+
+
+def test_extractor_version_change_misses_and_replaces_old_entry(tmp_path, pdf_file, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    old = ExtractedTextCache(str(tmp_path), version="1.0-r1")
+    sha256 = old.load_or_extract(pdf_file)["sha256"]
+    new = ExtractedTextCache(str(tmp_path), version="1.0-r2")
+    # 旧版本的结果不命中，重新解析
+    assert new.lookup(pdf_file)[1] is None
+    assert not new.load_or_extract(pdf_file)["cached"]
+    assert len(calls) == 2
+    # 保存新版本时删除同一内容的旧版本结果
+    assert os.listdir(old.directory) == [os.path.basename(new.path(sha256))]
+    assert old.get(sha256) is None
+
+
+def test_page_offsets_split_text_by_page(tmp_path, pdf_file):
+    entry = ExtractedTextCache(str(tmp_path)).load_or_extract(pdf_file)
+    pages = [page_text(entry, page) for page in range(len(entry["page_offsets"]))]
+    assert len(pages) == 2
+    assert "".join(pages) == entry["text"]
+    assert all(page.endswith("\n") for page in pages)